@@ -0,0 +1,7 @@
+# benchmarks/__init__.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Initialization module for the benchmarks package, whose modules are each run
+# from the project directory with python -m (e.g., python -m benchmarks.record_memory).
@@ -0,0 +1,417 @@
+# benchmarks/engine_latency.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Measures the latency and throughput of the engine: every search, load-by-ID,
+# save and update method of the Database, then a selection of events processed
+# end to end by Engine.process_event, e.g.,
+#
+#     python -m benchmarks.engine_latency --regions 100000 --output results.json
+#     python -m benchmarks.engine_latency airport.db --baseline results.json
+#
+# The database is either a copy of the one given (so that the saves measured don't
+# change it) or a synthetic one generated at the given scale.  Each call's arguments
+# are drawn at random from the database's own rows, with a fixed seed, so two runs
+# against the same database make the same calls.  Each case is run until it's made
+# the given number of calls or run for the given number of seconds, whichever comes
+# first, and is reported as its median (p50) and 99th percentile (p99) latency and
+# its throughput in calls per second.
+#
+# The results are written as JSON, along with what they were measured against, so
+# runs can be compared; given a previous run's results as a baseline, the change in
+# each case's median latency is printed as well.
+
+import argparse
+import datetime
+import json
+import math
+from pathlib import Path
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from p2app.engine import Engine
+from p2app.engine.database import Database
+from p2app.events import *
+from .synthetic import generate
+
+
+
+_DEFAULT_CALL_COUNT = 200
+_DEFAULT_MAX_SECONDS = 5.0
+_DEFAULT_REGION_COUNT = 1000
+_DEFAULT_OUTPUT_PATH = Path('benchmark_results.json')
+
+_MEASURED_PREFIXES = ('search_', 'save_new_', 'update_')
+
+
+
+def _percentile(sorted_values: list, percent: float):
+    """Returns the nearest-rank percentile of a sorted list"""
+    rank = max(1, math.ceil(len(sorted_values) * percent / 100))
+    return sorted_values[rank - 1]
+
+
+
+def _summarize(latencies_ns: list[int], failures: int) -> dict:
+    latencies_ns = sorted(latencies_ns)
+    total_ns = sum(latencies_ns)
+    return {
+        'calls': len(latencies_ns),
+        'failures': failures,
+        'p50_ms': _percentile(latencies_ns, 50) / 1e6,
+        'p99_ms': _percentile(latencies_ns, 99) / 1e6,
+        'mean_ms': total_ns / len(latencies_ns) / 1e6,
+        'throughput_per_s': len(latencies_ns) / (total_ns / 1e9) if total_ns > 0 else None
+    }
+
+
+
+def _measure(call, arguments, call_count: int, max_seconds: float) -> dict:
+    """Calls call with each tuple of arguments in turn (cycling through them) until it's
+    been called call_count times or max_seconds have passed, consuming any generator it
+    returns, and summarizes how long the calls took. A call that returns an error
+    message (as the Database's saves do) or an event that reports a failure counts as
+    a failure."""
+    latencies_ns = []
+    failures = 0
+    deadline = time.perf_counter() + max_seconds
+
+    for index in range(call_count):
+        start = time.perf_counter_ns()
+        result = call(*arguments[index % len(arguments)])
+        if not isinstance(result, (list, str, tuple, type(None))):
+            result = list(result)
+        latencies_ns.append(time.perf_counter_ns() - start)
+
+        if isinstance(result, str) or (isinstance(result, list) and any(
+                isinstance(event, ErrorEvent) or type(event).__name__.endswith('FailedEvent')
+                for event in result)):
+            failures += 1
+
+        if time.perf_counter() > deadline:
+            break
+
+    return _summarize(latencies_ns, failures)
+
+
+
+class _Sample:
+    """Rows drawn at random from a database, for building the arguments of calls"""
+
+    def __init__(self, path, size: int, seed: int):
+        rng = random.Random(seed)
+        connection = sqlite3.connect(path)
+        try:
+            self.continents = self._rows(connection, Continent, 'continent', size, rng)
+            self.countries = self._rows(connection, Country, 'country', size, rng)
+            self.regions = self._rows(connection, Region, 'region', size, rng)
+            self.airports = self._rows(connection, Airport, 'airport', size, rng)
+            cursor = connection.execute("""
+                SELECT name
+                FROM sqlite_schema
+                WHERE type = 'table' ;
+                """)
+            tables = {name for name, in cursor.fetchall()}
+            cursor.close()
+            self.row_counts = {
+                table: connection.execute(f'SELECT COUNT(*) FROM {table} ;').fetchone()[0]
+                for table in ('continent', 'country', 'region', 'airport', 'runway',
+                              'airport_frequency', 'navigation_aid')
+                if table in tables
+            }
+        finally:
+            connection.close()
+
+
+    @staticmethod
+    def _rows(connection, record_type, table: str, size: int, rng: random.Random) -> list:
+        """Returns up to size rows of a table, each the first whose key is at least a
+        randomly chosen key, so that the same seed always draws the same rows"""
+        cursor = connection.execute(f'SELECT MIN(rowid), MAX(rowid) FROM {table} ;')
+        lowest, highest = cursor.fetchone()
+        cursor.close()
+        if lowest is None:
+            return []
+        rows = []
+        for _ in range(size):
+            cursor = connection.execute(f"""
+                SELECT *
+                FROM {table}
+                WHERE rowid >= ?
+                ORDER BY rowid
+                LIMIT 1 ;
+                """, (rng.randint(lowest, highest),))
+            rows.append(record_type(*cursor.fetchone()))
+            cursor.close()
+        return rows
+
+
+
+def _new_code(prefix: str, index: int) -> str:
+    return f'{prefix}{index:06}'
+
+
+
+def _database_cases(database: Database, sample: _Sample, call_count: int) -> list:
+    """Returns (name, call, arguments) for each Database method that's measured"""
+    continents, countries, regions, airports = \
+        sample.continents, sample.countries, sample.regions, sample.airports
+    points = [(airport.latitude_deg, airport.longitude_deg) for airport in airports]
+    words = [(airport.name.split()[0],) for airport in airports]
+    region_count = sample.row_counts['region']
+
+    new_continents = [
+        (Continent(None, _new_code('B', index), f'Continent {index}'),)
+        for index in range(call_count)
+    ]
+    new_countries = [
+        (Country(None, _new_code('B', index), f'Country {index}', continent.continent_id,
+                 'https://en.wikipedia.org/wiki/Country', None),)
+        for index, continent in zip(range(call_count), _cycle(continents))
+    ]
+    new_regions = [
+        (Region(None, _new_code('B-', index), 'B', f'Region {index}', region.continent_id,
+                region.country_id, None, None),)
+        for index, region in zip(range(call_count), _cycle(regions))
+    ]
+    new_airports = [
+        (airport._replace(airport_id = None, airport_ident = _new_code('B-', index),
+                          name = f'Airport {index}'),)
+        for index, airport in zip(range(call_count), _cycle(airports))
+    ]
+
+    return [
+        ('search_continent (code)', database.search_continent,
+            [(continent.continent_code, None) for continent in continents]),
+        ('search_continent (name)', database.search_continent,
+            [(None, continent.name) for continent in continents]),
+        ('search_country (code)', database.search_country,
+            [(country.country_code, None) for country in countries]),
+        ('search_country (name)', database.search_country,
+            [(None, country.name) for country in countries]),
+        ('search_region (region code)', database.search_region,
+            [(region.region_code, None, None) for region in regions]),
+        ('search_region (local code)', database.search_region,
+            [(None, region.local_code, None) for region in regions]),
+        ('search_region (name)', database.search_region,
+            [(None, None, region.name) for region in regions]),
+        ('search_airport (ident)', database.search_airport,
+            [(airport.airport_ident, None) for airport in airports]),
+        ('search_airport (name)', database.search_airport,
+            [(None, airport.name) for airport in airports]),
+        ('search_continent_by_id', database.search_continent_by_id,
+            [(continent.continent_id,) for continent in continents]),
+        ('search_country_by_id', database.search_country_by_id,
+            [(country.country_id,) for country in countries]),
+        ('search_region_by_id', database.search_region_by_id,
+            [(region.region_id,) for region in regions]),
+        ('search_airport_by_id', database.search_airport_by_id,
+            [(airport.airport_id,) for airport in airports]),
+        ('search_page (region, 50 rows)', database.search_page,
+            [('region', (), 50, region.region_id % region_count) for region in regions]),
+        ('search_text', database.search_text, words),
+        ('search_airports_in_box', database.search_airports_in_box,
+            [(latitude - 1, latitude + 1, longitude - 1, longitude + 1) for latitude, longitude in points]),
+        ('search_airports_near', database.search_airports_near,
+            [(latitude, longitude, 50) for latitude, longitude in points]),
+        ('search_nearest_airports', database.search_nearest_airports,
+            [(latitude, longitude, 10) for latitude, longitude in points]),
+        ('search_frequencies', database.search_frequencies,
+            [([FrequencyQuery(118.0, 119.0, airport.airport_id, 50)],) for airport in airports]),
+        ('search_navigation_aids_near', database.search_navigation_aids_near,
+            [(latitude, longitude, 100) for latitude, longitude in points]),
+        ('search_runways', database.search_runways,
+            [(RunwayCriteria(min_length_ft = 8000, lighted = True, country_id = country.country_id),)
+             for country in countries]),
+        ('save_new_continent', database.save_new_continent, new_continents),
+        ('save_new_country', database.save_new_country, new_countries),
+        ('save_new_region', database.save_new_region, new_regions),
+        ('save_new_airport', database.save_new_airport, new_airports),
+        ('update_continent', database.update_continent,
+            [(continent._replace(name = continent.name + ' '),) for continent in continents]),
+        ('update_country', database.update_country,
+            [(country._replace(name = country.name + ' '),) for country in countries]),
+        ('update_region', database.update_region,
+            [(region._replace(name = region.name + ' '),) for region in regions]),
+        ('update_airport', database.update_airport,
+            [(airport._replace(name = airport.name + ' '),) for airport in airports])
+    ]
+
+
+
+def _engine_cases(engine: Engine, sample: _Sample, call_count: int) -> list:
+    """Returns (name, call, arguments) for each event processed by the Engine"""
+    regions, airports = sample.regions, sample.airports
+
+    def events(make_event, records):
+        return [(make_event(record),) for record in records]
+
+    def process(event):
+        return list(engine.process_event(event))
+
+    new_regions = [
+        Region(None, _new_code('E-', index), 'E', f'Region {index}', region.continent_id,
+               region.country_id, None, None)
+        for index, region in zip(range(call_count), _cycle(regions))
+    ]
+
+    return [
+        ('StartContinentSearchEvent', process,
+            events(lambda continent: StartContinentSearchEvent(continent.continent_code, None), sample.continents)),
+        ('StartRegionSearchEvent', process,
+            events(lambda region: StartRegionSearchEvent(None, None, region.name), regions)),
+        ('StartPagedRegionSearchEvent', process,
+            events(lambda region: StartPagedRegionSearchEvent(None, None, None, 50), regions)),
+        ('StartAirportSearchEvent', process,
+            events(lambda airport: StartAirportSearchEvent(airport.airport_ident, None), airports)),
+        ('LoadRegionEvent', process, events(lambda region: LoadRegionEvent(region.region_id), regions)),
+        ('LoadAirportEvent', process, events(lambda airport: LoadAirportEvent(airport.airport_id), airports)),
+        ('ResolveAirportCodeEvent', process,
+            events(lambda airport: ResolveAirportCodeEvent(airport.airport_ident), airports)),
+        ('StartTextSearchEvent', process,
+            events(lambda airport: StartTextSearchEvent(airport.name.split()[0]), airports)),
+        ('StartNearbyAirportSearchEvent', process,
+            events(lambda airport: StartNearbyAirportSearchEvent(
+                airport.latitude_deg, airport.longitude_deg, 50), airports)),
+        ('LoadCountryCountsEvent', process,
+            events(lambda country: LoadCountryCountsEvent(country.country_id), sample.countries)),
+        ('SaveNewRegionEvent', process, events(SaveNewRegionEvent, new_regions)),
+        ('SaveRegionEvent', process,
+            events(lambda region: SaveRegionEvent(region._replace(name = region.name + '  ')), regions))
+    ]
+
+
+
+def _cycle(records: list):
+    while True:
+        yield from records
+
+
+
+def _run_cases(cases, call_count: int, max_seconds: float) -> dict:
+    results = {}
+    for name, call, arguments in cases:
+        results[name] = _measure(call, arguments, call_count, max_seconds)
+        _print_result(name, results[name])
+    return results
+
+
+
+def _print_result(name: str, result: dict) -> None:
+    throughput = result['throughput_per_s']
+    print(f'{name:<36}{result["calls"]:>7} calls{result["p50_ms"]:>11.3f} ms p50'
+          f'{result["p99_ms"]:>11.3f} ms p99{throughput or 0:>12.0f}/s'
+          + (f'  ({result["failures"]} failed)' if result['failures'] else ''))
+
+
+
+def run(path, call_count: int = _DEFAULT_CALL_COUNT, max_seconds: float = _DEFAULT_MAX_SECONDS,
+        seed: int = 0) -> dict:
+    """Measures the Database methods and the Engine against a copy of the database at
+    path, returning the results and what they were measured against"""
+    with tempfile.TemporaryDirectory() as directory:
+        copy_path = Path(directory) / 'benchmark.db'
+        shutil.copyfile(path, copy_path)
+        sample = _Sample(copy_path, min(call_count, 10000), seed)
+
+        database = Database(copy_path)
+        database.open()
+        try:
+            database_cases = _database_cases(database, sample, call_count)
+            measured = {call.__name__ for name, call, arguments in database_cases}
+            unmeasured = sorted(
+                name for name in dir(Database)
+                if name.startswith(_MEASURED_PREFIXES) and name not in measured)
+            print('Database')
+            database_results = _run_cases(database_cases, call_count, max_seconds)
+        finally:
+            database.close()
+
+        engine = Engine()
+        list(engine.process_event(OpenDatabaseEvent(copy_path)))
+        try:
+            print('Engine.process_event')
+            engine_results = _run_cases(_engine_cases(engine, sample, call_count), call_count, max_seconds)
+        finally:
+            list(engine.process_event(CloseDatabaseEvent()))
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'database': str(path),
+        'row_counts': sample.row_counts,
+        'calls_per_case': call_count,
+        'max_seconds_per_case': max_seconds,
+        'seed': seed,
+        'database_methods': database_results,
+        'engine_events': engine_results,
+        'unmeasured_database_methods': unmeasured
+    }
+
+
+
+def _print_comparison(results: dict, baseline: dict) -> None:
+    print('Median latency compared to the baseline')
+    for group in ('database_methods', 'engine_events'):
+        for name, result in results[group].items():
+            previous = baseline.get(group, {}).get(name)
+            if previous is not None and previous['p50_ms'] > 0:
+                print(f'{name:<36}{result["p50_ms"] / previous["p50_ms"]:>10.2f}x')
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog = 'python -m benchmarks.engine_latency',
+        description = 'Measures the latency and throughput of the Database and the Engine.')
+    parser.add_argument(
+        'database', nargs = '?', type = Path,
+        help = 'the database to measure against (a synthetic one is generated if omitted)')
+    parser.add_argument(
+        '--regions', type = int, default = _DEFAULT_REGION_COUNT,
+        help = f'the scale of the synthetic database, in regions (default {_DEFAULT_REGION_COUNT})')
+    parser.add_argument(
+        '--calls', type = int, default = _DEFAULT_CALL_COUNT,
+        help = f'the most calls made in each case (default {_DEFAULT_CALL_COUNT})')
+    parser.add_argument(
+        '--max-seconds', type = float, default = _DEFAULT_MAX_SECONDS,
+        help = f'the most time spent on each case (default {_DEFAULT_MAX_SECONDS})')
+    parser.add_argument('--seed', type = int, default = 0, help = 'the random seed (default 0)')
+    parser.add_argument(
+        '--output', type = Path, default = _DEFAULT_OUTPUT_PATH,
+        help = f'the JSON file the results are written to (default {_DEFAULT_OUTPUT_PATH})')
+    parser.add_argument('--baseline', type = Path, help = "a previous run's results to compare against")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = arguments.database
+        if path is None:
+            path = Path(directory) / f'synthetic_{arguments.regions}.db'
+            print(f'Generating a synthetic database with {arguments.regions} regions')
+            generate(path, arguments.regions, seed = arguments.seed)
+
+        results = run(path, arguments.calls, arguments.max_seconds, arguments.seed)
+
+    if arguments.database is None:
+        results['database'] = f'synthetic, {arguments.regions} regions'
+
+    arguments.output.write_text(json.dumps(results, indent = 2) + '\n')
+    print(f'Results written to {arguments.output}')
+
+    if results['unmeasured_database_methods']:
+        print(f'Not measured: {", ".join(results["unmeasured_database_methods"])}', file = sys.stderr)
+
+    if arguments.baseline is not None:
+        _print_comparison(results, json.loads(arguments.baseline.read_text()))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/event_allocation.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Measures what it costs to create the events that a search produces, one per
+# result, comparing RegionSearchResultEvent against an equivalent event written
+# the way events were before they were derived from Event: a plain class with a
+# per-instance __dict__.
+#
+#     python -m benchmarks.event_allocation [number of events]
+
+import sys
+import timeit
+import tracemalloc
+from p2app.events import Region, RegionSearchResultEvent
+
+
+
+_DEFAULT_EVENT_COUNT = 100000
+
+
+
+class _PlainRegionSearchResultEvent:
+    def __init__(self, region: Region):
+        self._region = region
+
+
+    def region(self) -> Region:
+        return self._region
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: region = {repr(self._region)}'
+
+
+
+def _bytes_per_event(event_type, region: Region, count: int) -> float:
+    """Returns the average number of bytes allocated for each of count events"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    events = [event_type(region) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del events
+    return (after - before) / count
+
+
+
+def _seconds_per_event(event_type, region: Region, count: int) -> float:
+    """Returns the average time it takes to create an event and read its field"""
+    return timeit.timeit(lambda: event_type(region).region(), number = count) / count
+
+
+
+def run(count: int = _DEFAULT_EVENT_COUNT) -> dict[str, tuple[float, float]]:
+    """Returns the bytes allocated and seconds taken per event, for each kind of event"""
+    region = Region(1, 'US-CA', 'CA', 'California', 1, 1, None, None)
+    return {
+        name: (_bytes_per_event(event_type, region, count), _seconds_per_event(event_type, region, count))
+        for name, event_type in (('plain class', _PlainRegionSearchResultEvent),
+                                 ('Event', RegionSearchResultEvent))
+    }
+
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else _DEFAULT_EVENT_COUNT
+    print(f'{count} events')
+    for name, (size, seconds) in run(count).items():
+        print(f'{name:<16}{size:>8.1f} bytes each{seconds * 1e9:>10.1f} ns each')
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/record_memory.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Measures how much memory a large number of Region records take up in each of
+# the ways they can be held: as the named tuples that the engine produces, as
+# objects of an equivalent class with __slots__ (for comparison), as named tuples
+# whose strings are interned in a StringPool, and in a RecordColumns container.
+#
+# The rows are synthetic, but like the rows of a real database, every one of them
+# has its own copy of every string, even the ones that repeat from row to row.
+#
+#     python -m benchmarks.record_memory [number of regions]
+
+import sys
+import tracemalloc
+from p2app.engine.compact import RecordColumns, StringPool
+from p2app.events import Region
+
+
+
+_DEFAULT_REGION_COUNT = 100000
+
+_KEYWORDS = ('', 'islands', 'province', 'state', 'territory', 'county', 'district')
+
+
+
+class _SlottedRegion:
+    __slots__ = Region._fields
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+
+
+def _copy(text: str | None) -> str | None:
+    """Returns a new string equal to text, as reading it from a row would"""
+    return None if text is None else ''.join(list(text))
+
+
+
+def _rows(count: int):
+    """Generates count synthetic region rows, with country-wide values repeated"""
+    for region_id in range(1, count + 1):
+        country_id = region_id % 250 + 1
+        yield (region_id, f'C{country_id}-{region_id}', str(region_id % 100), f'Region {region_id}',
+               country_id % 7 + 1, country_id,
+               _copy(f'https://en.wikipedia.org/wiki/Regions_of_country_{country_id}'),
+               _copy(_KEYWORDS[region_id % len(_KEYWORDS)]) or None)
+
+
+
+def _measure(build, count: int) -> int:
+    """Returns the number of bytes still allocated after build is called with the
+    rows, while what it returns is alive"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build(_rows(count))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+
+def run(count: int = _DEFAULT_REGION_COUNT) -> dict[str, int]:
+    """Returns the number of bytes that count regions take up, held each way"""
+    return {
+        'namedtuple': _measure(lambda rows: [Region(*row) for row in rows], count),
+        '__slots__ class': _measure(lambda rows: [_SlottedRegion(*row) for row in rows], count),
+        'namedtuple, interned': _measure(
+            lambda rows: list(StringPool().intern_records(Region(*row) for row in rows)), count),
+        'RecordColumns': _measure(lambda rows: RecordColumns(Region, rows), count)
+    }
+
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else _DEFAULT_REGION_COUNT
+    results = run(count)
+    baseline = results['namedtuple']
+    print(f'{count} regions')
+    for representation, size in results.items():
+        print(f'{representation:<24}{size / count:>10.1f} bytes each{size / baseline:>10.2f}x')
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+# benchmarks/synthetic.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Generates a synthetic database with the structure in schema.sql, at whatever
+# scale a benchmark needs, e.g.,
+#
+#     python -m benchmarks.synthetic synthetic.db --regions 100000
+#
+# The scale is set by the number of regions; the other tables are sized relative
+# to it, with roughly the proportions and distributions of the OurAirports data:
+#
+# * The seven real continents, and up to 676 countries with two-letter codes.
+# * Regions are spread unevenly across countries, and airports unevenly across
+#   regions, so that a few have many and most have few.
+# * Airports are mostly small airports and heliports, with few large ones, and lie
+#   scattered around their country's center.  Their runways' count, length, width,
+#   surface and lighting depend on their type, as do their radio frequencies.
+# * Navigation aids are VORs, DMEs and NDBs, with frequencies in their real bands.
+#
+# The same seed always generates the same database.  Once the tables are filled,
+# the database is opened once, so that its secondary indexes, text search tables,
+# spatial indexes and materialized counts are built before anything is measured.
+
+import argparse
+import itertools
+from pathlib import Path
+import random
+import sqlite3
+import string
+from p2app.engine.database import Database
+
+
+
+_SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'schema.sql'
+
+_BATCH_SIZE = 10000
+
+_DEFAULT_REGION_COUNT = 1000
+_DEFAULT_AIRPORTS_PER_REGION = 5.0
+
+CONTINENTS = [
+    (1, 'AF', 'Africa'), (2, 'AN', 'Antarctica'), (3, 'AS', 'Asia'), (4, 'EU', 'Europe'),
+    (5, 'NA', 'North America'), (6, 'OC', 'Oceania'), (7, 'SA', 'South America')
+]
+
+# The relative frequency of each type of airport, and for each type: the mean and
+# standard deviation of its runways' lengths in feet, the chance that a runway is
+# lighted, and the chance that it has scheduled service.
+_AIRPORT_TYPES = {
+    'small_airport': (0.50, 3000, 1000, 0.15, 0.01),
+    'heliport': (0.22, 60, 20, 0.05, 0.0),
+    'closed': (0.11, 2500, 1000, 0.0, 0.0),
+    'medium_airport': (0.07, 6000, 1500, 0.8, 0.4),
+    'seaplane_base': (0.02, 4000, 1500, 0.0, 0.05),
+    'large_airport': (0.01, 10500, 2000, 1.0, 0.95),
+    'balloonport': (0.005, 500, 100, 0.0, 0.0)
+}
+
+# The chance that an airport of a type has 0, 1, 2, ... runways
+_RUNWAY_COUNTS = {
+    'large_airport': (0.0, 0.2, 0.35, 0.25, 0.12, 0.08),
+    'medium_airport': (0.02, 0.55, 0.3, 0.1, 0.03),
+    'small_airport': (0.3, 0.55, 0.12, 0.03),
+    'heliport': (0.4, 0.58, 0.02),
+    'closed': (0.6, 0.35, 0.05),
+    'seaplane_base': (0.2, 0.6, 0.2),
+    'balloonport': (0.7, 0.3)
+}
+
+_SURFACES = (('ASP', 0.38), ('TURF', 0.22), ('CON', 0.12), ('GRS', 0.1), ('GRVL', 0.08),
+             ('DIRT', 0.05), ('WATER', 0.03), (None, 0.02))
+
+_FREQUENCY_TYPES = (('CTAF', 0.3), ('TWR', 0.2), ('GND', 0.15), ('ATIS', 0.12), ('UNIC', 0.1),
+                    ('APP', 0.08), ('DEP', 0.05))
+
+# For each type of navigation aid: its relative frequency, and the lowest frequency,
+# highest frequency and spacing between frequencies (all in kHz) of its band
+_NAVIGATION_AID_TYPES = {
+    'VOR-DME': (0.35, 108000, 117950, 50),
+    'NDB': (0.3, 190, 1750, 1),
+    'VOR': (0.15, 108000, 117950, 50),
+    'DME': (0.1, 108000, 117950, 50),
+    'VORTAC': (0.06, 108000, 117950, 50),
+    'TACAN': (0.04, 962, 1213, 1)
+}
+
+_SYLLABLES = ('ka', 'lo', 'mi', 'ra', 'ten', 'var', 'do', 'sil', 'an', 'bur', 'gel', 'ho',
+              'ney', 'port', 'sa', 'tu', 'wen', 'ri', 'mont', 'la', 'ze', 'kor', 'ven', 'is')
+
+_AIRPORT_SUFFIXES = ('Airport', 'Airfield', 'Field', 'Heliport', 'Airstrip', 'Regional Airport',
+                     'International Airport', 'Seaplane Base', 'Municipal Airport')
+
+
+
+def _weighted(choices):
+    """Returns the values and cumulative weights of (value, weight) pairs, for
+    passing to random.choices"""
+    choices = list(choices)
+    values = [value for value, weight in choices]
+    return values, list(itertools.accumulate(weight for value, weight in choices))
+
+
+
+def _skewed_weights(count: int, rng: random.Random) -> list[float]:
+    """Returns cumulative weights for choosing among count things unevenly, so that a
+    few of them are chosen far more often than the rest"""
+    return list(itertools.accumulate(rng.paretovariate(1.2) for _ in range(count)))
+
+
+
+def _name(rng: random.Random, syllables: int) -> str:
+    return ''.join(rng.choice(_SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+
+def _code(index: int, length: int) -> str:
+    """Returns a distinct code of uppercase letters and digits for each index"""
+    characters = string.ascii_uppercase + string.digits
+    code = []
+    for _ in range(length):
+        index, remainder = divmod(index, len(characters))
+        code.append(characters[remainder])
+    return ''.join(reversed(code))
+
+
+
+def _insert(connection, table: str, rows) -> int:
+    """Inserts rows into a table in batches, returning how many were inserted"""
+    count = 0
+    while batch := list(itertools.islice(rows, _BATCH_SIZE)):
+        connection.executemany(
+            f'INSERT INTO {table} VALUES ({", ".join("?" for _ in batch[0])}) ;', batch)
+        count += len(batch)
+    return count
+
+
+
+class _Generator:
+    def __init__(self, region_count: int, airports_per_region: float, seed: int):
+        self._rng = random.Random(seed)
+        self._region_count = region_count
+        self._airport_count = max(1, round(region_count * airports_per_region))
+        self._countries = []
+        self._regions = []
+        self._airports = []
+
+
+    def countries(self):
+        rng = self._rng
+        country_count = min(676, max(1, self._region_count // 16))
+        continent_weights = list(itertools.accumulate((50, 1, 45, 50, 35, 25, 15)))
+        for country_id in range(1, country_count + 1):
+            continent_id, = rng.choices(range(1, len(CONTINENTS) + 1), cum_weights = continent_weights)
+            country_code = ''.join(string.ascii_uppercase[digit] for digit in divmod(country_id - 1, 26))
+            name = _name(rng, rng.randint(2, 3))
+            center = (rng.uniform(-55, 70), rng.uniform(-180, 180))
+            self._countries.append((country_id, country_code, continent_id, center))
+            keywords = None if rng.random() < 0.7 else f'{name}, {_name(rng, 2)}'
+            yield (country_id, country_code, name, continent_id,
+                   f'https://en.wikipedia.org/wiki/{name}', keywords)
+
+
+    def regions(self):
+        rng = self._rng
+        country_weights = _skewed_weights(len(self._countries), rng)
+        countries = rng.choices(self._countries, cum_weights = country_weights, k = self._region_count)
+        countries.sort(key = lambda country: country[0])
+        local_numbers = {}
+        for region_id, (country_id, country_code, continent_id, center) in enumerate(countries, start = 1):
+            local_number = local_numbers[country_id] = local_numbers.get(country_id, 0) + 1
+            local_code = _code(local_number - 1, 2 if local_number <= 1296 else 4)
+            name = _name(rng, rng.randint(2, 4))
+            self._regions.append((region_id, country_id, country_code, continent_id, center))
+            wikipedia_link = None if rng.random() < 0.3 else f'https://en.wikipedia.org/wiki/{name}'
+            keywords = None if rng.random() < 0.9 else _name(rng, 2)
+            yield (region_id, f'{country_code}-{local_code}', local_code, name, continent_id,
+                   country_id, wikipedia_link, keywords)
+
+
+    def airports(self):
+        rng = self._rng
+        types, type_weights = _weighted((name, shape[0]) for name, shape in _AIRPORT_TYPES.items())
+        region_weights = _skewed_weights(len(self._regions), rng)
+        for airport_id in range(1, self._airport_count + 1):
+            region_id, country_id, country_code, continent_id, (latitude, longitude) = \
+                rng.choices(self._regions, cum_weights = region_weights)[0]
+            airport_type, = rng.choices(types, cum_weights = type_weights)
+            scheduled_chance = _AIRPORT_TYPES[airport_type][4]
+            is_major = airport_type in ('large_airport', 'medium_airport')
+            latitude = max(-90.0, min(90.0, rng.gauss(latitude, 4.0)))
+            longitude = (rng.gauss(longitude, 6.0) + 180.0) % 360.0 - 180.0
+            name = f'{_name(rng, rng.randint(2, 3))} {rng.choice(_AIRPORT_SUFFIXES)}'
+            ident = f'{country_code}-{airport_id}' if not is_major else f'{country_code}{_code(airport_id, 5)}'
+            municipality = None if rng.random() < 0.25 else _name(rng, 2)
+            elevation_ft = None if rng.random() < 0.05 else int(rng.lognormvariate(6.0, 1.2))
+            gps_code = ident if is_major or rng.random() < 0.3 else None
+            iata_code = _code(airport_id, 3) if is_major and rng.random() < 0.8 else None
+            local_code = None if rng.random() < 0.6 else _code(airport_id, 4)
+            home_link = f'https://{ident.lower()}.example.com' if is_major and rng.random() < 0.3 else None
+            wikipedia_link = f'https://en.wikipedia.org/wiki/{name}' if is_major and rng.random() < 0.6 else None
+            keywords = None if rng.random() < 0.85 else _name(rng, 2)
+            self._airports.append((airport_id, airport_type, latitude, longitude))
+            yield (airport_id, ident, airport_type, name, latitude, longitude, elevation_ft,
+                   str(continent_id), country_id, region_id, municipality,
+                   int(rng.random() < scheduled_chance), gps_code, iata_code, local_code,
+                   home_link, wikipedia_link, keywords)
+
+
+    def runways(self):
+        rng = self._rng
+        surfaces, surface_weights = _weighted(_SURFACES)
+        counts = {
+            airport_type: list(itertools.accumulate(chances))
+            for airport_type, chances in _RUNWAY_COUNTS.items()
+        }
+        runway_ids = itertools.count(1)
+        for airport_id, airport_type, latitude, longitude in self._airports:
+            frequency, mean_length, length_deviation, lighted_chance, scheduled_chance = \
+                _AIRPORT_TYPES[airport_type]
+            runway_count, = rng.choices(range(len(counts[airport_type])), cum_weights = counts[airport_type])
+            for _ in range(runway_count):
+                length_ft = None if rng.random() < 0.03 else max(20, int(rng.gauss(mean_length, length_deviation)))
+                width_ft = None if length_ft is None else max(10, int(length_ft / rng.uniform(20, 60)))
+                heading = rng.randint(1, 36)
+                opposite = (heading + 17) % 36 + 1
+                surface, = rng.choices(surfaces, cum_weights = surface_weights)
+                yield (next(runway_ids), airport_id, length_ft, width_ft, surface,
+                       int(rng.random() < lighted_chance), int(rng.random() < 0.04),
+                       f'{heading:02}', latitude, longitude, None, heading * 10.0, None,
+                       f'{opposite:02}', latitude, longitude, None, opposite * 10.0, None)
+
+
+    def frequencies(self):
+        rng = self._rng
+        frequency_types, frequency_type_weights = _weighted(_FREQUENCY_TYPES)
+        frequency_ids = itertools.count(1)
+        for airport_id, airport_type, latitude, longitude in self._airports:
+            mean_count = {'large_airport': 6, 'medium_airport': 3, 'small_airport': 0.5}.get(airport_type, 0.1)
+            for _ in range(int(rng.expovariate(1 / mean_count) + 0.5)):
+                frequency_type, = rng.choices(frequency_types, cum_weights = frequency_type_weights)
+                frequency_mhz = round(118.0 + rng.randrange(0, 760) * 0.025, 3)
+                yield (next(frequency_ids), airport_id, frequency_type,
+                       None if rng.random() < 0.5 else f'{frequency_type} {_name(rng, 2)}', frequency_mhz)
+
+
+    def navigation_aids(self):
+        rng = self._rng
+        types, type_weights = _weighted((name, band[0]) for name, band in _NAVIGATION_AID_TYPES.items())
+        for navigation_aid_id in range(1, max(1, self._airport_count // 7) + 1):
+            airport_id, airport_type, latitude, longitude = rng.choice(self._airports)
+            region_id, country_id, country_code, continent_id, center = \
+                self._regions[rng.randrange(len(self._regions))]
+            navigation_aid_type, = rng.choices(types, cum_weights = type_weights)
+            weight, lowest_khz, highest_khz, spacing_khz = _NAVIGATION_AID_TYPES[navigation_aid_type]
+            frequency_khz = rng.randrange(lowest_khz, highest_khz + 1, spacing_khz)
+            has_dme = 'DME' in navigation_aid_type or navigation_aid_type in ('VORTAC', 'TACAN')
+            ident = _code(navigation_aid_id, 3)
+            name = _name(rng, 2)
+            latitude = max(-90.0, min(90.0, latitude + rng.uniform(-0.3, 0.3)))
+            longitude = (longitude + rng.uniform(-0.3, 0.3) + 180.0) % 360.0 - 180.0
+            yield (navigation_aid_id, f'{name}_{navigation_aid_type}_{country_code}', ident, name,
+                   navigation_aid_type, frequency_khz, latitude, longitude,
+                   None if rng.random() < 0.2 else int(rng.lognormvariate(6.0, 1.2)), country_code,
+                   frequency_khz if has_dme else None,
+                   f'{rng.randint(17, 126)}X' if has_dme else None,
+                   latitude if has_dme else None, longitude if has_dme else None, None,
+                   round(rng.uniform(-20, 20), 3), round(rng.uniform(-20, 20), 3),
+                   rng.choice(('HI', 'LO', 'BOTH', 'TERMINAL', 'RNAV')),
+                   rng.choice(('HIGH', 'MEDIUM', 'LOW', 'UNKNOWN')),
+                   airport_id if rng.random() < 0.4 else None)
+
+
+
+def generate(path, region_count: int = _DEFAULT_REGION_COUNT,
+             airports_per_region: float = _DEFAULT_AIRPORTS_PER_REGION, seed: int = 0) -> dict[str, int]:
+    """Creates a synthetic database at path, which must not already exist, with
+    region_count regions and about airports_per_region times as many airports, and
+    returns the number of rows in each table"""
+    path = Path(path)
+    if path.exists():
+        raise ValueError(f'{path} already exists')
+
+    generator = _Generator(region_count, airports_per_region, seed)
+    tables = {
+        'continent': lambda: iter(CONTINENTS),
+        'country': generator.countries,
+        'region': generator.regions,
+        'airport': generator.airports,
+        'runway': generator.runways,
+        'airport_frequency': generator.frequencies,
+        'navigation_aid': generator.navigation_aids
+    }
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF ;').close()
+        connection.execute('PRAGMA synchronous = OFF ;').close()
+        connection.executescript(_SCHEMA_PATH.read_text())
+        counts = {table: _insert(connection, table, rows()) for table, rows in tables.items()}
+        connection.commit()
+    finally:
+        connection.close()
+
+    database = Database(path)
+    database.open(analyze = True)
+    database.close()
+    return counts
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog = 'python -m benchmarks.synthetic',
+        description = 'Generates a synthetic database with the structure in schema.sql.')
+    parser.add_argument('path', type = Path, help = 'the database file to create')
+    parser.add_argument(
+        '--regions', type = int, default = _DEFAULT_REGION_COUNT,
+        help = f'the number of regions (default {_DEFAULT_REGION_COUNT})')
+    parser.add_argument(
+        '--airports-per-region', type = float, default = _DEFAULT_AIRPORTS_PER_REGION,
+        help = f'the average number of airports in a region (default {_DEFAULT_AIRPORTS_PER_REGION})')
+    parser.add_argument('--seed', type = int, default = 0, help = 'the random seed (default 0)')
+    arguments = parser.parse_args()
+
+    counts = generate(arguments.path, arguments.regions, arguments.airports_per_region, arguments.seed)
+    for table, count in counts.items():
+        print(f'{table:<20}{count:>12}')
+
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,6 @@
 # Project 2: Learning to Fly
 #
 # Initialization module for the p2app.engine package.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
-from .main import Engine
\ No newline at end of file
+from .main import Engine
+from .async_engine import AsyncEngine
@@ -0,0 +1,81 @@
+# p2app/engine/airport_codes.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# An in-memory index of every code that airports are known by, so that an airport
+# can be found by any of them with a dictionary lookup, instead of a query that
+# compares the code against four columns of every airport.
+#
+# Codes are compared without regard to case.  When a code belongs to more than
+# one airport, the airports are ordered by which column it's in: an identifier
+# match first, then GPS, IATA and local code matches.
+
+from p2app.events import Airport
+
+
+
+# The columns an airport's codes are in, from the most to the least specific
+CODE_COLUMNS = ('airport_ident', 'gps_code', 'iata_code', 'local_code')
+
+
+
+def _normalize(code: str) -> str:
+    return code.strip().upper()
+
+
+
+class AirportCodeIndex:
+    """Maps each airport code to the IDs of the airports that are known by it"""
+
+    def __init__(self):
+        """Initializes an empty index"""
+        self._airports_by_code = {}
+        self._codes_by_airport = {}
+
+
+    def load(self, connection) -> None:
+        """Replaces the index's contents with the codes of every airport in a database"""
+        self.__init__()
+        cursor = connection.execute(f'SELECT airport_id, {", ".join(CODE_COLUMNS)} FROM airport ;')
+        for airport_id, *codes in cursor.fetchall():
+            self._add(airport_id, codes)
+        cursor.close()
+
+
+    def _add(self, airport_id: int, codes) -> None:
+        """Indexes an airport's codes, given in the order of CODE_COLUMNS"""
+        indexed = []
+        for priority, code in enumerate(codes):
+            if code:
+                code = _normalize(code)
+                self._airports_by_code.setdefault(code, {}).setdefault(airport_id, priority)
+                indexed.append(code)
+        self._codes_by_airport[airport_id] = indexed
+
+
+    def remove(self, airport_id: int) -> None:
+        """Removes an airport's codes from the index, if they're in it"""
+        for code in self._codes_by_airport.pop(airport_id, ()):
+            airports = self._airports_by_code.get(code)
+            if airports is not None:
+                airports.pop(airport_id, None)
+                if not airports:
+                    del self._airports_by_code[code]
+
+
+    def put(self, airport: Airport) -> None:
+        """Indexes an airport's codes, replacing the codes it had before"""
+        self.remove(airport.airport_id)
+        self._add(airport.airport_id, [getattr(airport, column) for column in CODE_COLUMNS])
+
+
+    def resolve(self, code: str) -> list[int]:
+        """Returns the IDs of the airports that are known by a code, most specific
+        match first"""
+        airports = self._airports_by_code.get(_normalize(code), {})
+        return sorted(airports, key = lambda airport_id: (airports[airport_id], airport_id))
+
+
+    def __len__(self) -> int:
+        return len(self._airports_by_code)
@@ -0,0 +1,114 @@
+# p2app/engine/async_engine.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# An asyncio interface to the engine, which allows many sessions (e.g., scripted
+# clients or the connections of a server) to share one engine on one event loop.
+#
+# The engine's work is done on a single worker thread, so the event loop is never
+# blocked by it, and the engine (which isn't safe to use from several threads at
+# once) only ever runs on one thread.  Sessions take turns on that thread a few
+# results at a time, so a long search doesn't hold up everyone else until it's
+# finished.
+#
+# Since the sessions share one engine, they share its database connection too, so
+# transactions can't be used through an AsyncEngine: one session's rollback would
+# discard the saves that other sessions had already been told were saved.  Each
+# transaction event is answered with a TransactionFailedEvent instead.
+#
+# A session that stops consuming process_event's results early (e.g., by breaking
+# out of its loop) should wrap it in contextlib.aclosing, so that the engine's
+# generator, and the database connection it's reading through, are closed right
+# away, rather than whenever the asynchronous generator is garbage collected.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from p2app.events import (
+    BeginTransactionEvent, CommitTransactionEvent, RollbackTransactionEvent, TransactionFailedEvent)
+from .main import Engine
+
+
+
+_RESULT_BATCH_SIZE = 32
+
+_TRANSACTION_EVENTS = (BeginTransactionEvent, CommitTransactionEvent, RollbackTransactionEvent)
+
+
+
+def _next_batch(results, batch_size: int) -> list:
+    """Returns up to batch_size of the next events generated by results, which is
+    fewer than batch_size only when results runs out"""
+    batch = []
+    for result in results:
+        batch.append(result)
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+
+
+class AsyncEngine:
+    """Processes events with an Engine without blocking the asyncio event loop"""
+
+    def __init__(self, engine: Engine | None = None, result_batch_size: int = _RESULT_BATCH_SIZE):
+        """Initializes the asynchronous engine around an Engine (a new one if None),
+        handing back at most result_batch_size result events per trip to the worker"""
+        self._engine = engine if engine is not None else Engine()
+        self._result_batch_size = result_batch_size
+        self._executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = 'engine')
+
+
+    def engine(self) -> Engine:
+        """Returns the Engine that does the work"""
+        return self._engine
+
+
+    async def process_event(self, event):
+        """An asynchronous generator function that processes one event, yielding zero
+        or more events in response, the same ones that Engine.process_event would,
+        except that transaction events fail. Wrap it in contextlib.aclosing if the
+        results might not all be consumed."""
+        if isinstance(event, _TRANSACTION_EVENTS):
+            yield TransactionFailedEvent(
+                'Transactions are not available to sessions that share an engine.')
+            return
+
+        loop = asyncio.get_running_loop()
+        results = self._engine.process_event(event)
+
+        try:
+            while True:
+                batch = await loop.run_in_executor(
+                    self._executor, _next_batch, results, self._result_batch_size)
+                for result in batch:
+                    yield result
+                if len(batch) < self._result_batch_size:
+                    break
+        finally:
+            try:
+                closing = loop.run_in_executor(self._executor, results.close)
+            except RuntimeError:
+                # The executor was already shut down, so its worker is finished and the
+                # generator can safely be closed on this thread instead.
+                results.close()
+            else:
+                await closing
+
+
+    async def process_events(self, events) -> list:
+        """Processes a sequence of events in order, returning all of their result events"""
+        return [result for event in events async for result in self.process_event(event)]
+
+
+    def close(self) -> None:
+        """Stops the worker thread once the work it's already been given is finished"""
+        self._executor.shutdown(wait = True)
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,162 @@
+# p2app/engine/compact.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Compact in-memory representations of records (Continent, Country, Region, and
+# the other named tuples in p2app.events), for when a great many of them are
+# cached or exported at once.
+#
+# The record types themselves are already as small as a Python object with their
+# fields can be: a named tuple declares no per-instance __dict__, so each record is
+# a bare tuple, which is no larger than an object of a class whose fields are all
+# __slots__, and unlike such an object, it can be unpacked and indexed like a tuple.
+# What dominates the memory that many records use is what they refer to instead:
+# every record read from the database gets its own copy of every string, even when
+# thousands of records hold the same Wikipedia link or keywords.  So there are two
+# ways to make them smaller here:
+#
+# * A StringPool shares one copy of each distinct string among the records it
+#   interns, which keeps the records themselves unchanged.
+#
+# * A RecordColumns container stores a large set of records a column at a time,
+#   with integer and real columns in arrays of machine numbers rather than lists
+#   of Python objects, and text columns as interned strings.  Records are built
+#   from the columns only when they're asked for.
+
+from array import array
+
+
+
+class StringPool:
+    """Shares one copy of each distinct string among the values it interns. Unlike
+    sys.intern, the strings only live as long as the pool does."""
+
+    def __init__(self):
+        """Initializes an empty pool"""
+        self._strings = {}
+
+
+    def intern(self, value):
+        """Returns the pool's copy of a string, adding it to the pool if it's new, or
+        the value itself if it isn't a string"""
+        if type(value) is not str:
+            return value
+        return self._strings.setdefault(value, value)
+
+
+    def intern_record(self, record):
+        """Returns a record of the same named tuple type whose strings are the pool's
+        copies of the record's strings"""
+        return record._make(self.intern(value) for value in record)
+
+
+    def intern_records(self, records):
+        """Generates the records with their strings interned, like intern_record"""
+        for record in records:
+            yield self.intern_record(record)
+
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+
+def _column_kind(annotation) -> str:
+    """Returns the kind of column ('integer', 'real' or 'object') that a field with a
+    type annotation (e.g., int | None) is stored in"""
+    types = set(getattr(annotation, '__args__', (annotation,))) - {type(None)}
+    if types == {int}:
+        return 'integer'
+    elif types == {float}:
+        return 'real'
+    else:
+        return 'object'
+
+
+
+class _NumberColumn:
+    """A column of numbers in an array, any of which may be None"""
+
+    def __init__(self, typecode: str):
+        self._values = array(typecode)
+        self._nones = None
+
+
+    def append(self, value) -> None:
+        if value is None:
+            if self._nones is None:
+                self._nones = set()
+            self._nones.add(len(self._values))
+            value = 0
+        self._values.append(value)
+
+
+    def __getitem__(self, index: int):
+        if self._nones is not None and index in self._nones:
+            return None
+        return self._values[index]
+
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+
+class RecordColumns:
+    """A sequence of records of one named tuple type, stored a column at a time"""
+
+    def __init__(self, record_type, records = (), pool: StringPool | None = None):
+        """Initializes a container of records of a named tuple type, whose fields are
+        stored according to the type's annotations: int fields in arrays of 64-bit
+        integers, float fields in arrays of doubles, and all others as Python objects,
+        with their strings interned in a pool (a new one if None). The records, if
+        any, are then added to it."""
+        self._record_type = record_type
+        self._pool = pool if pool is not None else StringPool()
+        self._columns = []
+        for field in record_type._fields:
+            kind = _column_kind(record_type.__annotations__.get(field))
+            if kind == 'integer':
+                self._columns.append(_NumberColumn('q'))
+            elif kind == 'real':
+                self._columns.append(_NumberColumn('d'))
+            else:
+                self._columns.append([])
+        self.extend(records)
+
+
+    def append(self, record) -> None:
+        """Adds a record (or any sequence of its field values) to the end"""
+        for column, value in zip(self._columns, record, strict = True):
+            column.append(self._pool.intern(value))
+
+
+    def extend(self, records) -> None:
+        """Adds each of the records to the end"""
+        for record in records:
+            self.append(record)
+
+
+    def column(self, field: str) -> list:
+        """Returns the values of one field of every record"""
+        column = self._columns[self._record_type._fields.index(field)]
+        return [column[index] for index in range(len(column))]
+
+
+    def __getitem__(self, index: int):
+        """Returns the record at an index, built from its columns"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('record index out of range')
+        return self._record_type._make(column[index] for column in self._columns)
+
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
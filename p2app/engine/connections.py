@@ -0,0 +1,210 @@
+# p2app/engine/connections.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Management of the connections to a database file.
+#
+# The file is switched to write-ahead logging (WAL), which allows it to be read
+# while it's being written.  All writes go through one writer connection, while
+# searches and loads borrow one of a small pool of read-only connections, so that
+# they neither wait for writes nor make writes wait for them.
+#
+# A file can also be opened read-only, as an immutable snapshot that's never
+# written while it's open (e.g., a large reference database shared by several
+# people).  Then every connection is read-only, SQLite skips locking the file
+# altogether, and pages are read through memory-mapped I/O, so they're served
+# straight from the operating system's page cache, which every process that has
+# the file open shares.
+
+from contextlib import contextmanager
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+import time
+
+
+
+_BUSY_TIMEOUT_MS = 5000
+# How much of a read-only file is memory-mapped; SQLite lowers this to the most
+# that it was built to allow, if that's less
+_READ_ONLY_MMAP_SIZE = 1 << 34
+_READ_POOL_SIZE = 4
+_RETRY_ATTEMPTS = 5
+_RETRY_DELAY_SECONDS = 0.05
+
+
+
+def is_busy_error(error: Exception) -> bool:
+    """Returns whether an exception was raised because the database was locked by
+    another connection"""
+    return isinstance(error, sqlite3.OperationalError) \
+        and ('locked' in str(error) or 'busy' in str(error))
+
+
+
+def retry_when_busy(operation, attempts: int = _RETRY_ATTEMPTS, delay: float = _RETRY_DELAY_SECONDS):
+    """Calls operation and returns its result, calling it again after a growing delay
+    each time it fails because the database is locked, up to attempts times in all"""
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e) or attempt == attempts - 1:
+                raise
+            time.sleep(delay * (2 ** attempt))
+
+
+
+class ConnectionManager:
+    """Owns the writer connection to a database file and its pool of reader connections"""
+
+    def __init__(self, path, read_pool_size: int = _READ_POOL_SIZE,
+                 busy_timeout_ms: int = _BUSY_TIMEOUT_MS, read_only: bool = False,
+                 mmap_size: int = _READ_ONLY_MMAP_SIZE):
+        """Initializes the connection manager for the database file at path, which holds
+        at most read_pool_size reader connections. If read_only is true, the file is
+        opened as an immutable snapshot, with up to mmap_size bytes of it memory-mapped."""
+        self._path = path
+        self._read_pool_size = read_pool_size
+        self._busy_timeout_ms = busy_timeout_ms
+        self._read_only = read_only
+        self._mmap_size = mmap_size
+        self._writer = None
+        self._idle_readers = queue.LifoQueue()
+        self._all_readers = []
+        self._lent_readers = set()
+        self._readers_lock = threading.Lock()
+        self._is_wal = False
+
+
+    def open(self):
+        """Opens and returns the writer connection. The file is switched to WAL if
+        possible; if it isn't, reads share the writer connection instead of using
+        the pool. A read-only file's "writer" is just another read-only connection."""
+        if self._read_only:
+            self._writer = self._open_snapshot()
+            return self._writer
+
+        self._writer = sqlite3.connect(
+            str(self._path), timeout = self._busy_timeout_ms / 1000,
+            check_same_thread = False)
+        self._writer.execute(f'PRAGMA busy_timeout = {self._busy_timeout_ms} ;').close()
+        try:
+            cursor = self._writer.execute('PRAGMA journal_mode = WAL ;')
+            journal_mode, = cursor.fetchone()
+            cursor.close()
+            self._is_wal = journal_mode.lower() == 'wal'
+        except sqlite3.DatabaseError:
+            self._is_wal = False
+        return self._writer
+
+
+    def writer(self):
+        """Returns the writer connection"""
+        return self._writer
+
+
+    def is_wal(self) -> bool:
+        """Returns whether the database file is in WAL mode"""
+        return self._is_wal
+
+
+    def is_read_only(self) -> bool:
+        """Returns whether the database file was opened read-only"""
+        return self._read_only
+
+
+    def _open_snapshot(self):
+        """Opens a new connection to the database file as an immutable snapshot, with
+        memory-mapped I/O turned on"""
+        snapshot = sqlite3.connect(
+            Path(self._path).resolve().as_uri() + '?mode=ro&immutable=1', uri = True,
+            check_same_thread = False)
+        snapshot.execute(f'PRAGMA mmap_size = {self._mmap_size} ;').close()
+        return snapshot
+
+
+    def _open_reader(self):
+        """Opens a new read-only connection to the database file"""
+        if self._read_only:
+            return self._open_snapshot()
+        reader = sqlite3.connect(
+            Path(self._path).resolve().as_uri() + '?mode=ro', uri = True,
+            timeout = self._busy_timeout_ms / 1000, check_same_thread = False)
+        reader.execute(f'PRAGMA busy_timeout = {self._busy_timeout_ms} ;').close()
+        return reader
+
+
+    def _borrow_reader(self):
+        """Returns an idle reader connection, opening one if there are none, along with
+        whether it belongs to the pool. Once the pool is full, the readers opened beyond
+        it don't, so that a thread that already holds readers (e.g., one interleaving
+        several searches) never waits for itself to return one."""
+        try:
+            return self._idle_readers.get_nowait(), True
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if len(self._all_readers) < self._read_pool_size:
+                reader = self._open_reader()
+                self._all_readers.append(reader)
+                return reader, True
+
+        return self._open_reader(), False
+
+
+    @contextmanager
+    def reader(self):
+        """Lends out a reader connection for the duration of the with statement, or the
+        writer connection if the file isn't in WAL mode (and isn't read-only, which
+        doesn't need it) or the pool is empty"""
+        if not (self._is_wal or self._read_only) or self._read_pool_size < 1:
+            yield self._writer
+            return
+
+        reader, is_pooled = self._borrow_reader()
+        with self._readers_lock:
+            self._lent_readers.add(reader)
+        try:
+            yield reader
+        finally:
+            with self._readers_lock:
+                self._lent_readers.discard(reader)
+            if not is_pooled:
+                reader.close()
+            else:
+                if reader.in_transaction:
+                    reader.rollback()
+                self._idle_readers.put(reader)
+
+
+    def interrupt(self) -> None:
+        """Interrupts the query running on the writer connection and on every reader
+        connection that's lent out, if any, from another thread. Each interrupted query
+        raises an OperationalError, and a write that's interrupted is rolled back."""
+        with self._readers_lock:
+            connections = [self._writer, *self._lent_readers]
+
+        for connection in connections:
+            try:
+                if connection is not None:
+                    connection.interrupt()
+            except sqlite3.ProgrammingError:
+                # It was closed in the meantime, so there's nothing to interrupt
+                pass
+
+
+    def close(self) -> None:
+        """Closes the writer connection and every reader connection"""
+        with self._readers_lock:
+            for reader in self._all_readers:
+                reader.close()
+            self._all_readers.clear()
+            self._idle_readers = queue.LifoQueue()
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
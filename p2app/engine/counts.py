@@ -0,0 +1,224 @@
+# p2app/engine/counts.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Materialized counts of the regions, airports and runways in each country and
+# each continent, so that they can be read with a single lookup rather than
+# counted each time they're needed.
+#
+# The counts are kept in two tables, country_counts and continent_counts, and
+# triggers on the region, airport and runway tables keep them current as rows are
+# inserted, deleted, or moved to another country or continent.  A runway belongs to
+# the country and continent of its airport, so moving an airport moves its runways'
+# counts along with it.
+#
+# Every change to a count is an upsert that adds to it (or subtracts from it), so a
+# country or continent that has nothing counted yet simply has no row; its counts
+# are all zero.
+
+import sqlite3
+from p2app.events import EntityCounts
+from .schema import has_tables, schema_names
+
+
+
+# The tables whose rows are counted
+COUNTED_TABLES = ('region', 'airport', 'runway')
+
+# For each level that's counted: its counts table, and the expression that finds the
+# key of the level that a row of each counted table belongs to (for the row's alias)
+_LEVELS = {
+    'country': ('country_counts', {
+        'region': '{row}.country_id',
+        'airport': '{row}.country_id',
+        'runway': '(SELECT country_id FROM airport WHERE airport_id = {row}.airport_id)'
+    }),
+    'continent': ('continent_counts', {
+        'region': '{row}.continent_id',
+        'airport': 'CAST({row}.continent_id AS INTEGER)',
+        'runway': '(SELECT CAST(continent_id AS INTEGER) FROM airport WHERE airport_id = {row}.airport_id)'
+    })
+}
+
+# The counts table of every level
+_COUNTS_TABLES = tuple(counts_table for counts_table, keys in _LEVELS.values())
+
+# For each counted table: the columns that move its rows to another country or continent
+_MOVING_COLUMNS = {
+    'region': ('country_id', 'continent_id'),
+    'airport': ('country_id', 'continent_id'),
+    'runway': ('airport_id',)
+}
+
+
+
+def _adjust(level: str, table: str, key: str, amount: str) -> str:
+    """Returns the statement that adds amount to the count of a table's rows in the
+    country or continent (level) whose ID is key"""
+    counts_table, keys = _LEVELS[level]
+    return f"""
+        INSERT INTO {counts_table} ({level}_id, {table}_count)
+        SELECT {key}, {amount}
+        WHERE {key} IS NOT NULL
+        ON CONFLICT ({level}_id) DO UPDATE SET {table}_count = {table}_count + excluded.{table}_count;
+        """
+
+
+
+def _counted_tables(connection) -> tuple[str, ...]:
+    """Returns the counted tables that a database has. A runway's country and continent
+    are its airport's, so runways are only counted if the airport table exists, too."""
+    tables = schema_names(connection, 'table')
+    return tuple(
+        table for table in COUNTED_TABLES
+        if table in tables and (table != 'runway' or 'airport' in tables))
+
+
+
+def _trigger_bodies(table: str, row: str, sign: str, counted_tables) -> str:
+    """Returns the statements that add (sign '+') or subtract (sign '-') a row of a
+    counted table to or from every count it's part of, which for an airport includes
+    the counts of its runways, if they're counted"""
+    statements = []
+    for level, (counts_table, keys) in _LEVELS.items():
+        key = keys[table].format(row = row)
+        statements.append(_adjust(level, table, key, f'{sign}1'))
+        if table == 'airport' and 'runway' in counted_tables:
+            runways = f'(SELECT COUNT(*) FROM runway WHERE airport_id = {row}.airport_id)'
+            statements.append(_adjust(level, 'runway', key, f'{sign}{runways}'))
+    return ''.join(statements)
+
+
+
+class MaterializedCounts:
+    """Provisions, maintains and reads the materialized counts of a database"""
+
+    def __init__(self, connection):
+        """Initializes the counts for an open connection"""
+        self._connection = connection
+
+
+    def _is_provisioned(self, counted_tables) -> bool:
+        """Returns whether the counts tables exist and every counted table has the
+        triggers that maintain them"""
+        names = schema_names(self._connection, 'table', 'trigger')
+        return set(_COUNTS_TABLES) <= names \
+            and all(f'{table}_counts_insert' in names for table in counted_tables)
+
+
+    def provision(self) -> bool:
+        """Creates the counts tables and their triggers if they don't exist yet, filling
+        the tables by counting every row, and returns whether they were created. Only
+        the counted tables that the database has are counted, and the counts of any that
+        it lacks stay zero; if one of them is created later, the counts are rebuilt the
+        next time they're provisioned. Nothing is created if the database can't be
+        written to."""
+        counted_tables = _counted_tables(self._connection)
+        if self._is_provisioned(counted_tables):
+            return False
+
+        statements = ['BEGIN;']
+        for level, (counts_table, keys) in _LEVELS.items():
+            statements.append(f"""
+                CREATE TABLE {counts_table} (
+                    {level}_id INTEGER NOT NULL PRIMARY KEY,
+                    region_count INTEGER NOT NULL DEFAULT 0,
+                    airport_count INTEGER NOT NULL DEFAULT 0,
+                    runway_count INTEGER NOT NULL DEFAULT 0
+                ) STRICT;
+                """)
+            for table in counted_tables:
+                key = keys[table].format(row = table)
+                statements.append(f"""
+                    INSERT INTO {counts_table} ({level}_id, {table}_count)
+                    SELECT {key}, COUNT(*)
+                    FROM {table}
+                    WHERE {key} IS NOT NULL
+                    GROUP BY {key}
+                    ON CONFLICT ({level}_id) DO UPDATE SET {table}_count = excluded.{table}_count;
+                    """)
+
+        for table in counted_tables:
+            statements.append(f"""
+                CREATE TRIGGER {table}_counts_insert AFTER INSERT ON {table} BEGIN
+                    {_trigger_bodies(table, 'new', '+', counted_tables)}
+                END;
+
+                CREATE TRIGGER {table}_counts_delete AFTER DELETE ON {table} BEGIN
+                    {_trigger_bodies(table, 'old', '-', counted_tables)}
+                END;
+
+                CREATE TRIGGER {table}_counts_update
+                AFTER UPDATE OF {', '.join(_MOVING_COLUMNS[table])} ON {table} BEGIN
+                    {_trigger_bodies(table, 'old', '-', counted_tables)}
+                    {_trigger_bodies(table, 'new', '+', counted_tables)}
+                END;
+                """)
+        statements.append('COMMIT;')
+
+        try:
+            self.drop()
+            self._connection.executescript(''.join(statements))
+        except sqlite3.OperationalError:
+            if self._connection.in_transaction:
+                self._connection.rollback()
+            return False
+
+        return True
+
+
+    def drop(self) -> bool:
+        """Drops the counts tables and their triggers if they exist, returning whether
+        they did"""
+        if not has_tables(self._connection, *_COUNTS_TABLES):
+            return False
+
+        statements = ['BEGIN;']
+        for table in COUNTED_TABLES:
+            for operation in ('insert', 'delete', 'update'):
+                statements.append(f'DROP TRIGGER IF EXISTS {table}_counts_{operation};')
+        for counts_table, keys in _LEVELS.values():
+            statements.append(f'DROP TABLE {counts_table};')
+        statements.append('COMMIT;')
+        self._connection.executescript('\n'.join(statements))
+        return True
+
+
+    def counts(self, level: str, key: int) -> EntityCounts:
+        """Returns the counts of a country or continent (level) with an ID. If the
+        counts tables don't exist, as when the database can't be written to, the
+        counts are counted instead."""
+        if not has_tables(self._connection, *_COUNTS_TABLES):
+            return self._counted(level, key)
+
+        counts_table, keys = _LEVELS[level]
+        cursor = self._connection.execute(f"""
+            SELECT region_count, airport_count, runway_count
+            FROM {counts_table}
+            WHERE {level}_id = ? ;
+            """, (key,))
+        row = cursor.fetchone()
+        cursor.close()
+        return EntityCounts(*row) if row is not None else EntityCounts(0, 0, 0)
+
+
+    def _counted(self, level: str, key: int) -> EntityCounts:
+        """Returns the counts of a country or continent (level) with an ID by counting
+        the rows that belong to it, with a count of zero for any counted table that the
+        database lacks"""
+        counts_table, keys = _LEVELS[level]
+        counted_tables = _counted_tables(self._connection)
+        counts = []
+        for table in COUNTED_TABLES:
+            if table not in counted_tables:
+                counts.append(0)
+                continue
+            cursor = self._connection.execute(f"""
+                SELECT COUNT(*)
+                FROM {table}
+                WHERE {keys[table].format(row = table)} = ? ;
+                """, (key,))
+            counts.append(cursor.fetchone()[0])
+            cursor.close()
+        return EntityCounts(*counts)
@@ -1,27 +1,201 @@
+from contextlib import closing, contextmanager
+import functools
 import sqlite3
-from p2app.events import Continent, Country, Region
+from p2app.events import Airport, Continent, Country, NavigationAid, Region
+from .airport_codes import AirportCodeIndex
+from .connections import ConnectionManager, retry_when_busy
+from .counts import MaterializedCounts
+from .exporter import Exporter, export_records
+from .frequencies import FrequencyIndex
+from .importer import BulkImporter
+from .indexes import IndexManager
+from .navigation_aids import find_frequency_conflicts
+from .reference_cache import ReferenceCache
+from .runways import RunwaySearch
+from .schema import has_tables
+from .spatial import SPATIAL_TABLES, SpatialIndex
+from .text_search import TextSearchEngine
+
+
+_FETCH_BATCH_SIZE = 256
+
+_READ_ONLY_ERROR = "The database was opened read-only."
+
+_IMPORT_IN_TRANSACTION_ERROR = "A bulk import can't be run while a transaction is in progress."
+
+# For each table that can be searched a page at a time: its key column, which
+# orders the pages, the named tuple its rows become, and its searchable columns.
+_PAGED_TABLES = {
+    'continent': ('continent_id', Continent, ('continent_code', 'name')),
+    'country': ('country_id', Country, ('country_code', 'name')),
+    'region': ('region_id', Region, ('region_code', 'local_code', 'name')),
+    'airport': ('airport_id', Airport, ('airport_ident', 'name'))
+}
+
+
+def _writes(method):
+    """Decorates a Database method that writes to the database, so that it returns an
+    error message without doing anything when the database was opened read-only"""
+    @functools.wraps(method)
+    def write(self, *args, **kwargs):
+        if self._connections.is_read_only():
+            return _READ_ONLY_ERROR
+        return method(self, *args, **kwargs)
+
+    return write
+
 
 
 class Database:
     """Represents the database of our application and allows us
     to connect, query, update and close the database"""
 
-    def __init__(self, path):
-        """Initializes the Database"""
+    def __init__(self, path, fetch_batch_size: int = _FETCH_BATCH_SIZE, read_pool_size: int = 4,
+                 read_only: bool = False):
+        """Initializes the Database, which reads through a pool of at most
+        read_pool_size connections alongside the one it writes through. If read_only
+        is true, the database is opened as an immutable, memory-mapped snapshot that
+        nothing can be saved to."""
         self._path = path
+        self._connections = ConnectionManager(path, read_pool_size, read_only = read_only)
         self._connection = None
-
-
-    def open(self) -> None:
-        """Opens the database and starts a connection"""
-        self._connection = sqlite3.connect(str(self._path))
+        self._fetch_batch_size = fetch_batch_size
+        self._index_report = None
+        self._text_search = None
+        self._reference_cache = ReferenceCache()
+        self._airport_codes = AirportCodeIndex()
+        self._frequencies = FrequencyIndex()
+        self._in_unit_of_work = False
+
+
+    def open(self, analyze: bool = False) -> None:
+        """Opens the database and starts a connection. If it's the correct database,
+        any secondary indexes or text search tables that are missing are created, with
+        the planner's statistics refreshed afterward if analyze is true. Nothing is
+        created in a read-only database, so its searches use whatever was created in it
+        before."""
+        self._connection = self._connections.open()
         cursor = self._connection.execute(""" PRAGMA foreign_keys = ON; """)
         cursor.close()
+        self._text_search = TextSearchEngine(self._connection)
+        if self.check_database_correctness():
+            if self._connections.is_read_only():
+                self._index_report = IndexManager(self._connection).report()
+            else:
+                self._index_report = IndexManager(self._connection).provision(analyze)
+                self._text_search.provision()
+                MaterializedCounts(self._connection).provision()
+                for table in SPATIAL_TABLES:
+                    if has_tables(self._connection, table):
+                        SpatialIndex(self._connection, table).provision()
+            self._load_memory_indexes()
+
+
+    def _load_memory_indexes(self) -> None:
+        """Loads the in-memory caches and indexes from the database's tables, for those
+        of the tables that it has"""
+        self._reference_cache.load(self._connection)
+        if has_tables(self._connection, 'airport'):
+            self._airport_codes.load(self._connection)
+        if has_tables(self._connection, 'airport_frequency'):
+            self._frequencies.load(self._connection)
+
+
+    def index_report(self):
+        """Returns the report of which secondary indexes were created when the
+        database was opened"""
+        return self._index_report
+
+
+    def is_read_only(self) -> bool:
+        """Returns whether the database was opened read-only"""
+        return self._connections.is_read_only()
+
+
+    def interrupt(self) -> None:
+        """Interrupts whatever query is running on the database, from another thread"""
+        self._connections.interrupt()
 
 
     def close(self) -> None:
-        """Closes the database connection"""
-        self._connection.close()
+        """Closes the database connections, discarding any transaction in progress"""
+        self._connections.close()
+        self._in_unit_of_work = False
+
+
+    @_writes
+    def begin_transaction(self):
+        """Begins a transaction that the saves made until it's committed or rolled back
+        belong to, and returns an error message if one is already in progress"""
+        if self._in_unit_of_work:
+            return "A transaction is already in progress."
+        if self._connection.in_transaction:
+            self._connection.commit()
+        self._connection.execute('BEGIN ;').close()
+        self._in_unit_of_work = True
+
+
+    def commit_transaction(self):
+        """Commits every save made since the transaction began, and returns an error
+        message if there is no transaction or it couldn't be committed"""
+        if not self._in_unit_of_work:
+            return "No transaction is in progress."
+        try:
+            retry_when_busy(self._connection.commit)
+        except sqlite3.Error as e:
+            return self.rollback_transaction() or e.__str__()
+        self._in_unit_of_work = False
+
+
+    def rollback_transaction(self):
+        """Undoes every save made since the transaction began, and returns an error
+        message if there is no transaction"""
+        if not self._in_unit_of_work:
+            return "No transaction is in progress."
+        self._connection.rollback()
+        self._in_unit_of_work = False
+        self._load_memory_indexes()
+
+
+    def in_transaction(self) -> bool:
+        """Returns whether a transaction begun by begin_transaction is in progress"""
+        return self._in_unit_of_work
+
+
+    @contextmanager
+    def _savepoint(self):
+        """Applies the changes made within it inside a savepoint when a transaction is
+        in progress, so that if they fail, they're undone without affecting the rest of
+        the transaction"""
+        if not self._in_unit_of_work:
+            yield
+            return
+        self._connection.execute('SAVEPOINT save_record ;').close()
+        try:
+            yield
+        except BaseException:
+            self._connection.execute('ROLLBACK TO save_record ;').close()
+            self._connection.execute('RELEASE save_record ;').close()
+            raise
+        self._connection.execute('RELEASE save_record ;').close()
+
+
+    def _commit(self) -> None:
+        """Commits a save, unless it's part of a transaction, which commits it later"""
+        if not self._in_unit_of_work:
+            retry_when_busy(self._connection.commit)
+
+
+    @contextmanager
+    def _reading(self):
+        """Lends out a connection to read through for the duration of the with statement.
+        Within a transaction that's the writer connection, so the transaction's own saves
+        can be seen; otherwise it's one of the pooled reader connections."""
+        if self._in_unit_of_work:
+            yield self._connection
+        else:
+            with self._connections.reader() as connection:
+                yield connection
 
 
     def check_database_correctness(self) -> bool :
@@ -37,46 +211,181 @@ class Database:
         except Exception:
             return False
 
+    def _stream_rows(self, cursor, record_type):
+        """Generates the rows of an executed cursor as record_type named tuples,
+        reading them in batches so that only one batch is held in memory at a time.
+        The cursor is closed when the rows run out, or as soon as the generator is
+        closed if the consumer stops early."""
+        try:
+            while True:
+                rows = cursor.fetchmany(self._fetch_batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield record_type(*row)
+        finally:
+            cursor.close()
+
+
+    def _paged_where_clause(self, table: str, criteria) -> tuple[str, list]:
+        """Builds the WHERE clause (without the keyword) and its parameters that
+        match the (column, value) pairs in criteria against a paged table"""
+        key_column, record_type, searchable_columns = _PAGED_TABLES[table]
+        conditions = []
+        parameters = []
+        for column, value in criteria:
+            if column not in searchable_columns:
+                raise ValueError(f'{column} is not a searchable column of {table}')
+            conditions.append(f'{column} = ?')
+            parameters.append(value)
+        if not conditions:
+            conditions.append('1')
+        return ' AND '.join(conditions), parameters
+
+
+    def count_matches(self, table: str, criteria) -> int:
+        """Counts the rows of a paged table that match the (column, value) pairs
+        in criteria, without reading the rows themselves"""
+        where, parameters = self._paged_where_clause(table, criteria)
+        with self._reading() as connection:
+            cursor = connection.execute(f"""
+                SELECT COUNT(*)
+                FROM {table}
+                WHERE {where} ;
+                """, parameters)
+            count, = cursor.fetchone()
+            cursor.close()
+        return count
+
+
+    def search_page(self, table: str, criteria, page_size: int, after_id: int | None = None) -> list:
+        """Returns at most page_size rows of a paged table that match the (column, value)
+        pairs in criteria, as named tuples ordered by the table's key. Only rows whose
+        key is greater than after_id are returned, so the next page is found by seeking
+        through the key's index rather than by skipping the rows before it."""
+        key_column, record_type, searchable_columns = _PAGED_TABLES[table]
+        where, parameters = self._paged_where_clause(table, criteria)
+        if after_id is not None:
+            where += f' AND {key_column} > ?'
+            parameters.append(after_id)
+        with self._reading() as connection:
+            cursor = connection.execute(f"""
+                SELECT *
+                FROM {table}
+                WHERE {where}
+                ORDER BY {key_column}
+                LIMIT ? ;
+                """, parameters + [page_size])
+            rows = cursor.fetchall()
+            cursor.close()
+        return [record_type(*row) for row in rows]
+
+
+    def bulk_import(self, paths, progress = None):
+        """Loads the OurAirports CSV file at each path into the table it's keyed by,
+        calling progress with a table's name and its number of loaded rows as the load
+        proceeds, and returns an ImportReport describing the result. It raises a
+        ValueError if the database was opened read-only, or if a transaction is in
+        progress, since the import commits as it goes and would commit the
+        transaction's saves along with it."""
+        if self._connections.is_read_only():
+            raise ValueError(_READ_ONLY_ERROR)
+        if self._in_unit_of_work:
+            raise ValueError(_IMPORT_IN_TRANSACTION_ERROR)
+        report = BulkImporter(self._connection, progress).import_files(paths)
+        self._load_memory_indexes()
+        return report
+
+
+    def export_table(self, table: str, path, format: str = 'csv', columns = None,
+                     compress: bool = False) -> int:
+        """Writes the given columns (all of them if None) of every row of a table to a
+        CSV or JSON Lines file, gzipped if compress is true, and returns the number of
+        rows that were written"""
+        with self._reading() as connection:
+            return Exporter(connection, self._fetch_batch_size).export_table(
+                table, path, format, columns, compress)
+
+
+    def export_search(self, results, path, format: str = 'csv', columns = None,
+                      compress: bool = False) -> int:
+        """Writes the named tuples generated by one of the search_* methods to a CSV
+        or JSON Lines file, as they're generated, and returns how many were written"""
+        with closing(results):
+            return export_records(results, path, format, columns, compress)
+
+
+    def reference_cache_stats(self):
+        """Returns the hit and miss counts of the in-memory continent and country cache"""
+        return self._reference_cache.stats()
+
+
+    def search_text(self, text: str, tables = None, limit: int = 50) -> list:
+        """Searches the names and keywords of the given tables (all of them if None)
+        for words starting with those in text, returning TextSearchMatch named tuples
+        ordered from the best match to the worst within each table, with the tables'
+        matches interleaved"""
+        return self._text_search.search(text, tables, limit)
+
+
+    def country_counts(self, country_id: int):
+        """Returns the numbers of regions, airports and runways in a country as an
+        EntityCounts named tuple, read from the materialized counts"""
+        with self._reading() as connection:
+            return MaterializedCounts(connection).counts('country', country_id)
+
+
+    def continent_counts(self, continent_id: int):
+        """Returns the numbers of regions, airports and runways in a continent as an
+        EntityCounts named tuple, read from the materialized counts"""
+        with self._reading() as connection:
+            return MaterializedCounts(connection).counts('continent', continent_id)
+
+
     def search_continent(self , continent_code: int, name: str) -> Continent:
         """Searches database for continents and generates results as Continent named tuples"""
-        if continent_code is None :
-            cursor = self._connection.execute("""
-                SELECT * 
-                FROM continent
-                WHERE name = ? ;
-                """,(name,))
-        elif name is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM continent
-                WHERE continent_code = ? ;
-                """,(continent_code,) )
-        else:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM continent
-                WHERE continent_code = ? AND name = ? ;
-                """,(continent_code, name) )
+        with self._reading() as connection:
+            if continent_code is None :
+                cursor = connection.execute("""
+                    SELECT * 
+                    FROM continent
+                    WHERE name = ? ;
+                    """,(name,))
+            elif name is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM continent
+                    WHERE continent_code = ? ;
+                    """,(continent_code,) )
+            else:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM continent
+                    WHERE continent_code = ? AND name = ? ;
+                    """,(continent_code, name) )
 
-        continents = cursor.fetchall()
-        cursor.close()
-        if continents is not None:
-            for continent in continents:
-                yield Continent(*continent)
+            yield from self._stream_rows(cursor, Continent)
 
 
     def search_continent_by_id(self, continent_id:int) -> Continent:
-        """Searches database for a continent by its ID and returns it"""
-        cursor = self._connection.execute("""
-            SELECT *
-            FROM continent
-            WHERE continent_id = ? ;
-            """, (continent_id,) )
-        continent = cursor.fetchone()
-        cursor.close()
-        return Continent(*continent)
+        """Searches database for a continent by its ID and returns it, serving it from
+        the in-memory cache when it's there"""
+        cached = self._reference_cache.continent_by_id(continent_id)
+        if cached is not None:
+            return cached
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT *
+                FROM continent
+                WHERE continent_id = ? ;
+                """, (continent_id,) )
+            continent = Continent(*cursor.fetchone())
+            cursor.close()
+        self._reference_cache.put_continent(continent)
+        return continent
 
 
+    @_writes
     def save_new_continent(self, continent:Continent) :
         """Inserts a new continent into the database and
          returns the error message if failed"""
@@ -85,20 +394,24 @@ class Database:
         if continent.name.isspace() or continent.name == "":
             return "Name can not be empty."
         try:
-            cursor = self._connection.execute("""
-                INSERT INTO continent (continent_code, name)
-                VALUES (?,?); 
-                """, (continent.continent_code, continent.name))
+            with self._savepoint():
+                cursor = self._connection.execute("""
+                    INSERT INTO continent (continent_code, name)
+                    VALUES (?,?); 
+                    """, (continent.continent_code, continent.name))
         except Exception as e:
             error = e.__str__()
             if "UNIQUE constraint" in error:
                 return "Continent Code already exists."
             else :
                 return error
+        continent_id = cursor.lastrowid
         cursor.close()
-        self._connection.commit()
+        self._commit()
+        self._reference_cache.put_continent(continent._replace(continent_id = continent_id))
 
 
+    @_writes
     def update_continent(self, continent: Continent):
         """Updates an existing continent in database with new continent code and name
         and returns error string if an error occurred."""
@@ -107,61 +420,109 @@ class Database:
         if continent.name.isspace() or continent.name == "":
             return "Name can not be empty."
         try:
-            cursor = self._connection.execute("""
-                UPDATE continent
-                SET continent_code = ? , name = ?
-                WHERE continent_id = ?;
-                """, (continent.continent_code, continent.name, continent.continent_id))
+            with self._savepoint():
+                cursor = self._connection.execute("""
+                    UPDATE continent
+                    SET continent_code = ? , name = ?
+                    WHERE continent_id = ?;
+                    """, (continent.continent_code, continent.name, continent.continent_id))
         except Exception as e:
             error = e.__str__()
             if "UNIQUE constraint" in error:
                 return "Continent Code already exists."
             else:
                 return error
+        updated = cursor.rowcount > 0
         cursor.close()
-        self._connection.commit()
+        self._commit()
+        if updated:
+            self._reference_cache.put_continent(continent)
 
 
     def search_country(self, country_code:int, name:str):
         """Searches database for countries and generates results as country named tuples"""
-        if country_code is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM country
-                WHERE name = ? ;
-            """, (name,))
-        elif name is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM country
-                WHERE country_code = ? ;
-            """, (country_code,))
-        else:
-            cursor = self._connection.execute("""
+        with self._reading() as connection:
+            if country_code is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM country
+                    WHERE name = ? ;
+                """, (name,))
+            elif name is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM country
+                    WHERE country_code = ? ;
+                """, (country_code,))
+            else:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM country
+                    WHERE country_code = ? AND name = ? ;
+                """, (country_code,name))
+
+            yield from self._stream_rows(cursor, Country)
+
+
+    def search_country_by_id(self, country_id:int) -> Country:
+        """Searches database for a country by its ID and returns it, serving it from
+        the in-memory cache when it's there"""
+        cached = self._reference_cache.country_by_id(country_id)
+        if cached is not None:
+            return cached
+        with self._reading() as connection:
+            cursor = connection.execute("""
                 SELECT *
                 FROM country
-                WHERE country_code = ? AND name = ? ;
-            """, (country_code,name))
+                WHERE country_id = ? ;
+                """, (country_id,) )
+            country = Country(*cursor.fetchone())
+            cursor.close()
+        self._reference_cache.put_country(country)
+        return country
 
-        countries = cursor.fetchall()
-        cursor.close()
-        if countries is not None:
-            for country in countries:
-                yield Country(*country)
 
+    def _lacks_continent(self, continent_id: int | None) -> bool:
+        """Returns whether there's no continent with an ID. One that isn't cached is
+        looked for in the database (and cached if it's there), since another connection
+        may have added it since the cache was loaded. A missing ID is left for SQLite's
+        constraints to judge, so it's never reported as lacking."""
+        if continent_id is None or self._reference_cache.has_continent(continent_id):
+            return False
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT *
+                FROM continent
+                WHERE continent_id = ? ;
+                """, (continent_id,))
+            row = cursor.fetchone()
+            cursor.close()
+        if row is None:
+            return True
+        self._reference_cache.put_continent(Continent(*row))
+        return False
 
-    def search_country_by_id(self, country_id:int) -> Country:
-        """Searches database for a country by its ID and returns it"""
-        cursor = self._connection.execute("""
-            SELECT *
-            FROM country
-            WHERE country_id = ? ;
-            """, (country_id,) )
-        country = cursor.fetchone()
-        cursor.close()
-        return Country(*country)
 
+    def _lacks_country(self, country_id: int | None) -> bool:
+        """Returns whether there's no country with an ID, looking for it the same way
+        that _lacks_continent looks for a continent"""
+        if country_id is None or self._reference_cache.has_country(country_id):
+            return False
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT *
+                FROM country
+                WHERE country_id = ? ;
+                """, (country_id,))
+            row = cursor.fetchone()
+            cursor.close()
+        if row is None:
+            return True
+        self._reference_cache.put_country(Country(*row))
+        return False
 
+
+    @_writes
     def save_new_country(self, country:Country ):
         """Inserts a new country into the database and
          returns a error message if failed"""
@@ -171,11 +532,14 @@ class Database:
             return "Name can not be empty."
         if country.wikipedia_link is None:
             return "Wikipedia link can not be empty."
+        if self._lacks_continent(country.continent_id):
+            return "Continent ID does not exist."
         try :
-            cursor = self._connection.execute("""
-                INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords)
-                VALUES (?,?,?,?,?)
-            """, (country.country_code, country.name, country.continent_id, country.wikipedia_link, country.keywords))
+            with self._savepoint():
+                cursor = self._connection.execute("""
+                    INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords)
+                    VALUES (?,?,?,?,?)
+                """, (country.country_code, country.name, country.continent_id, country.wikipedia_link, country.keywords))
         except Exception as e:
             error = e.__str__()
             if "UNIQUE constraint" in error:
@@ -184,10 +548,13 @@ class Database:
                 return "Continent ID does not exist."
             else:
                 return error
+        country_id = cursor.lastrowid
         cursor.close()
-        self._connection.commit()
+        self._commit()
+        self._reference_cache.put_country(country._replace(country_id = country_id))
 
 
+    @_writes
     def update_country(self, country:Country):
         """Updates an existing country in the database with new values"""
         if country.country_code.isspace() or country.country_code == "":
@@ -196,13 +563,16 @@ class Database:
             return "Name can not be empty."
         if country.wikipedia_link is None:
             return "Wikipedia link can not be empty."
+        if self._lacks_continent(country.continent_id):
+            return "Continent ID does not exist."
         try:
-            cursor = self._connection.execute("""
-                UPDATE country 
-                SET country_code = ?,  name = ? , continent_id = ?, wikipedia_link = ? , keywords = ?
-                WHERE country_id = ? ;
-            """, (country.country_code, country.name, country.continent_id,
-              country.wikipedia_link, country.keywords, country.country_id) )
+            with self._savepoint():
+                cursor = self._connection.execute("""
+                    UPDATE country 
+                    SET country_code = ?,  name = ? , continent_id = ?, wikipedia_link = ? , keywords = ?
+                    WHERE country_id = ? ;
+                """, (country.country_code, country.name, country.continent_id,
+                  country.wikipedia_link, country.keywords, country.country_id) )
         except Exception as e:
             error = e.__str__()
             if "UNIQUE constraint" in error:
@@ -211,74 +581,76 @@ class Database:
                 return "Continent ID does not exist."
             else:
                 return error
+        updated = cursor.rowcount > 0
         cursor.close()
-        self._connection.commit()
+        self._commit()
+        if updated:
+            self._reference_cache.put_country(country)
 
 
     def search_region(self, region_code:str, local_code:str, name:str):
         """Searches database for regions and generates results as region named tuples"""
-        if region_code is None and name is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE local_code = ? ;
-            """, (local_code,))
-        elif region_code is None and local_code is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE name = ? ;
-            """, (name,))
-        elif local_code is None and name is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE region_code = ? ;
-                """, (region_code,))
-        elif local_code is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE region_code = ? AND name = ? ;
-                """, (region_code,name))
-        elif region_code is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE local_code = ? AND name = ? ;
-                """, (local_code, name))
-        elif name is None:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE region_code = ? AND local_code = ? ;
-                """, (region_code, local_code))
-        else:
-            cursor = self._connection.execute("""
-                SELECT *
-                FROM region
-                WHERE region_code = ? AND local_code = ? AND name = ? ;
-            """, (region_code,local_code,name))
+        with self._reading() as connection:
+            if region_code is None and name is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE local_code = ? ;
+                """, (local_code,))
+            elif region_code is None and local_code is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE name = ? ;
+                """, (name,))
+            elif local_code is None and name is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE region_code = ? ;
+                    """, (region_code,))
+            elif local_code is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE region_code = ? AND name = ? ;
+                    """, (region_code,name))
+            elif region_code is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE local_code = ? AND name = ? ;
+                    """, (local_code, name))
+            elif name is None:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE region_code = ? AND local_code = ? ;
+                    """, (region_code, local_code))
+            else:
+                cursor = connection.execute("""
+                    SELECT *
+                    FROM region
+                    WHERE region_code = ? AND local_code = ? AND name = ? ;
+                """, (region_code,local_code,name))
 
-        regions = cursor.fetchall()
-        cursor.close()
-        if regions is not None:
-            for region in regions:
-                yield Region(*region)
+            yield from self._stream_rows(cursor, Region)
 
 
     def search_region_by_id(self, region_id:int) -> Region:
         """Searches database for a region by its ID and returns it"""
-        cursor = self._connection.execute("""
-            SELECT *
-            FROM region
-            WHERE region_id = ? ;
-            """, (region_id,) )
-        region = cursor.fetchone()
-        cursor.close()
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT *
+                FROM region
+                WHERE region_id = ? ;
+                """, (region_id,) )
+            region = cursor.fetchone()
+            cursor.close()
         return Region(*region)
 
 
+    @_writes
     def save_new_region(self, region:Region ):
         """Inserts a new region into the database and
          returns an error message if failed"""
@@ -292,14 +664,17 @@ class Database:
             return "Continent id can not be empty."
         if region.country_id is None:
             return "Country id can not be empty."
+        if self._lacks_continent(region.continent_id) or self._lacks_country(region.country_id):
+            return "Continent ID or Country ID does not exist."
         try :
-            cursor = self._connection.execute("""
-                INSERT INTO region (region_code, local_code,
-                 name, continent_id, country_id, wikipedia_link, keywords)
-                VALUES (?,?,?,?,?,?,?)
-            """, (region.region_code, region.local_code,
-                 region.name, region.continent_id, region.country_id,
-                 region.wikipedia_link, region.keywords))
+            with self._savepoint():
+                cursor = self._connection.execute("""
+                    INSERT INTO region (region_code, local_code,
+                     name, continent_id, country_id, wikipedia_link, keywords)
+                    VALUES (?,?,?,?,?,?,?)
+                """, (region.region_code, region.local_code,
+                     region.name, region.continent_id, region.country_id,
+                     region.wikipedia_link, region.keywords))
         except Exception as e:
             error = e.__str__()
             if "UNIQUE constraint" in error:
@@ -309,9 +684,10 @@ class Database:
             else:
                 return error
         cursor.close()
-        self._connection.commit()
+        self._commit()
 
 
+    @_writes
     def update_region(self, region: Region):
         """Updates an existing region in the database with new values"""
         if region.region_code.isspace() or region.region_code == "":
@@ -324,14 +700,17 @@ class Database:
             return "Continent id can not be empty."
         if region.country_id is None:
             return "Country id can not be empty."
+        if self._lacks_continent(region.continent_id) or self._lacks_country(region.country_id):
+            return "Continent ID or Country ID does not exist."
         try:
-            cursor = self._connection.execute("""
-                 UPDATE region 
-                 SET region_code = ? , local_code = ?, name = ?, 
-                 continent_id = ?, country_id = ?, wikipedia_link = ?, keywords = ?
-                 WHERE region_id = ? ;
-             """, (region.region_code, region.local_code,region.name, region.continent_id,
-                   region.country_id, region.wikipedia_link, region.keywords, region.region_id))
+            with self._savepoint():
+                cursor = self._connection.execute("""
+                     UPDATE region 
+                     SET region_code = ? , local_code = ?, name = ?, 
+                     continent_id = ?, country_id = ?, wikipedia_link = ?, keywords = ?
+                     WHERE region_id = ? ;
+                 """, (region.region_code, region.local_code,region.name, region.continent_id,
+                       region.country_id, region.wikipedia_link, region.keywords, region.region_id))
         except Exception as e:
             error = e.__str__()
             if "UNIQUE constraint" in error:
@@ -341,4 +720,216 @@ class Database:
             else:
                 return error
         cursor.close()
-        self._connection.commit()
+        self._commit()
+
+
+    def search_airport(self, airport_ident: str, name: str):
+        """Searches database for airports and generates results as airport named tuples"""
+        criteria = [(column, value)
+                    for column, value in (('airport_ident', airport_ident), ('name', name))
+                    if value is not None]
+        if not criteria:
+            return
+        where, parameters = self._paged_where_clause('airport', criteria)
+        with self._reading() as connection:
+            cursor = connection.execute(f"""
+                SELECT *
+                FROM airport
+                WHERE {where} ;
+                """, parameters)
+            yield from self._stream_rows(cursor, Airport)
+
+
+    def search_airport_by_id(self, airport_id: int) -> Airport:
+        """Searches database for an airport by its ID and returns it"""
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT *
+                FROM airport
+                WHERE airport_id = ? ;
+                """, (airport_id,))
+            airport = Airport(*cursor.fetchone())
+            cursor.close()
+        return airport
+
+
+    def resolve_airport_code(self, code: str) -> list[Airport]:
+        """Returns every airport whose identifier, GPS code, IATA code or local code
+        is the given code, most specific match first, finding them through the
+        in-memory code index rather than by searching those columns"""
+        return [self.search_airport_by_id(airport_id) for airport_id in self._airport_codes.resolve(code)]
+
+
+    def _check_airport(self, airport: Airport):
+        """Returns an error message if an airport is missing a required value"""
+        if airport.airport_ident is None or airport.airport_ident.isspace() or airport.airport_ident == "":
+            return "Airport Ident can not be empty."
+        if airport.type is None or airport.type.isspace() or airport.type == "":
+            return "Type can not be empty."
+        if airport.name is None or airport.name.isspace() or airport.name == "":
+            return "Name can not be empty."
+        if airport.latitude_deg is None or airport.longitude_deg is None:
+            return "Latitude and longitude can not be empty."
+        if airport.continent_id is None:
+            return "Continent id can not be empty."
+        if airport.country_id is None:
+            return "Country id can not be empty."
+        if airport.region_id is None:
+            return "Region id can not be empty."
+        if airport.scheduled_service is None:
+            return "Scheduled service can not be empty."
+        if self._lacks_country(airport.country_id):
+            return "Country ID does not exist."
+
+
+    def _airport_error(self, error: str) -> str:
+        """Translates a database error raised by saving an airport into a message"""
+        if "UNIQUE constraint" in error:
+            return "Airport Ident already exists."
+        elif "FOREIGN KEY constraint" in error:
+            return "Continent ID, Country ID or Region ID does not exist."
+        else:
+            return error
+
+
+    @_writes
+    def save_new_airport(self, airport: Airport):
+        """Inserts a new airport into the database and
+         returns an error message if failed"""
+        error = self._check_airport(airport)
+        if error is not None:
+            return error
+        columns = Airport._fields[1:]
+        try:
+            with self._savepoint():
+                cursor = self._connection.execute(f"""
+                    INSERT INTO airport ({', '.join(columns)})
+                    VALUES ({', '.join('?' for _ in columns)}) ;
+                """, airport[1:])
+        except Exception as e:
+            return self._airport_error(e.__str__())
+        airport_id = cursor.lastrowid
+        cursor.close()
+        self._commit()
+        self._airport_codes.put(airport._replace(airport_id = airport_id))
+
+
+    @_writes
+    def update_airport(self, airport: Airport):
+        """Updates an existing airport in the database with new values"""
+        error = self._check_airport(airport)
+        if error is not None:
+            return error
+        columns = Airport._fields[1:]
+        try:
+            with self._savepoint():
+                cursor = self._connection.execute(f"""
+                    UPDATE airport
+                    SET {', '.join(f'{column} = ?' for column in columns)}
+                    WHERE airport_id = ? ;
+                """, airport[1:] + (airport.airport_id,))
+        except Exception as e:
+            return self._airport_error(e.__str__())
+        updated = cursor.rowcount > 0
+        cursor.close()
+        self._commit()
+        if updated:
+            self._airport_codes.put(airport)
+
+
+    def search_airports_in_box(self, min_latitude: float, max_latitude: float,
+                               min_longitude: float, max_longitude: float) -> list[Airport]:
+        """Returns every airport located within a box of latitudes and longitudes"""
+        with self._reading() as connection:
+            return SpatialIndex(connection).in_box(
+                min_latitude, max_latitude, min_longitude, max_longitude)
+
+
+    def search_airports_near(self, latitude: float, longitude: float, radius_km: float) -> list:
+        """Returns every airport within radius_km of a point as (airport, distance in
+        kilometers) pairs, nearest first"""
+        with self._reading() as connection:
+            return SpatialIndex(connection).within(latitude, longitude, radius_km)
+
+
+    def search_nearest_airports(self, latitude: float, longitude: float, count: int) -> list:
+        """Returns the count airports nearest to a point as (airport, distance in
+        kilometers) pairs, nearest first"""
+        with self._reading() as connection:
+            return SpatialIndex(connection).nearest(latitude, longitude, count)
+
+
+    def _airports_near_airport(self, airport_id: int, radius_km: float) -> set[int]:
+        """Returns the IDs of the airports within radius_km of an airport, including
+        itself, or an empty set if there's no such airport"""
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT latitude_deg, longitude_deg
+                FROM airport
+                WHERE airport_id = ? ;
+                """, (airport_id,))
+            location = cursor.fetchone()
+            cursor.close()
+            if location is None:
+                return set()
+            return {airport.airport_id
+                    for airport, distance_km in SpatialIndex(connection).within(*location, radius_km)}
+
+
+    def search_frequencies(self, queries) -> list[list]:
+        """Returns the frequencies that match each of a batch of FrequencyQuery objects,
+        in the same order as the queries, each as a list of AirportFrequency named tuples
+        ordered by frequency. The airports near an airport are only found once for each
+        distinct airport and radius in the batch."""
+        airports_near = {}
+        results = []
+        for query in queries:
+            if query.airport_id is None:
+                airport_ids = None
+            elif query.radius_km is None:
+                airport_ids = [query.airport_id]
+            else:
+                key = (query.airport_id, query.radius_km)
+                if key not in airports_near:
+                    airports_near[key] = self._airports_near_airport(*key)
+                airport_ids = airports_near[key]
+            results.append(self._frequencies.in_band(query.min_mhz, query.max_mhz, airport_ids))
+        return results
+
+
+    def search_navigation_aids_near(self, latitude: float, longitude: float, radius_km: float) -> list:
+        """Returns every navigation aid within radius_km of a point as (navigation aid,
+        distance in kilometers) pairs, nearest first"""
+        with self._reading() as connection:
+            return SpatialIndex(connection, 'navigation_aid').within(latitude, longitude, radius_km)
+
+
+    def find_frequency_conflicts(self, max_distance_km: float, frequency_tolerance_khz: int = 0) -> list:
+        """Returns a FrequencyConflict for each pair of navigation aids whose frequencies
+        differ by at most frequency_tolerance_khz and that are at most max_distance_km
+        apart, nearest pair first"""
+        with self._reading() as connection:
+            cursor = connection.execute("""
+                SELECT *
+                FROM navigation_aid ;
+                """)
+            return find_frequency_conflicts(
+                self._stream_rows(cursor, NavigationAid), max_distance_km, frequency_tolerance_khz)
+
+
+    def search_runways(self, criteria):
+        """Searches database for airports with runways that match a RunwayCriteria and
+        generates (airport, RunwaySummary) pairs, one per airport, summarizing only the
+        runways that match"""
+        with self._reading() as connection:
+            yield from RunwaySearch(connection, self._fetch_batch_size).search(criteria)
+
+
+    def load_airport_coordinates(self, country_id: int | None = None, airport_type: str | None = None):
+        """Returns the IDs and coordinates of the airports, only those in a country and of
+        a type if either is given, as NumPy arrays for computing distances in bulk. NumPy
+        is only imported when this is called, since nothing else needs it."""
+        from .distances import load_coordinates
+
+        with self._reading() as connection:
+            return load_coordinates(connection, country_id, airport_type)
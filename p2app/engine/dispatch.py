@@ -0,0 +1,70 @@
+# p2app/engine/dispatch.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# A registry that maps event types to the engine methods that handle them,
+# so that the engine can find the handler for an event with a single lookup
+# instead of testing the event against every type it knows about.
+
+
+
+def handles(*event_types):
+    """A decorator that marks a method as the handler for the given event types.
+    The Engine collects these marks when it's created and registers them into
+    its DispatchTable."""
+    def mark(method):
+        method._handled_event_types = getattr(method, '_handled_event_types', ()) + event_types
+        return method
+
+    return mark
+
+
+
+class DispatchTable:
+    """Maps event types to handlers. An event whose exact type has no handler
+    is resolved through its type's method resolution order, so handlers that
+    are registered for a base class also receive events of its subclasses.
+    Resolutions are remembered, so each event type is only resolved once."""
+
+    def __init__(self):
+        """Initializes an empty dispatch table"""
+        self._handlers = {}
+        self._resolved = {}
+
+
+    def register(self, event_type, handler) -> None:
+        """Registers a handler for an event type, replacing any existing one"""
+        self._handlers[event_type] = handler
+        self._resolved.clear()
+
+
+    def unregister(self, event_type) -> None:
+        """Removes the handler registered for an event type, if there is one"""
+        self._handlers.pop(event_type, None)
+        self._resolved.clear()
+
+
+    def register_marked(self, obj) -> None:
+        """Registers every method of obj that was marked with @handles"""
+        for name in dir(type(obj)):
+            event_types = getattr(getattr(type(obj), name), '_handled_event_types', ())
+            for event_type in event_types:
+                self.register(event_type, getattr(obj, name))
+
+
+    def resolve(self, event_type):
+        """Returns the handler for an event type, or None if there isn't one"""
+        try:
+            return self._resolved[event_type]
+        except KeyError:
+            pass
+
+        handler = None
+        for base in event_type.__mro__:
+            if base in self._handlers:
+                handler = self._handlers[base]
+                break
+
+        self._resolved[event_type] = handler
+        return handler
@@ -0,0 +1,146 @@
+# p2app/engine/distances.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Vectorized great-circle distances between sets of airports, computed with NumPy.
+#
+# Airport coordinates are loaded into contiguous float64 arrays (in radians), and
+# the haversine formula is applied to whole arrays at once rather than to one pair
+# of airports at a time.  Distance matrices are computed in tiles of rows, sized so
+# that the temporary arrays each tile needs stay under a memory limit, and can also
+# be generated one tile at a time when the whole matrix is too large to hold.
+#
+# NumPy is only needed by this module, which the rest of the engine doesn't import,
+# so the application itself runs without it.
+
+from collections import namedtuple
+import numpy
+from .spatial import EARTH_RADIUS_KM
+
+
+
+_MEMORY_LIMIT_BYTES = 64 * 1024 * 1024
+
+# The number of float64 arrays the size of a tile that computing one tile needs
+_TEMPORARIES_PER_TILE = 4
+
+
+AirportCoordinates = namedtuple('AirportCoordinates', ['airport_ids', 'latitudes', 'longitudes'])
+
+AirportCoordinates.__annotations__ = {
+    'airport_ids': numpy.ndarray,
+    'latitudes': numpy.ndarray,
+    'longitudes': numpy.ndarray
+}
+
+
+DistanceTile = namedtuple('DistanceTile', ['rows', 'columns', 'distances'])
+
+DistanceTile.__annotations__ = {
+    'rows': slice,
+    'columns': slice,
+    'distances': numpy.ndarray
+}
+
+
+
+def load_coordinates(connection, country_id: int | None = None,
+                     airport_type: str | None = None) -> AirportCoordinates:
+    """Loads the IDs and coordinates (in radians) of the airports in a database, only
+    those in a country and of a type if either is given, ordered by ID. The rows are
+    read straight from the cursor into the arrays, without building a list of them."""
+    conditions = []
+    parameters = []
+    if country_id is not None:
+        conditions.append('country_id = ?')
+        parameters.append(country_id)
+    if airport_type is not None:
+        conditions.append('type = ?')
+        parameters.append(airport_type)
+    where = ' AND '.join(conditions) or '1'
+
+    cursor = connection.execute(f"""
+        SELECT airport_id, latitude_deg, longitude_deg
+        FROM airport
+        WHERE {where}
+        ORDER BY airport_id ;
+        """, parameters)
+    rows = numpy.fromiter(
+        cursor, dtype = [('airport_id', numpy.int64), ('latitude', numpy.float64),
+                         ('longitude', numpy.float64)])
+    cursor.close()
+
+    return AirportCoordinates(
+        numpy.ascontiguousarray(rows['airport_id']),
+        numpy.radians(numpy.ascontiguousarray(rows['latitude'])),
+        numpy.radians(numpy.ascontiguousarray(rows['longitude'])))
+
+
+
+def _haversine(latitudes1, longitudes1, cos_latitudes1, latitudes2, longitudes2, cos_latitudes2):
+    """Returns the great-circle distances in kilometers between points given in radians,
+    broadcasting the first set of points against the second"""
+    a = numpy.sin((latitudes2 - latitudes1) / 2) ** 2
+    a += cos_latitudes1 * cos_latitudes2 * numpy.sin((longitudes2 - longitudes1) / 2) ** 2
+    numpy.clip(a, 0.0, 1.0, out = a)
+    return 2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.sqrt(a, out = a), out = a)
+
+
+
+def distance_vector(latitude: float, longitude: float, coordinates: AirportCoordinates) -> numpy.ndarray:
+    """Returns the distance in kilometers from a point (in degrees) to each airport"""
+    latitude = numpy.radians(latitude)
+    longitude = numpy.radians(longitude)
+    return _haversine(
+        latitude, longitude, numpy.cos(latitude),
+        coordinates.latitudes, coordinates.longitudes, numpy.cos(coordinates.latitudes))
+
+
+
+def _rows_per_tile(columns: int, memory_limit_bytes: int) -> int:
+    """Returns how many rows of a matrix with a number of columns can be computed at once
+    without their temporary arrays exceeding a memory limit"""
+    bytes_per_row = max(1, columns) * numpy.dtype(numpy.float64).itemsize * _TEMPORARIES_PER_TILE
+    return max(1, memory_limit_bytes // bytes_per_row)
+
+
+
+def iter_distance_tiles(origins: AirportCoordinates, destinations: AirportCoordinates | None = None,
+                        memory_limit_bytes: int = _MEMORY_LIMIT_BYTES):
+    """Generates the matrix of distances in kilometers from each origin airport (rows)
+    to each destination airport (columns), which are the origins if None, as a sequence
+    of DistanceTiles covering consecutive rows, each computed within a memory limit"""
+    if destinations is None:
+        destinations = origins
+
+    cos_origins = numpy.cos(origins.latitudes)
+    destination_latitudes = destinations.latitudes[numpy.newaxis, :]
+    destination_longitudes = destinations.longitudes[numpy.newaxis, :]
+    cos_destinations = numpy.cos(destination_latitudes)
+    columns = slice(0, len(destinations.airport_ids))
+    rows_per_tile = _rows_per_tile(len(destinations.airport_ids), memory_limit_bytes)
+
+    for start in range(0, len(origins.airport_ids), rows_per_tile):
+        rows = slice(start, min(start + rows_per_tile, len(origins.airport_ids)))
+        distances = _haversine(
+            origins.latitudes[rows, numpy.newaxis], origins.longitudes[rows, numpy.newaxis],
+            cos_origins[rows, numpy.newaxis],
+            destination_latitudes, destination_longitudes, cos_destinations)
+        yield DistanceTile(rows, columns, distances)
+
+
+
+def distance_matrix(origins: AirportCoordinates, destinations: AirportCoordinates | None = None,
+                    memory_limit_bytes: int = _MEMORY_LIMIT_BYTES) -> numpy.ndarray:
+    """Returns the matrix of distances in kilometers from each origin airport (rows) to
+    each destination airport (columns), which are the origins if None. The matrix is
+    filled a tile at a time, so beyond the matrix itself, no more than about
+    memory_limit_bytes is needed."""
+    if destinations is None:
+        destinations = origins
+
+    matrix = numpy.empty((len(origins.airport_ids), len(destinations.airport_ids)))
+    for tile in iter_distance_tiles(origins, destinations, memory_limit_bytes):
+        matrix[tile.rows, tile.columns] = tile.distances
+    return matrix
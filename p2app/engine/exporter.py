@@ -0,0 +1,138 @@
+# p2app/engine/exporter.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Streaming export of tables or search results to CSV or JSON Lines files.
+#
+# Rows are read from the cursor a batch at a time and written out as they arrive,
+# so the memory an export needs doesn't depend on how many rows it writes.
+
+import csv
+import gzip
+import json
+from pathlib import Path
+
+
+
+_FETCH_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+
+
+def _open_output(path: Path, compress: bool):
+    """Opens a text file for writing, compressing it with gzip if compress is true"""
+    if compress:
+        return gzip.open(path, 'wt', newline = '', encoding = 'utf-8')
+    else:
+        return open(path, 'w', newline = '', encoding = 'utf-8')
+
+
+
+def write_rows(rows, columns: list[str], path: Path, format: str = 'csv',
+               compress: bool = False) -> int:
+    """Writes rows, each a sequence of values in the order of columns, to a file at
+    path in the given format, returning the number of rows that were written. The
+    rows can be any iterable, and are consumed one at a time."""
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f'Export format must be one of: {", ".join(EXPORT_FORMATS)}')
+
+    count = 0
+    with _open_output(path, compress) as file:
+        if format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                file.write(json.dumps(dict(zip(columns, row)), ensure_ascii = False))
+                file.write('\n')
+                count += 1
+
+    return count
+
+
+
+def export_records(records, path: Path, format: str = 'csv', columns: list[str] | None = None,
+                   compress: bool = False) -> int:
+    """Writes named tuples (e.g., the results of one of the Database's searches) to a
+    file, keeping only the given columns (all of them if None), and returns the number
+    that were written"""
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return write_rows((), columns or [], path, format, compress)
+
+    columns = columns or list(first._fields)
+    projection = [first._fields.index(column) for column in columns]
+
+    def project(record):
+        return tuple(record[index] for index in projection)
+
+    rows = (project(record) for record in _prepend(first, records))
+    return write_rows(rows, columns, path, format, compress)
+
+
+
+def _prepend(first, rest):
+    """Generates first, followed by everything in rest"""
+    yield first
+    yield from rest
+
+
+
+class Exporter:
+    """Exports the tables of a database"""
+
+    def __init__(self, connection, batch_size: int = _FETCH_BATCH_SIZE):
+        """Initializes the exporter for an open connection"""
+        self._connection = connection
+        self._batch_size = batch_size
+
+
+    def _table_columns(self, table: str) -> list[str]:
+        """Returns the names of a table's columns, raising a ValueError if there's no
+        such table"""
+        cursor = self._connection.execute("""
+            SELECT name
+            FROM pragma_table_info(?) ;
+            """, (table,))
+        columns = [name for name, in cursor.fetchall()]
+        cursor.close()
+        if not columns:
+            raise ValueError(f'There is no table named {table}')
+        return columns
+
+
+    def _stream(self, cursor):
+        """Generates the rows of an executed cursor, fetching them in batches, and
+        closes the cursor once they run out or the generator is closed"""
+        try:
+            while True:
+                rows = cursor.fetchmany(self._batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+
+    def export_table(self, table: str, path: Path, format: str = 'csv',
+                     columns: list[str] | None = None, compress: bool = False) -> int:
+        """Writes the given columns (all of them if None) of every row of a table to a
+        file at path, returning the number of rows that were written"""
+        table_columns = self._table_columns(table)
+        columns = columns or table_columns
+        unknown_columns = [column for column in columns if column not in table_columns]
+        if unknown_columns:
+            raise ValueError(f'{table} has no columns named {", ".join(unknown_columns)}')
+
+        cursor = self._connection.execute(f'SELECT {", ".join(columns)} FROM {table} ;')
+        rows = self._stream(cursor)
+        try:
+            return write_rows(rows, columns, path, format, compress)
+        finally:
+            rows.close()
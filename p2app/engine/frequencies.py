@@ -0,0 +1,78 @@
+# p2app/engine/frequencies.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# An in-memory index of the radio frequencies that airports use, so that every
+# frequency in a band can be found with two binary searches of a sorted list,
+# rather than a scan of the airport_frequency table.
+#
+# Frequencies are stored as REALs, so a value like 122.8 may not be stored exactly;
+# the ends of every band are widened by a small tolerance, well under the spacing
+# of any two channels, so that a band whose ends are the same finds that frequency.
+
+from bisect import bisect_left, bisect_right
+from p2app.events import AirportFrequency
+
+
+
+# Half of a kilohertz, far finer than the narrowest (8.33 kHz) channel spacing
+_TOLERANCE_MHZ = 0.0005
+
+
+
+class FrequencyIndex:
+    """Every airport frequency, sorted by frequency and grouped by airport"""
+
+    def __init__(self):
+        """Initializes an empty index"""
+        self._frequencies_mhz = []
+        self._records = []
+        self._records_by_airport = {}
+
+
+    def load(self, connection) -> None:
+        """Replaces the index's contents with every frequency in a database"""
+        self.__init__()
+        cursor = connection.execute("""
+            SELECT *
+            FROM airport_frequency
+            ORDER BY frequency_mhz, airport_frequency_id ;
+            """)
+        for row in cursor.fetchall():
+            record = AirportFrequency(*row)
+            self._frequencies_mhz.append(record.frequency_mhz)
+            self._records.append(record)
+            self._records_by_airport.setdefault(record.airport_id, []).append(record)
+        cursor.close()
+
+
+    def _band(self, min_mhz: float, max_mhz: float) -> tuple[int, int]:
+        """Returns the slice of the sorted records whose frequencies are in a band"""
+        start = bisect_left(self._frequencies_mhz, min_mhz - _TOLERANCE_MHZ)
+        end = bisect_right(self._frequencies_mhz, max_mhz + _TOLERANCE_MHZ, lo = start)
+        return start, end
+
+
+    def in_band(self, min_mhz: float, max_mhz: float, airport_ids = None) -> list[AirportFrequency]:
+        """Returns every frequency from min_mhz to max_mhz, in order of frequency, only those
+        of the airports whose IDs are in airport_ids if it isn't None. Whichever is smaller,
+        the band or those airports' frequencies, is the one that's filtered by the other."""
+        start, end = self._band(min_mhz, max_mhz)
+        if airport_ids is None or start == end:
+            return self._records[start:end]
+
+        airport_records = [self._records_by_airport.get(airport_id, []) for airport_id in airport_ids]
+        if sum(len(records) for records in airport_records) < end - start:
+            low = self._frequencies_mhz[start]
+            high = self._frequencies_mhz[end - 1]
+            matches = [record for records in airport_records for record in records
+                       if low <= record.frequency_mhz <= high]
+            return sorted(matches, key = lambda record: (record.frequency_mhz, record.airport_frequency_id))
+        else:
+            airport_ids = set(airport_ids)
+            return [record for record in self._records[start:end] if record.airport_id in airport_ids]
+
+
+    def __len__(self) -> int:
+        return len(self._records)
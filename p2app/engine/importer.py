@@ -0,0 +1,330 @@
+# p2app/engine/importer.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Bulk loading of the OurAirports CSV files (https://ourairports.com/data/) into
+# the database.
+#
+# Each file is parsed a row at a time and inserted in large batches, all within
+# one transaction per file.  While the load runs, the database's durability
+# settings are relaxed and its secondary indexes, text search tables, spatial
+# indexes and materialized counts are dropped, then rebuilt once at the end, which
+# is far cheaper than maintaining them row by row.
+#
+# Each of those structures has a drop method and a provision method for this.
+# drop removes whatever of the structure exists, along with the triggers that keep
+# it in sync, so nothing is maintained while the rows go in; provision creates
+# whatever is missing and fills it from the tables as they are then.  Provisioning
+# happens whether or not the load succeeds, so a failed load never leaves the
+# database without them.
+#
+# OurAirports refers to continents, countries and regions by their codes and to
+# airports by their identifiers, so those are translated to the IDs that the
+# database uses as each file is loaded.  The files must therefore be loaded
+# parents first, which import_files takes care of.
+
+from collections import namedtuple
+import csv
+from pathlib import Path
+from .counts import MaterializedCounts
+from .indexes import IndexManager
+from .spatial import SPATIAL_TABLES, SpatialIndex
+from .text_search import TextSearchEngine
+
+
+
+_BATCH_SIZE = 10000
+
+
+ImportReport = namedtuple('ImportReport', ['loaded', 'rejected', 'foreign_key_violations'])
+
+ImportReport.__annotations__ = {
+    'loaded': dict[str, int],
+    'rejected': dict[str, int],
+    'foreign_key_violations': int
+}
+
+
+
+def _text(value: str) -> str:
+    return value
+
+
+def _optional_text(value: str) -> str | None:
+    return value if value != '' else None
+
+
+def _optional_integer(value: str) -> int | None:
+    return int(float(value)) if value != '' else None
+
+
+def _integer(value: str) -> int:
+    return int(float(value))
+
+
+def _optional_real(value: str) -> float | None:
+    return float(value) if value != '' else None
+
+
+def _real(value: str) -> float:
+    return float(value)
+
+
+def _yes_no(value: str) -> int:
+    return 1 if value.lower() in ('yes', '1', 'true') else 0
+
+
+
+# For each table, in the order they must be loaded: the key whose values other files
+# use to refer to its rows (or None), and its columns, each as (column, CSV field,
+# converter). A converter that's a string is the name of the table whose key the
+# field refers to, with a trailing '?' if the field may be empty.
+_TABLES = {
+    'continent': ('continent_code', [
+        ('continent_id', 'id', _integer),
+        ('continent_code', 'code', _text),
+        ('name', 'name', _text)]),
+    'country': ('country_code', [
+        ('country_id', 'id', _integer),
+        ('country_code', 'code', _text),
+        ('name', 'name', _text),
+        ('continent_id', 'continent', 'continent'),
+        ('wikipedia_link', 'wikipedia_link', _text),
+        ('keywords', 'keywords', _optional_text)]),
+    'region': ('region_code', [
+        ('region_id', 'id', _integer),
+        ('region_code', 'code', _text),
+        ('local_code', 'local_code', _text),
+        ('name', 'name', _text),
+        ('continent_id', 'continent', 'continent'),
+        ('country_id', 'iso_country', 'country'),
+        ('wikipedia_link', 'wikipedia_link', _optional_text),
+        ('keywords', 'keywords', _optional_text)]),
+    'airport': ('airport_ident', [
+        ('airport_id', 'id', _integer),
+        ('airport_ident', 'ident', _text),
+        ('type', 'type', _text),
+        ('name', 'name', _text),
+        ('latitude_deg', 'latitude_deg', _real),
+        ('longitude_deg', 'longitude_deg', _real),
+        ('elevation_ft', 'elevation_ft', _optional_integer),
+        ('continent_id', 'continent', 'continent'),
+        ('country_id', 'iso_country', 'country'),
+        ('region_id', 'iso_region', 'region'),
+        ('municipality', 'municipality', _optional_text),
+        ('scheduled_service', 'scheduled_service', _yes_no),
+        ('gps_code', 'gps_code', _optional_text),
+        ('iata_code', 'iata_code', _optional_text),
+        ('local_code', 'local_code', _optional_text),
+        ('home_link', 'home_link', _optional_text),
+        ('wikipedia_link', 'wikipedia_link', _optional_text),
+        ('keywords', 'keywords', _optional_text)]),
+    'runway': (None, [
+        ('runway_id', 'id', _integer),
+        ('airport_id', 'airport_ref', _integer),
+        ('length_ft', 'length_ft', _optional_integer),
+        ('width_ft', 'width_ft', _optional_integer),
+        ('surface', 'surface', _optional_text),
+        ('lighted', 'lighted', _yes_no),
+        ('closed', 'closed', _yes_no),
+        ('le_ident', 'le_ident', _optional_text),
+        ('le_latitude_deg', 'le_latitude_deg', _optional_real),
+        ('le_longitude_deg', 'le_longitude_deg', _optional_real),
+        ('le_elevation_ft', 'le_elevation_ft', _optional_integer),
+        ('le_heading_deg', 'le_heading_degT', _optional_real),
+        ('le_displaced_threshold_ft', 'le_displaced_threshold_ft', _optional_integer),
+        ('he_ident', 'he_ident', _optional_text),
+        ('he_latitude_deg', 'he_latitude_deg', _optional_real),
+        ('he_longitude_deg', 'he_longitude_deg', _optional_real),
+        ('he_elevation_ft', 'he_elevation_ft', _optional_integer),
+        ('he_heading_deg', 'he_heading_degT', _optional_real),
+        ('he_displaced_threshold_ft', 'he_displaced_threshold_ft', _optional_integer)]),
+    'airport_frequency': (None, [
+        ('airport_frequency_id', 'id', _integer),
+        ('airport_id', 'airport_ref', _integer),
+        ('type', 'type', _text),
+        ('description', 'description', _optional_text),
+        ('frequency_mhz', 'frequency_mhz', _real)]),
+    'navigation_aid': (None, [
+        ('navigation_aid_id', 'id', _integer),
+        ('filename', 'filename', _text),
+        ('ident', 'ident', _text),
+        ('name', 'name', _text),
+        ('type', 'type', _text),
+        ('frequency_khz', 'frequency_khz', _integer),
+        ('latitude_deg', 'latitude_deg', _real),
+        ('longitude_deg', 'longitude_deg', _real),
+        ('elevation_ft', 'elevation_ft', _optional_integer),
+        ('iso_country', 'iso_country', _text),
+        ('dme_frequency_khz', 'dme_frequency_khz', _optional_integer),
+        ('dme_channel', 'dme_channel', _optional_text),
+        ('dme_latitude_deg', 'dme_latitude_deg', _optional_real),
+        ('dme_longitude_deg', 'dme_longitude_deg', _optional_real),
+        ('dme_elevation_ft', 'dme_elevation_ft', _optional_integer),
+        ('adjusted_variation_deg', 'slaved_variation_deg', _optional_real),
+        ('magnetic_variation_deg', 'magnetic_variation_deg', _optional_real),
+        ('usage_type', 'usageType', _optional_text),
+        ('power', 'power', _optional_text),
+        ('airport_id', 'associated_airport', 'airport?')])
+}
+
+
+# Tables that have no primary key, whose rows are replaced wholesale rather than by ID
+_UNKEYED_TABLES = {'navigation_aid'}
+
+
+
+class BulkImporter:
+    """Loads OurAirports CSV files into a database in bulk"""
+
+    def __init__(self, connection, progress = None, batch_size: int = _BATCH_SIZE):
+        """Initializes the importer for an open connection. If progress is given, it's
+        called with a table's name and the number of its rows loaded so far after each
+        batch of rows is inserted."""
+        self._connection = connection
+        self._progress = progress
+        self._batch_size = batch_size
+        self._keys = {}
+
+
+    def import_files(self, paths: dict[str, Path]) -> ImportReport:
+        """Loads the CSV file at each path into the table it's keyed by, returning a
+        report of how many rows of each were loaded and rejected, and how many rows
+        in the whole database violate a foreign key afterward. Rows whose fields can't
+        be converted, or that refer to a code that doesn't exist, are rejected."""
+        unknown_tables = set(paths) - set(_TABLES)
+        if unknown_tables:
+            raise ValueError(f'Cannot import tables: {", ".join(sorted(unknown_tables))}')
+
+        report = ImportReport({}, {}, 0)
+        changed_settings = []
+        try:
+            self._relax_settings(changed_settings)
+            IndexManager(self._connection).drop()
+            TextSearchEngine(self._connection).drop()
+            MaterializedCounts(self._connection).drop()
+            for table in SPATIAL_TABLES:
+                SpatialIndex(self._connection, table).drop()
+
+            for table in _TABLES:
+                if table in paths:
+                    loaded, rejected = self._import_file(table, paths[table])
+                    report.loaded[table] = loaded
+                    report.rejected[table] = rejected
+        finally:
+            self._restore_settings(changed_settings)
+            IndexManager(self._connection).provision(analyze = True)
+            TextSearchEngine(self._connection).provision()
+            MaterializedCounts(self._connection).provision()
+            for table in SPATIAL_TABLES:
+                SpatialIndex(self._connection, table).provision()
+
+        cursor = self._connection.execute('PRAGMA foreign_key_check ;')
+        violations = len(cursor.fetchall())
+        cursor.close()
+        return report._replace(foreign_key_violations = violations)
+
+
+    def _relax_settings(self, changed_settings: list) -> None:
+        """Turns off the settings that make each commit durable and checked, appending
+        each one to changed_settings, along with its previous value, as it's changed, so
+        that if this fails partway, exactly the ones that were changed can be restored"""
+        for setting, relaxed_value in (('synchronous', 0), ('journal_mode', 'memory'), ('foreign_keys', 0)):
+            cursor = self._connection.execute(f'PRAGMA {setting} ;')
+            previous_value, = cursor.fetchone()
+            cursor.close()
+            # A file in WAL mode stays in it, since it can't leave it while the pooled
+            # readers are connected; with synchronous off, its commits are cheap anyway.
+            if setting == 'journal_mode' and previous_value == 'wal':
+                continue
+            if previous_value != relaxed_value:
+                self._connection.execute(f'PRAGMA {setting} = {relaxed_value} ;').close()
+                changed_settings.append((setting, previous_value))
+
+
+    def _restore_settings(self, changed_settings: list) -> None:
+        """Restores the settings that _relax_settings changed, most recent first"""
+        if self._connection.in_transaction:
+            self._connection.rollback()
+        for setting, previous_value in reversed(changed_settings):
+            self._connection.execute(f'PRAGMA {setting} = {previous_value} ;').close()
+        changed_settings.clear()
+
+
+    def _converters(self, columns) -> list:
+        """Returns a function for each column that converts its CSV field to the value
+        that's stored, translating codes to IDs for the columns that refer to them"""
+        converters = []
+        for column, field, converter in columns:
+            if isinstance(converter, str):
+                parent, optional = converter.rstrip('?'), converter.endswith('?')
+                converter = self._key_converter(self._keys_of(parent), optional)
+            converters.append(converter)
+        return converters
+
+
+    def _key_converter(self, keys: dict, optional: bool):
+        """Returns a function that converts a code to the ID it belongs to"""
+        def convert(value):
+            if optional and value == '':
+                return None
+            return keys[value]
+
+        return convert
+
+
+    def _keys_of(self, table: str) -> dict:
+        """Returns a dictionary mapping the key of each row of a table to its ID"""
+        if table not in self._keys:
+            key_column, columns = _TABLES[table]
+            id_column = columns[0][0]
+            cursor = self._connection.execute(f'SELECT {key_column}, {id_column} FROM {table} ;')
+            self._keys[table] = dict(cursor.fetchall())
+            cursor.close()
+        return self._keys[table]
+
+
+    def _import_file(self, table: str, path: Path) -> tuple[int, int]:
+        """Loads one CSV file into a table in a single transaction, returning the number
+        of rows that were loaded and rejected"""
+        key_column, columns = _TABLES[table]
+        converters = self._converters(columns)
+        fields = [field for column, field, converter in columns]
+        statement = f"""
+            INSERT OR REPLACE INTO {table} ({', '.join(column for column, *_ in columns)})
+            VALUES ({', '.join('?' for _ in columns)}) ;
+            """
+
+        loaded = 0
+        rejected = 0
+        batch = []
+
+        with open(path, newline = '', encoding = 'utf-8') as file:
+            if table in _UNKEYED_TABLES:
+                self._connection.execute(f'DELETE FROM {table} ;').close()
+
+            for row in csv.DictReader(file):
+                try:
+                    batch.append(tuple(
+                        convert(row[field]) for field, convert in zip(fields, converters)))
+                except (KeyError, ValueError):
+                    rejected += 1
+                    continue
+
+                if len(batch) >= self._batch_size:
+                    self._connection.executemany(statement, batch).close()
+                    loaded += len(batch)
+                    batch = []
+                    if self._progress:
+                        self._progress(table, loaded)
+
+            if batch:
+                self._connection.executemany(statement, batch).close()
+                loaded += len(batch)
+                if self._progress:
+                    self._progress(table, loaded)
+
+        self._connection.commit()
+        self._keys.pop(table, None)
+        return loaded, rejected
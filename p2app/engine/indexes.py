@@ -0,0 +1,107 @@
+# p2app/engine/indexes.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Provisioning of the secondary indexes that the engine's searches and the
+# database's foreign key checks rely on.  The schema only declares unique
+# constraints on the code columns, so these are created when a database is
+# opened if they aren't already there.
+
+from collections import namedtuple
+import sqlite3
+from .schema import schema_names
+
+
+
+IndexReport = namedtuple('IndexReport', ['created', 'existing', 'skipped'])
+
+IndexReport.__annotations__ = {
+    'created': list[str],
+    'existing': list[str],
+    'skipped': list[str]
+}
+
+
+# Each secondary index as (index name, table, indexed columns)
+SECONDARY_INDEXES = (
+    ('continent_name_index', 'continent', ('name',)),
+    ('country_name_index', 'country', ('name',)),
+    ('country_continent_id_index', 'country', ('continent_id',)),
+    ('region_name_index', 'region', ('name',)),
+    ('region_local_code_index', 'region', ('local_code',)),
+    ('region_country_id_index', 'region', ('country_id',)),
+    ('region_continent_id_index', 'region', ('continent_id',)),
+    ('airport_name_index', 'airport', ('name',)),
+    ('airport_country_id_index', 'airport', ('country_id',)),
+    ('airport_region_id_index', 'airport', ('region_id',)),
+    ('runway_airport_index', 'runway', ('airport_id', 'closed', 'lighted', 'length_ft')),
+    ('runway_length_index', 'runway', ('closed', 'lighted', 'length_ft')),
+    ('runway_width_index', 'runway', ('closed', 'lighted', 'width_ft')),
+    ('runway_surface_index', 'runway', ('surface', 'closed', 'lighted', 'length_ft')),
+    ('navigation_aid_id_index', 'navigation_aid', ('navigation_aid_id',))
+)
+
+
+
+class IndexManager:
+    """Creates any of a set of secondary indexes that are missing from a database"""
+
+    def __init__(self, connection, indexes = SECONDARY_INDEXES):
+        """Initializes the index manager for an open connection"""
+        self._connection = connection
+        self._indexes = indexes
+
+
+    def report(self) -> IndexReport:
+        """Returns a report of which indexes already exist, without creating any; the
+        ones that are missing are reported as skipped"""
+        indexes = schema_names(self._connection, 'index')
+        report = IndexReport([], [], [])
+        for name, table, columns in self._indexes:
+            (report.existing if name in indexes else report.skipped).append(name)
+        return report
+
+
+    def provision(self, analyze: bool = False) -> IndexReport:
+        """Creates every missing index and returns a report of what was created,
+        what already existed, and what was skipped because its table is missing
+        or the database can't be written to. If analyze is true and anything was
+        created, the query planner's statistics are refreshed afterward."""
+        tables = schema_names(self._connection, 'table')
+        indexes = schema_names(self._connection, 'index')
+        report = IndexReport([], [], [])
+
+        for name, table, columns in self._indexes:
+            if name in indexes:
+                report.existing.append(name)
+            elif table not in tables:
+                report.skipped.append(name)
+            else:
+                try:
+                    self._connection.execute(f"""
+                        CREATE INDEX IF NOT EXISTS {name}
+                        ON {table} ({', '.join(columns)}) ;
+                        """).close()
+                    report.created.append(name)
+                except sqlite3.OperationalError:
+                    report.skipped.append(name)
+
+        if report.created:
+            if analyze:
+                self._connection.execute('ANALYZE ;').close()
+            self._connection.commit()
+
+        return report
+
+
+    def drop(self) -> list[str]:
+        """Drops every one of the manager's indexes that exists, returning their names"""
+        indexes = schema_names(self._connection, 'index')
+        dropped = []
+        for name, table, columns in self._indexes:
+            if name in indexes:
+                self._connection.execute(f'DROP INDEX {name} ;').close()
+                dropped.append(name)
+        self._connection.commit()
+        return dropped
@@ -8,8 +8,22 @@
 # This is the outermost layer of the part of the program that you'll need to build,
 # which means that YOU WILL DEFINITELY NEED TO MAKE CHANGES TO THIS FILE.
 
+from contextlib import closing
+import sqlite3
 from p2app.events import *
 from .database import Database
+from .dispatch import DispatchTable, handles
+from .record_cache import RecordCache
+
+
+# The event that carries each page of results, by the table that was searched
+_SEARCH_PAGE_EVENTS = {
+    'continent': ContinentSearchPageEvent,
+    'country': CountrySearchPageEvent,
+    'region': RegionSearchPageEvent,
+    'airport': AirportSearchPageEvent
+}
+
 
 class Engine:
     """An object that represents the application's engine, whose main role is to
@@ -18,59 +32,325 @@ class Engine:
     unaware of any details of how the engine is implemented.
     """
 
-    def __init__(self):
-        """Initializes the engine"""
+    def __init__(self, cache_capacities: dict[str, int] | None = None):
+        """Initializes the engine, with cache_capacities overriding the number of
+        loaded records of each entity that are cached"""
         self._database = None
-        pass
+        self._record_cache = RecordCache(cache_capacities)
+        self._dispatch = DispatchTable()
+        self._dispatch.register_marked(self)
+
+
+    def register_handler(self, event_type, handler) -> None:
+        """Registers a handler for an event type at runtime. The handler is called
+        with the event and must return an iterable of result events."""
+        self._dispatch.register(event_type, handler)
+
+
+    def record_cache_stats(self):
+        """Returns the counters of the cache of loaded records, by entity"""
+        return self._record_cache.stats()
+
+
+    def interrupt(self) -> None:
+        """Interrupts whatever query the engine is running, from another thread, so
+        that the event it's processing fails instead of running to the end"""
+        if self._database is not None:
+            self._database.interrupt()
 
 
     def process_event(self, event):
         """A generator function that processes one event sent from the user interface,
         yielding zero or more events in response."""
+        handler = self._dispatch.resolve(type(event))
+        if handler is None:
+            return
         try :
-            if isinstance(event, QuitInitiatedEvent):
-                yield EndApplicationEvent()
-            if isinstance(event, OpenDatabaseEvent):
-                yield from self.open_database(event.path())
-            if isinstance(event, CloseDatabaseEvent):
-                self._database.close()
-                yield DatabaseClosedEvent()
-            if isinstance(event, StartContinentSearchEvent):
-                yield from self.search_continent(event.continent_code(), event.name())
-            if isinstance(event, LoadContinentEvent):
-                continent = self._database.search_continent_by_id(event.continent_id())
-                yield ContinentLoadedEvent(continent)
-            if isinstance(event,SaveNewContinentEvent):
-                yield from self.save_new_continent(event.continent())
-            if isinstance(event, SaveContinentEvent):
-                yield from self.save_continent(event.continent())
-            if isinstance(event, StartCountrySearchEvent):
-                yield from self.search_country(event.country_code(), event.name())
-            if isinstance(event, LoadCountryEvent):
-                country = self._database.search_country_by_id(event.country_id())
-                yield CountryLoadedEvent(country)
-            if isinstance(event, SaveNewCountryEvent):
-                yield from self.save_new_country(event.country())
-            if isinstance(event, SaveCountryEvent):
-                yield from self.save_country(event.country())
-            if isinstance(event, StartRegionSearchEvent):
-                yield from self.search_region(event.region_code(), event.local_code(), event.name())
-            if isinstance(event, LoadRegionEvent):
-                region = self._database.search_region_by_id(event.region_id())
-                yield RegionLoadedEvent(region)
-            if isinstance(event, SaveNewRegionEvent):
-                yield from self.save_new_region(event.region())
-            if isinstance(event, SaveRegionEvent):
-                yield from self.save_region(event.region())
+            yield from handler(event)
         except Exception as e :
             yield ErrorEvent("An Error Occurred.")
 
 
-    def open_database(self, path):
-        """ A generator function that opens the database and generates
-         events based on the success of opening the database"""
-        self._database = Database(path)
-        self._database.open()
+    @handles(QuitInitiatedEvent)
+    def _on_quit_initiated(self, event):
+        """Handles a QuitInitiatedEvent"""
+        yield EndApplicationEvent()
+
+
+    @handles(OpenDatabaseEvent)
+    def _on_open_database(self, event):
+        """Handles a OpenDatabaseEvent"""
+        yield from self.open_database(event.path(), event.read_only())
+
+
+    @handles(CloseDatabaseEvent)
+    def _on_close_database(self, event):
+        """Handles a CloseDatabaseEvent"""
+        self._database.close()
+        self._record_cache.clear()
+        yield DatabaseClosedEvent()
+
+
+    @handles(StartContinentSearchEvent)
+    def _on_start_continent_search(self, event):
+        """Handles a StartContinentSearchEvent"""
+        yield from self.search_continent(event.continent_code(), event.name())
+
+
+    @handles(LoadContinentEvent)
+    def _on_load_continent(self, event):
+        """Handles a LoadContinentEvent"""
+        continent = self._record_cache.load('continent', event.continent_id(), self._database.search_continent_by_id)
+        yield ContinentLoadedEvent(continent)
+
+
+    @handles(SaveNewContinentEvent)
+    def _on_save_new_continent(self, event):
+        """Handles a SaveNewContinentEvent"""
+        yield from self.save_new_continent(event.continent())
+
+
+    @handles(SaveContinentEvent)
+    def _on_save_continent(self, event):
+        """Handles a SaveContinentEvent"""
+        yield from self.save_continent(event.continent())
+
+
+    @handles(StartCountrySearchEvent)
+    def _on_start_country_search(self, event):
+        """Handles a StartCountrySearchEvent"""
+        yield from self.search_country(event.country_code(), event.name())
+
+
+    @handles(LoadCountryEvent)
+    def _on_load_country(self, event):
+        """Handles a LoadCountryEvent"""
+        country = self._record_cache.load('country', event.country_id(), self._database.search_country_by_id)
+        yield CountryLoadedEvent(country)
+
+
+    @handles(SaveNewCountryEvent)
+    def _on_save_new_country(self, event):
+        """Handles a SaveNewCountryEvent"""
+        yield from self.save_new_country(event.country())
+
+
+    @handles(SaveCountryEvent)
+    def _on_save_country(self, event):
+        """Handles a SaveCountryEvent"""
+        yield from self.save_country(event.country())
+
+
+    @handles(StartRegionSearchEvent)
+    def _on_start_region_search(self, event):
+        """Handles a StartRegionSearchEvent"""
+        yield from self.search_region(event.region_code(), event.local_code(), event.name())
+
+
+    @handles(LoadRegionEvent)
+    def _on_load_region(self, event):
+        """Handles a LoadRegionEvent"""
+        region = self._record_cache.load('region', event.region_id(), self._database.search_region_by_id)
+        yield RegionLoadedEvent(region)
+
+
+    @handles(SaveNewRegionEvent)
+    def _on_save_new_region(self, event):
+        """Handles a SaveNewRegionEvent"""
+        yield from self.save_new_region(event.region())
+
+
+    @handles(SaveRegionEvent)
+    def _on_save_region(self, event):
+        """Handles a SaveRegionEvent"""
+        yield from self.save_region(event.region())
+
+
+    @handles(StartAirportSearchEvent)
+    def _on_start_airport_search(self, event):
+        """Handles a StartAirportSearchEvent"""
+        yield from self.search_airport(event.airport_ident(), event.name())
+
+
+    @handles(LoadAirportEvent)
+    def _on_load_airport(self, event):
+        """Handles a LoadAirportEvent"""
+        airport = self._record_cache.load('airport', event.airport_id(), self._database.search_airport_by_id)
+        yield AirportLoadedEvent(airport)
+
+
+    @handles(SaveNewAirportEvent)
+    def _on_save_new_airport(self, event):
+        """Handles a SaveNewAirportEvent"""
+        yield from self.save_new_airport(event.airport())
+
+
+    @handles(SaveAirportEvent)
+    def _on_save_airport(self, event):
+        """Handles a SaveAirportEvent"""
+        yield from self.save_airport(event.airport())
+
+
+    @handles(ResolveAirportCodeEvent)
+    def _on_resolve_airport_code(self, event):
+        """Handles a ResolveAirportCodeEvent"""
+        yield AirportCodeResolvedEvent(event.code(), self._database.resolve_airport_code(event.code()))
+
+
+    @handles(StartAirportBoxSearchEvent)
+    def _on_start_airport_box_search(self, event):
+        """Handles a StartAirportBoxSearchEvent"""
+        for airport in self._database.search_airports_in_box(
+                event.min_latitude(), event.max_latitude(), event.min_longitude(), event.max_longitude()):
+            yield AirportSearchResultEvent(airport)
+
+
+    @handles(StartNearbyAirportSearchEvent)
+    def _on_start_nearby_airport_search(self, event):
+        """Handles a StartNearbyAirportSearchEvent"""
+        for airport, distance_km in self._database.search_airports_near(
+                event.latitude(), event.longitude(), event.radius_km()):
+            yield NearbyAirportResultEvent(airport, distance_km)
+
+
+    @handles(StartNearestAirportSearchEvent)
+    def _on_start_nearest_airport_search(self, event):
+        """Handles a StartNearestAirportSearchEvent"""
+        for airport, distance_km in self._database.search_nearest_airports(
+                event.latitude(), event.longitude(), event.count()):
+            yield NearbyAirportResultEvent(airport, distance_km)
+
+
+    @handles(LoadCountryCountsEvent)
+    def _on_load_country_counts(self, event):
+        """Handles a LoadCountryCountsEvent"""
+        yield CountryCountsLoadedEvent(event.country_id(), self._database.country_counts(event.country_id()))
+
+
+    @handles(LoadContinentCountsEvent)
+    def _on_load_continent_counts(self, event):
+        """Handles a LoadContinentCountsEvent"""
+        yield ContinentCountsLoadedEvent(
+            event.continent_id(), self._database.continent_counts(event.continent_id()))
+
+
+    @handles(StartFrequencySearchEvent)
+    def _on_start_frequency_search(self, event):
+        """Handles a StartFrequencySearchEvent"""
+        for query, frequencies in zip(event.queries(), self._database.search_frequencies(event.queries())):
+            yield FrequencySearchResultEvent(query, frequencies)
+
+
+    @handles(StartNearbyNavigationAidSearchEvent)
+    def _on_start_nearby_navigation_aid_search(self, event):
+        """Handles a StartNearbyNavigationAidSearchEvent"""
+        for navigation_aid, distance_km in self._database.search_navigation_aids_near(
+                event.latitude(), event.longitude(), event.radius_km()):
+            yield NearbyNavigationAidResultEvent(navigation_aid, distance_km)
+
+
+    @handles(StartFrequencyConflictSearchEvent)
+    def _on_start_frequency_conflict_search(self, event):
+        """Handles a StartFrequencyConflictSearchEvent"""
+        for conflict in self._database.find_frequency_conflicts(
+                event.max_distance_km(), event.frequency_tolerance_khz()):
+            yield FrequencyConflictEvent(conflict)
+
+
+    @handles(StartRunwaySearchEvent)
+    def _on_start_runway_search(self, event):
+        """Handles a StartRunwaySearchEvent"""
+        for airport, summary in self._database.search_runways(event.criteria()):
+            yield RunwaySearchResultEvent(airport, summary)
+
+
+    @handles(StartPagedContinentSearchEvent)
+    def _on_start_paged_continent_search(self, event):
+        """Handles a StartPagedContinentSearchEvent"""
+        criteria = (('continent_code', event.continent_code()), ('name', event.name()))
+        yield from self.search_page('continent', criteria, event.page_size())
+
+
+    @handles(StartPagedCountrySearchEvent)
+    def _on_start_paged_country_search(self, event):
+        """Handles a StartPagedCountrySearchEvent"""
+        criteria = (('country_code', event.country_code()), ('name', event.name()))
+        yield from self.search_page('country', criteria, event.page_size())
+
+
+    @handles(StartPagedRegionSearchEvent)
+    def _on_start_paged_region_search(self, event):
+        """Handles a StartPagedRegionSearchEvent"""
+        criteria = (('region_code', event.region_code()), ('local_code', event.local_code()),
+                    ('name', event.name()))
+        yield from self.search_page('region', criteria, event.page_size())
+
+
+    @handles(StartPagedAirportSearchEvent)
+    def _on_start_paged_airport_search(self, event):
+        """Handles a StartPagedAirportSearchEvent"""
+        criteria = (('airport_ident', event.airport_ident()), ('name', event.name()))
+        yield from self.search_page('airport', criteria, event.page_size())
+
+
+    @handles(FetchNextPageEvent)
+    def _on_fetch_next_page(self, event):
+        """Handles a FetchNextPageEvent"""
+        token = event.token()
+        yield from self.search_page(
+            token.entity, token.criteria, token.page_size, token.after_id, token.total_count)
+
+
+    @handles(StartTextSearchEvent)
+    def _on_start_text_search(self, event):
+        """Handles a StartTextSearchEvent"""
+        for match in self._database.search_text(event.text(), event.entities()):
+            yield TextSearchResultEvent(match)
+
+
+    @handles(BeginTransactionEvent)
+    def _on_begin_transaction(self, event):
+        """Handles a BeginTransactionEvent"""
+        error = self._database.begin_transaction()
+        if error is None:
+            yield TransactionBegunEvent()
+        else:
+            yield TransactionFailedEvent("Begin Transaction Failed.\n" + error)
+
+
+    @handles(CommitTransactionEvent)
+    def _on_commit_transaction(self, event):
+        """Handles a CommitTransactionEvent"""
+        error = self._database.commit_transaction()
+        if error is None:
+            yield TransactionCommittedEvent()
+        else:
+            self._record_cache.clear()
+            yield TransactionFailedEvent("Commit Transaction Failed.\n" + error)
+
+
+    @handles(RollbackTransactionEvent)
+    def _on_rollback_transaction(self, event):
+        """Handles a RollbackTransactionEvent"""
+        error = self._database.rollback_transaction()
+        self._record_cache.clear()
+        if error is None:
+            yield TransactionRolledBackEvent()
+        else:
+            yield TransactionFailedEvent("Rollback Transaction Failed.\n" + error)
+
+
+    def open_database(self, path, read_only = False):
+        """ A generator function that opens the database (read-only, if read_only
+         is true) and generates events based on the success of opening the database"""
+        self._record_cache.clear()
+        self._database = Database(path, read_only = read_only)
+        try:
+            self._database.open()
+        except sqlite3.OperationalError as e:
+            self._database.close()
+            yield DatabaseOpenFailedEvent("The database could not be opened.\n" + e.__str__())
+            return
         if self._database.check_database_correctness():
             yield DatabaseOpenedEvent(path)
         else:
@@ -80,19 +360,39 @@ class Engine:
     def search_continent(self, continent_code, name):
         """ Generator function that searches for continents in database
          and generates events based on the search"""
-        searched_continents = self._database.search_continent(continent_code, name)
-        if searched_continents is not None:
+        with closing(self._database.search_continent(continent_code, name)) as searched_continents:
             for continent in searched_continents:
                 yield ContinentSearchResultEvent(continent)
 
 
+    def search_page(self, table, criteria, page_size, after_id = None, total_count = None):
+        """ Generator function that searches one page of a table in the database
+         and generates a search page event holding it, along with a token for the
+         next page if there is one. The matches are only counted for the first page."""
+        if type(page_size) is not int or page_size < 1:
+            yield ErrorEvent("Search Failed.\nPage size must be a whole number of at least 1.")
+            return
+        criteria = tuple((column, value) for column, value in criteria if value is not None)
+        if total_count is None:
+            total_count = self._database.count_matches(table, criteria)
+        records = self._database.search_page(table, criteria, page_size + 1, after_id)
+        if len(records) > page_size:
+            records = records[:page_size]
+            next_page = SearchPageToken(table, criteria, page_size, records[-1][0], total_count)
+        else:
+            next_page = None
+        yield _SEARCH_PAGE_EVENTS[table](records, total_count, next_page)
+
+
     def save_new_continent(self, continent: Continent):
         """ Generator function that saves a new continent in the database
          and generates events based on the success or failure of the process"""
         continent_id, continent_code, name = continent
         error = self._database.save_new_continent(continent)
         if error is None:
-            continent = next(self._database.search_continent(continent_code, name))
+            with closing(self._database.search_continent(continent_code, name)) as continents:
+                continent = next(continents)
+            self._record_cache.invalidate('continent', continent.continent_id)
             yield ContinentSavedEvent(continent)
         else:
             yield SaveContinentFailedEvent("Save New Continent Failed.\n" + error)
@@ -103,6 +403,7 @@ class Engine:
          and generates events based on the success or failure of the process"""
         error = self._database.update_continent(continent)
         if error is None:
+            self._record_cache.invalidate('continent', continent.continent_id)
             yield ContinentSavedEvent(continent)
         else:
             yield SaveContinentFailedEvent("Save Continent Failed.\n" + error)
@@ -111,8 +412,7 @@ class Engine:
     def search_country(self,country_code, name):
         """ Generator function that searches for countries in database
          and generates events based on the search"""
-        searched_countries = self._database.search_country(country_code, name)
-        if searched_countries is not None:
+        with closing(self._database.search_country(country_code, name)) as searched_countries:
             for country in searched_countries:
                 yield CountrySearchResultEvent(country)
 
@@ -122,7 +422,9 @@ class Engine:
          and generates events based on the success or failure of the process"""
         error = self._database.save_new_country(country)
         if error is None:
-            created_country = next(self._database.search_country(country.country_code, country.name))
+            with closing(self._database.search_country(country.country_code, country.name)) as countries:
+                created_country = next(countries)
+            self._record_cache.invalidate('country', created_country.country_id)
             yield CountrySavedEvent(created_country)
         else:
             yield SaveCountryFailedEvent("Save New Country Failed.\n" + error)
@@ -133,6 +435,7 @@ class Engine:
         and generates events based on the success or failure of the process"""
         error = self._database.update_country(country)
         if error is None:
+            self._record_cache.invalidate('country', country.country_id)
             yield CountrySavedEvent(country)
         else:
             yield SaveCountryFailedEvent("Save Continent Failed.\n" + error)
@@ -141,8 +444,7 @@ class Engine:
     def search_region(self, region_code, local_code, name):
         """ Generator function that searches for regions in database
          and generates events based on the search"""
-        searched_regions = self._database.search_region(region_code, local_code, name)
-        if searched_regions is not None:
+        with closing(self._database.search_region(region_code, local_code, name)) as searched_regions:
             for region in searched_regions:
                 yield RegionSearchResultEvent(region)
 
@@ -152,7 +454,10 @@ class Engine:
         and generates events based on the success or failure of the process"""
         error = self._database.save_new_region(region)
         if error is None:
-            created_region = next(self._database.search_region(region.region_code, region.local_code, region.name))
+            with closing(self._database.search_region(
+                    region.region_code, region.local_code, region.name)) as regions:
+                created_region = next(regions)
+            self._record_cache.invalidate('region', created_region.region_id)
             yield RegionSavedEvent(created_region)
         else:
             yield SaveRegionFailedEvent("Save New Region Failed.\n" + error)
@@ -163,6 +468,39 @@ class Engine:
             and generates events based on the success or failure of the process"""
         error = self._database.update_region(region)
         if error is None:
+            self._record_cache.invalidate('region', region.region_id)
             yield RegionSavedEvent(region)
         else:
-            yield SaveRegionFailedEvent("Save Region Failed.\n" + error)
\ No newline at end of file
+            yield SaveRegionFailedEvent("Save Region Failed.\n" + error)
+
+
+    def search_airport(self, airport_ident, name):
+        """ Generator function that searches for airports in database
+         and generates events based on the search"""
+        with closing(self._database.search_airport(airport_ident, name)) as searched_airports:
+            for airport in searched_airports:
+                yield AirportSearchResultEvent(airport)
+
+
+    def save_new_airport(self, airport: Airport):
+        """ Generator function that saves a new airport in the database
+        and generates events based on the success or failure of the process"""
+        error = self._database.save_new_airport(airport)
+        if error is None:
+            with closing(self._database.search_airport(airport.airport_ident, None)) as airports:
+                created_airport = next(airports)
+            self._record_cache.invalidate('airport', created_airport.airport_id)
+            yield AirportSavedEvent(created_airport)
+        else:
+            yield SaveAirportFailedEvent("Save New Airport Failed.\n" + error)
+
+
+    def save_airport(self, airport: Airport):
+        """ Generator function that updates an existing airport in the database
+            and generates events based on the success or failure of the process"""
+        error = self._database.update_airport(airport)
+        if error is None:
+            self._record_cache.invalidate('airport', airport.airport_id)
+            yield AirportSavedEvent(airport)
+        else:
+            yield SaveAirportFailedEvent("Save Airport Failed.\n" + error)
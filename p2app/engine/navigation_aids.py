@@ -0,0 +1,79 @@
+# p2app/engine/navigation_aids.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Detection of frequency conflicts between navigation aids: pairs of navaids whose
+# frequencies are within some tolerance of each other, and that are within some
+# distance of each other.
+#
+# Comparing every navaid against every other would take time proportional to the
+# square of their number, so the navaids are hashed into a grid instead, and each
+# one is only compared against the navaids in its own and the adjacent cells.  A
+# cell spans both a band of frequencies and a cube of space.  Locations are turned
+# into points on a unit sphere, so that the grid's cubes are the same size
+# everywhere, and there's no special case for the poles or the antimeridian; a
+# cube's side is the straight-line (chord) distance matching the maximum distance
+# along the Earth's surface, so two navaids close enough to conflict are always in
+# the same or adjacent cubes.
+
+import itertools
+import math
+from p2app.events import FrequencyConflict
+from .spatial import EARTH_RADIUS_KM, great_circle_km
+
+
+
+# The offsets of a cell's neighbors (and itself) along each of its three spatial dimensions
+_SPATIAL_NEIGHBORS = tuple(itertools.product((-1, 0, 1), repeat = 3))
+
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+
+def find_frequency_conflicts(navigation_aids, max_distance_km: float,
+                             frequency_tolerance_khz: int = 0) -> list[FrequencyConflict]:
+    """Returns a FrequencyConflict for each pair of navigation aids whose frequencies
+    differ by at most frequency_tolerance_khz and that are at most max_distance_km
+    apart, nearest pair first"""
+    if max_distance_km < 0 or frequency_tolerance_khz < 0:
+        raise ValueError('max_distance_km and frequency_tolerance_khz cannot be negative')
+
+    angle = min(max_distance_km / EARTH_RADIUS_KM, math.pi)
+    cube_side = max(2 * math.sin(angle / 2), 1e-9)
+    band_width = max(frequency_tolerance_khz, 1)
+
+    # Only navaids with the very same frequency conflict when there's no tolerance,
+    # so there's no need to look in the adjacent bands
+    band_offsets = (-1, 0, 1) if frequency_tolerance_khz > 0 else (0,)
+    neighbors = [(band_offset, *offsets) for band_offset in band_offsets for offsets in _SPATIAL_NEIGHBORS]
+
+    cells = {}
+    conflicts = []
+    for navigation_aid in navigation_aids:
+        x, y, z = _unit_vector(navigation_aid.latitude_deg, navigation_aid.longitude_deg)
+        cell = (navigation_aid.frequency_khz // band_width,
+                math.floor(x / cube_side), math.floor(y / cube_side), math.floor(z / cube_side))
+
+        for offsets in neighbors:
+            neighbor = tuple(c + offset for c, offset in zip(cell, offsets))
+            for other in cells.get(neighbor, ()):
+                difference = abs(navigation_aid.frequency_khz - other.frequency_khz)
+                if difference > frequency_tolerance_khz:
+                    continue
+                distance = great_circle_km(
+                    other.latitude_deg, other.longitude_deg,
+                    navigation_aid.latitude_deg, navigation_aid.longitude_deg)
+                if distance <= max_distance_km:
+                    conflicts.append(FrequencyConflict(other, navigation_aid, distance, difference))
+
+        cells.setdefault(cell, []).append(navigation_aid)
+
+    conflicts.sort(key = lambda conflict: (conflict.distance_km, conflict.navigation_aid1.navigation_aid_id,
+                                           conflict.navigation_aid2.navigation_aid_id))
+    return conflicts
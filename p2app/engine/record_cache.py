@@ -0,0 +1,125 @@
+# p2app/engine/record_cache.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Size-bounded caches of recently loaded records, so that loading the same few
+# records again and again (e.g., when a user flips between search results) doesn't
+# require a query each time.  When a cache is full, the record that was used least
+# recently is evicted to make room.
+
+from collections import namedtuple, OrderedDict
+
+
+
+# The capacity of each entity's cache, unless the engine is told otherwise
+DEFAULT_CAPACITIES = {
+    'continent': 64,
+    'country': 256,
+    'region': 1024,
+    'airport': 1024
+}
+
+
+
+class LRUStats(namedtuple('LRUStats', ['hits', 'misses', 'evictions', 'size', 'capacity'])):
+    """The counters of an LRUCache at some moment"""
+
+    __slots__ = ()
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of lookups that were hits, or 0.0 if there were none"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+
+class LRUCache:
+    """A mapping of keys to values that holds at most a fixed number of them,
+    evicting the least recently used one when it's full"""
+
+    def __init__(self, capacity: int):
+        """Initializes an empty cache that holds at most capacity values"""
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self._capacity = capacity
+        self._values = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+
+    def get(self, key):
+        """Returns the value of a key, marking it as most recently used, or None if
+        the key isn't in the cache"""
+        try:
+            self._values.move_to_end(key)
+        except KeyError:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return self._values[key]
+
+
+    def put(self, key, value) -> None:
+        """Stores the value of a key, evicting the least recently used value if the
+        cache is full"""
+        self._values[key] = value
+        self._values.move_to_end(key)
+        if len(self._values) > self._capacity:
+            self._values.popitem(last = False)
+            self._evictions += 1
+
+
+    def invalidate(self, key) -> None:
+        """Removes a key from the cache, if it's there"""
+        self._values.pop(key, None)
+
+
+    def clear(self) -> None:
+        """Removes every key from the cache, keeping its counters"""
+        self._values.clear()
+
+
+    def stats(self) -> LRUStats:
+        """Returns the cache's counters"""
+        return LRUStats(self._hits, self._misses, self._evictions, len(self._values), self._capacity)
+
+
+
+class RecordCache:
+    """One LRUCache per entity, each keyed by record ID"""
+
+    def __init__(self, capacities: dict[str, int] | None = None):
+        """Initializes the caches, with capacities overriding the default capacity
+        of any entities it contains"""
+        capacities = DEFAULT_CAPACITIES | (capacities or {})
+        self._caches = {entity: LRUCache(capacity) for entity, capacity in capacities.items()}
+
+
+    def load(self, entity: str, record_id: int, loader):
+        """Returns the cached record of an entity with an ID, calling loader with the ID
+        to load it and caching the result if it isn't cached"""
+        cache = self._caches[entity]
+        record = cache.get(record_id)
+        if record is None:
+            record = loader(record_id)
+            cache.put(record_id, record)
+        return record
+
+
+    def invalidate(self, entity: str, record_id: int) -> None:
+        """Removes the record of an entity with an ID from its cache"""
+        self._caches[entity].invalidate(record_id)
+
+
+    def clear(self) -> None:
+        """Removes every record from every cache"""
+        for cache in self._caches.values():
+            cache.clear()
+
+
+    def stats(self) -> dict[str, LRUStats]:
+        """Returns the counters of each entity's cache"""
+        return {entity: cache.stats() for entity, cache in self._caches.items()}
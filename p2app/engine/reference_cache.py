@@ -0,0 +1,113 @@
+# p2app/engine/reference_cache.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# An in-memory copy of the continent and country tables.  They are small and
+# rarely change, so the database loads them completely when it's opened, serves
+# lookups of them from memory, and writes its changes to them through to the copy
+# once they've been committed.
+
+from collections import namedtuple
+from p2app.events import Continent, Country
+
+
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses'])
+
+CacheStats.__annotations__ = {
+    'hits': int,
+    'misses': int
+}
+
+
+
+class ReferenceCache:
+    """Holds every continent and country, indexed by both their IDs and codes"""
+
+    def __init__(self):
+        """Initializes an empty cache"""
+        self._continents_by_id = {}
+        self._continents_by_code = {}
+        self._countries_by_id = {}
+        self._countries_by_code = {}
+        self._hits = 0
+        self._misses = 0
+
+
+    def load(self, connection) -> None:
+        """Replaces the cache's contents with every continent and country in a database"""
+        self.__init__()
+
+        cursor = connection.execute('SELECT * FROM continent ;')
+        for row in cursor.fetchall():
+            self.put_continent(Continent(*row))
+        cursor.close()
+
+        cursor = connection.execute('SELECT * FROM country ;')
+        for row in cursor.fetchall():
+            self.put_country(Country(*row))
+        cursor.close()
+
+
+    def stats(self) -> CacheStats:
+        """Returns how many lookups were served from the cache and how many weren't"""
+        return CacheStats(self._hits, self._misses)
+
+
+    def _lookup(self, records: dict, key):
+        """Looks up a key in one of the cache's dictionaries, counting the hit or miss"""
+        record = records.get(key)
+        if record is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return record
+
+
+    def continent_by_id(self, continent_id: int) -> Continent | None:
+        """Returns the continent with an ID, or None if it isn't cached"""
+        return self._lookup(self._continents_by_id, continent_id)
+
+
+    def continent_by_code(self, continent_code: str) -> Continent | None:
+        """Returns the continent with a code, or None if it isn't cached"""
+        return self._lookup(self._continents_by_code, continent_code)
+
+
+    def has_continent(self, continent_id: int) -> bool:
+        """Returns whether a continent with an ID is cached"""
+        return continent_id in self._continents_by_id
+
+
+    def put_continent(self, continent: Continent) -> None:
+        """Adds a continent to the cache, replacing its previous version if there is one"""
+        previous = self._continents_by_id.get(continent.continent_id)
+        if previous is not None:
+            del self._continents_by_code[previous.continent_code]
+        self._continents_by_id[continent.continent_id] = continent
+        self._continents_by_code[continent.continent_code] = continent
+
+
+    def country_by_id(self, country_id: int) -> Country | None:
+        """Returns the country with an ID, or None if it isn't cached"""
+        return self._lookup(self._countries_by_id, country_id)
+
+
+    def country_by_code(self, country_code: str) -> Country | None:
+        """Returns the country with a code, or None if it isn't cached"""
+        return self._lookup(self._countries_by_code, country_code)
+
+
+    def has_country(self, country_id: int) -> bool:
+        """Returns whether a country with an ID is cached"""
+        return country_id in self._countries_by_id
+
+
+    def put_country(self, country: Country) -> None:
+        """Adds a country to the cache, replacing its previous version if there is one"""
+        previous = self._countries_by_id.get(country.country_id)
+        if previous is not None:
+            del self._countries_by_code[previous.country_code]
+        self._countries_by_id[country.country_id] = country
+        self._countries_by_code[country.country_code] = country
@@ -0,0 +1,119 @@
+# p2app/engine/runways.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Searches of airports by their runways, filtering runways on ranges of length and
+# width, surface, and whether they're lighted or closed, and aggregating the
+# matching runways per airport.
+#
+# Every search is meant to be answered from an index rather than a scan of the
+# runway table.  The runway indexes in indexes.SECONDARY_INDEXES lead with closed
+# and lighted, then end with the column a range is searched on, so the WHERE clause
+# always constrains closed and lighted, using IN (0, 1) for either one that isn't
+# part of the search; SQLite then probes the index once per combination of their
+# values.  Searches within a country start from the airports in that country and
+# find their runways by airport_id instead.
+#
+# The results are grouped and ordered by a unary plus on airport_id, which stops
+# SQLite from walking the whole runway table in airport_id order to avoid sorting
+# the (much smaller) set of matching runways.
+
+from p2app.events import Airport, RunwayCriteria, RunwaySummary
+
+
+
+_BATCH_SIZE = 256
+
+# Both of the values that a flag column (like lighted or closed) can hold
+_BOTH_FLAGS = (0, 1)
+
+
+
+def _flag_values(flag: bool | None) -> tuple[int, ...]:
+    return _BOTH_FLAGS if flag is None else (int(flag),)
+
+
+
+def runway_where_clause(criteria: RunwayCriteria) -> tuple[str, list]:
+    """Builds the WHERE clause (without the keyword) and its parameters that match
+    runways, joined to their airports, against a RunwayCriteria"""
+    conditions = []
+    parameters = []
+
+    for column, flag in (('closed', criteria.closed), ('lighted', criteria.lighted)):
+        values = _flag_values(flag)
+        conditions.append(f'runway.{column} IN ({", ".join("?" for _ in values)})')
+        parameters.extend(values)
+
+    for column, minimum, maximum in (
+            ('length_ft', criteria.min_length_ft, criteria.max_length_ft),
+            ('width_ft', criteria.min_width_ft, criteria.max_width_ft)):
+        if minimum is not None:
+            conditions.append(f'runway.{column} >= ?')
+            parameters.append(minimum)
+        if maximum is not None:
+            conditions.append(f'runway.{column} <= ?')
+            parameters.append(maximum)
+
+    if criteria.surfaces is not None:
+        surfaces = tuple(criteria.surfaces)
+        conditions.append(f'runway.surface IN ({", ".join("?" for _ in surfaces)})')
+        parameters.extend(surfaces)
+
+    if criteria.country_id is not None:
+        conditions.append('airport.country_id = ?')
+        parameters.append(criteria.country_id)
+
+    return ' AND '.join(conditions), parameters
+
+
+
+class RunwaySearch:
+    """Searches a database's airports by their runways"""
+
+    def __init__(self, connection, batch_size: int = _BATCH_SIZE):
+        """Initializes the search for an open connection, which fetches the results
+        batch_size rows at a time"""
+        self._connection = connection
+        self._batch_size = batch_size
+
+
+    def _statement(self, criteria: RunwayCriteria) -> tuple[str, list]:
+        """Returns the statement that aggregates the runways matching a RunwayCriteria per
+        airport, and its parameters"""
+        where, parameters = runway_where_clause(criteria)
+        statement = f"""
+            SELECT airport.*, COUNT(*), MAX(runway.length_ft), MAX(runway.width_ft),
+                SUM(runway.lighted)
+            FROM runway
+            JOIN airport ON airport.airport_id = runway.airport_id
+            WHERE {where}
+            GROUP BY +runway.airport_id
+            ORDER BY +runway.airport_id ;
+            """
+        return statement, parameters
+
+
+    def search(self, criteria: RunwayCriteria):
+        """Generates an (airport, RunwaySummary) pair for each airport that has a runway
+        matching a RunwayCriteria, ordered by airport ID, summarizing only its matching
+        runways"""
+        statement, parameters = self._statement(criteria)
+        cursor = self._connection.execute(statement, parameters)
+        try:
+            while rows := cursor.fetchmany(self._batch_size):
+                for row in rows:
+                    yield Airport(*row[:-4]), RunwaySummary(*row[-4:])
+        finally:
+            cursor.close()
+
+
+    def query_plan(self, criteria: RunwayCriteria) -> list[str]:
+        """Returns the steps of SQLite's plan for the search of a RunwayCriteria, so
+        that it can be checked to be using indexes rather than scanning tables"""
+        statement, parameters = self._statement(criteria)
+        cursor = self._connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        steps = [detail for *_, detail in cursor.fetchall()]
+        cursor.close()
+        return steps
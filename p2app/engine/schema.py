@@ -0,0 +1,30 @@
+# p2app/engine/schema.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Questions about which tables, indexes and triggers a database has, asked of its
+# sqlite_schema table.  The engine's derived structures (secondary indexes, text
+# search tables, spatial indexes and materialized counts) are created when they're
+# missing, so they all need to ask them.
+
+
+
+def schema_names(connection, *kinds: str) -> set[str]:
+    """Returns the names of every object in the database whose kind is one of kinds
+    ('table', 'index', 'trigger' or 'view')"""
+    placeholders = ', '.join('?' for kind in kinds)
+    cursor = connection.execute(f"""
+        SELECT name
+        FROM sqlite_schema
+        WHERE type IN ({placeholders}) ;
+        """, kinds)
+    names = {name for name, in cursor.fetchall()}
+    cursor.close()
+    return names
+
+
+
+def has_tables(connection, *tables: str) -> bool:
+    """Returns whether the database has every one of the given tables"""
+    return set(tables) <= schema_names(connection, 'table')
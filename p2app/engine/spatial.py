@@ -0,0 +1,199 @@
+# p2app/engine/spatial.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Proximity searches of airports and navigation aids, each backed by an R*Tree,
+# which is SQLite's spatial index.  It holds the location of each row of its table,
+# and triggers keep it in sync with that table.
+#
+# The R*Tree can only answer which rows lie within a box of latitudes and
+# longitudes, so a search within some distance of a point first finds the rows
+# in the smallest box that encloses that distance, then computes the exact
+# great-circle distance of each of them, keeping the ones that are close enough.
+
+import math
+import sqlite3
+from p2app.events import Airport, NavigationAid
+from .schema import has_tables
+
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Half of the Earth's circumference, which is as far apart as two points can be
+_MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+_INITIAL_NEAREST_RADIUS_KM = 50.0
+
+# For each table whose rows have a location: the R*Tree of their locations, the
+# column that identifies them, and the named tuple they become
+SPATIAL_TABLES = {
+    'airport': ('airport_location', 'airport_id', Airport),
+    'navigation_aid': ('navigation_aid_location', 'navigation_aid_id', NavigationAid)
+}
+
+
+
+def great_circle_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Returns the great-circle distance in kilometers between two points, using
+    the haversine formula"""
+    phi1 = math.radians(latitude1)
+    phi2 = math.radians(latitude2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(longitude2 - longitude1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+
+def bounding_boxes(latitude: float, longitude: float, radius_km: float) -> list[tuple]:
+    """Returns the boxes, each as (min latitude, max latitude, min longitude, max longitude),
+    that together enclose every point within radius_km of a point. There are two of them
+    when the boxes cross the antimeridian, and their longitudes span the whole globe when
+    the radius reaches a pole."""
+    angular_radius = radius_km / EARTH_RADIUS_KM
+    delta_latitude = math.degrees(angular_radius)
+    min_latitude = latitude - delta_latitude
+    max_latitude = latitude + delta_latitude
+
+    if min_latitude <= -90.0 or max_latitude >= 90.0 or angular_radius >= math.pi / 2:
+        return [(max(min_latitude, -90.0), min(max_latitude, 90.0), -180.0, 180.0)]
+
+    delta_longitude = math.degrees(
+        math.asin(min(1.0, math.sin(angular_radius) / math.cos(math.radians(latitude)))))
+    min_longitude = longitude - delta_longitude
+    max_longitude = longitude + delta_longitude
+
+    if min_longitude < -180.0:
+        return [(min_latitude, max_latitude, min_longitude + 360.0, 180.0),
+                (min_latitude, max_latitude, -180.0, max_longitude)]
+    elif max_longitude > 180.0:
+        return [(min_latitude, max_latitude, min_longitude, 180.0),
+                (min_latitude, max_latitude, -180.0, max_longitude - 360.0)]
+    else:
+        return [(min_latitude, max_latitude, min_longitude, max_longitude)]
+
+
+
+class SpatialIndex:
+    """Provisions and queries the R*Tree of the locations of one table's rows"""
+
+    def __init__(self, connection, table: str = 'airport'):
+        """Initializes the spatial index of a table (one of SPATIAL_TABLES) for an
+        open connection"""
+        self._connection = connection
+        self._table = table
+        self._location_table, self._id_column, self._record_type = SPATIAL_TABLES[table]
+
+
+    def provision(self) -> bool:
+        """Creates the R*Tree and its sync triggers if they don't exist yet, filling the
+        R*Tree with the location of every row, and returns whether it was created.
+        Nothing is created if the database can't be written to or SQLite was built
+        without the R*Tree module."""
+        if has_tables(self._connection, self._location_table):
+            return False
+
+        location, table, key = self._location_table, self._table, self._id_column
+        try:
+            self._connection.executescript(f"""
+                BEGIN;
+
+                CREATE VIRTUAL TABLE {location}
+                USING rtree({key}, min_latitude, max_latitude, min_longitude, max_longitude);
+
+                CREATE TRIGGER {location}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {location}
+                    VALUES (new.{key}, new.latitude_deg, new.latitude_deg,
+                            new.longitude_deg, new.longitude_deg);
+                END;
+
+                CREATE TRIGGER {location}_delete AFTER DELETE ON {table} BEGIN
+                    DELETE FROM {location} WHERE {key} = old.{key};
+                END;
+
+                CREATE TRIGGER {location}_update
+                AFTER UPDATE OF {key}, latitude_deg, longitude_deg ON {table} BEGIN
+                    DELETE FROM {location} WHERE {key} = old.{key};
+                    INSERT INTO {location}
+                    VALUES (new.{key}, new.latitude_deg, new.latitude_deg,
+                            new.longitude_deg, new.longitude_deg);
+                END;
+
+                INSERT INTO {location}
+                SELECT {key}, latitude_deg, latitude_deg, longitude_deg, longitude_deg
+                FROM {table};
+
+                COMMIT;
+                """)
+        except sqlite3.OperationalError:
+            if self._connection.in_transaction:
+                self._connection.rollback()
+            return False
+
+        return True
+
+
+    def drop(self) -> bool:
+        """Drops the R*Tree and its sync triggers if they exist, returning whether they did"""
+        if not has_tables(self._connection, self._location_table):
+            return False
+
+        location = self._location_table
+        self._connection.executescript(f"""
+            BEGIN;
+            DROP TRIGGER IF EXISTS {location}_insert;
+            DROP TRIGGER IF EXISTS {location}_delete;
+            DROP TRIGGER IF EXISTS {location}_update;
+            DROP TABLE {location};
+            COMMIT;
+            """)
+        return True
+
+
+    def in_box(self, min_latitude: float, max_latitude: float,
+               min_longitude: float, max_longitude: float) -> list:
+        """Returns every row whose location is within a box of latitudes and longitudes"""
+        location, table, key = self._location_table, self._table, self._id_column
+        cursor = self._connection.execute(f"""
+            SELECT {table}.*
+            FROM {location}
+            JOIN {table} ON {table}.{key} = {location}.{key}
+            WHERE {location}.max_latitude >= ? AND {location}.min_latitude <= ?
+                AND {location}.max_longitude >= ? AND {location}.min_longitude <= ?
+                AND {table}.latitude_deg BETWEEN ? AND ?
+                AND {table}.longitude_deg BETWEEN ? AND ? ;
+            """, (min_latitude, max_latitude, min_longitude, max_longitude,
+                  min_latitude, max_latitude, min_longitude, max_longitude))
+        records = [self._record_type(*row) for row in cursor.fetchall()]
+        cursor.close()
+        return records
+
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> list[tuple]:
+        """Returns every row within radius_km of a point, each with its distance
+        from the point in kilometers, nearest first"""
+        results = []
+        for box in bounding_boxes(latitude, longitude, radius_km):
+            for record in self.in_box(*box):
+                distance = great_circle_km(
+                    latitude, longitude, record.latitude_deg, record.longitude_deg)
+                if distance <= radius_km:
+                    results.append((record, distance))
+
+        results.sort(key = lambda result: (result[1], result[0][0]))
+        return results
+
+
+    def nearest(self, latitude: float, longitude: float, count: int) -> list[tuple]:
+        """Returns the count rows nearest to a point, each with its distance from the
+        point in kilometers, nearest first. The search radius starts small and doubles
+        until it holds at least count rows; because every row outside it is
+        farther than the radius, the count nearest inside it are the nearest of all."""
+        radius_km = _INITIAL_NEAREST_RADIUS_KM
+        while True:
+            results = self.within(latitude, longitude, radius_km)
+            if len(results) >= count or radius_km >= _MAX_DISTANCE_KM:
+                return results[:count]
+            radius_km = min(radius_km * 2, _MAX_DISTANCE_KM)
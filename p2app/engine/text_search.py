@@ -0,0 +1,196 @@
+# p2app/engine/text_search.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Full-text search over the names and keywords in the database, backed by
+# SQLite's FTS5 extension.
+#
+# Each searchable table gets an external-content FTS5 table, which indexes the
+# table's text columns without storing a second copy of them, along with triggers
+# that keep the index in sync as rows are inserted, updated and deleted.  The index
+# refers to each row by the table's key column rather than its rowid, since the
+# rowids of a table without an INTEGER PRIMARY KEY (e.g., navigation_aid) can be
+# renumbered by VACUUM, which would leave the index pointing at the wrong rows.
+#
+# FTS5 ranks the matches in each table by their bm25 scores, which are computed
+# from the statistics of that table alone, so the scores of matches in different
+# tables can't be compared.  A search of several tables interleaves their results
+# instead: each table's best match, then each table's second best, and so on.
+
+import itertools
+import sqlite3
+from p2app.events import TextSearchMatch
+from .schema import schema_names
+
+
+
+# Each searchable table, with its key column and the text columns that are indexed
+TEXT_SEARCH_TABLES = {
+    'continent': ('continent_id', ('name',)),
+    'country': ('country_id', ('name', 'keywords')),
+    'region': ('region_id', ('name', 'keywords')),
+    'airport': ('airport_id', ('name', 'municipality', 'keywords')),
+    'navigation_aid': ('navigation_aid_id', ('ident', 'name'))
+}
+
+
+
+def _fts_table(table: str) -> str:
+    """Returns the name of the FTS5 table that indexes a table"""
+    return f'{table}_text'
+
+
+
+def to_match_expression(text: str, prefix: bool = True) -> str:
+    """Converts text typed by a user into an FTS5 query that matches rows containing
+    every word in the text. Each word is quoted, so characters that are part of
+    FTS5's query syntax are searched for literally, and if prefix is true each word
+    also matches any longer word that starts with it."""
+    terms = []
+    for word in text.split():
+        term = '"' + word.replace('"', '""') + '"'
+        terms.append(term + '*' if prefix else term)
+    return ' '.join(terms)
+
+
+
+class TextSearchEngine:
+    """Provisions and queries the FTS5 tables of a database"""
+
+    def __init__(self, connection):
+        """Initializes the text search engine for an open connection"""
+        self._connection = connection
+
+
+    def _is_keyed_by(self, fts: str, key_column: str) -> bool:
+        """Returns whether an FTS5 table refers to its content table's rows by a key
+        column, rather than by their rowids as it did before"""
+        cursor = self._connection.execute("""
+            SELECT sql
+            FROM sqlite_schema
+            WHERE name = ? ;
+            """, (fts,))
+        sql, = cursor.fetchone()
+        cursor.close()
+        return f"content_rowid = '{key_column}'" in sql
+
+
+    def provision(self) -> list[str]:
+        """Creates the FTS5 table and sync triggers of every searchable table that
+        doesn't have them yet, filling each new FTS5 table from its content table, and
+        recreates any that still refer to the rows by their rowids. Returns the names
+        of the tables that were indexed. Each table is indexed in its own transaction,
+        and provisioning stops at the first one that fails, such as when the database
+        can't be written to or SQLite lacks FTS5."""
+        existing = schema_names(self._connection, 'table', 'trigger')
+        created = []
+
+        try:
+            for table, (key_column, columns) in TEXT_SEARCH_TABLES.items():
+                fts = _fts_table(table)
+                if table not in existing:
+                    continue
+                elif fts in existing and self._is_keyed_by(fts, key_column):
+                    continue
+
+                column_list = ', '.join(columns)
+                new_values = ', '.join(f'new.{column}' for column in columns)
+                old_values = ', '.join(f'old.{column}' for column in columns)
+
+                self._connection.executescript(f"""
+                    BEGIN;
+
+                    DROP TRIGGER IF EXISTS {fts}_insert;
+                    DROP TRIGGER IF EXISTS {fts}_delete;
+                    DROP TRIGGER IF EXISTS {fts}_update;
+                    DROP TABLE IF EXISTS {fts};
+
+                    CREATE VIRTUAL TABLE {fts}
+                    USING fts5({column_list}, content = '{table}', content_rowid = '{key_column}');
+
+                    CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+                        INSERT INTO {fts} (rowid, {column_list})
+                        VALUES (new.{key_column}, {new_values});
+                    END;
+
+                    CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {fts} ({fts}, rowid, {column_list})
+                        VALUES ('delete', old.{key_column}, {old_values});
+                    END;
+
+                    CREATE TRIGGER {fts}_update AFTER UPDATE ON {table} BEGIN
+                        INSERT INTO {fts} ({fts}, rowid, {column_list})
+                        VALUES ('delete', old.{key_column}, {old_values});
+                        INSERT INTO {fts} (rowid, {column_list})
+                        VALUES (new.{key_column}, {new_values});
+                    END;
+
+                    INSERT INTO {fts} ({fts}) VALUES ('rebuild');
+
+                    COMMIT;
+                    """)
+                created.append(table)
+        except sqlite3.OperationalError:
+            if self._connection.in_transaction:
+                self._connection.rollback()
+
+        return created
+
+
+    def drop(self) -> list[str]:
+        """Drops the FTS5 table and sync triggers of every searchable table that has
+        them, returning the names of those tables"""
+        existing = schema_names(self._connection, 'table', 'trigger')
+        dropped = []
+        for table in TEXT_SEARCH_TABLES:
+            fts = _fts_table(table)
+            if fts in existing:
+                self._connection.executescript(f"""
+                    BEGIN;
+                    DROP TRIGGER IF EXISTS {fts}_insert;
+                    DROP TRIGGER IF EXISTS {fts}_delete;
+                    DROP TRIGGER IF EXISTS {fts}_update;
+                    DROP TABLE {fts};
+                    COMMIT;
+                    """)
+                dropped.append(table)
+        return dropped
+
+
+    def search(self, text: str, tables = None, limit: int = 50, prefix: bool = True):
+        """Searches the names and keywords of the given tables (all searchable tables
+        if None) for text, returning at most limit TextSearchMatch named tuples. Each
+        table's matches are ordered from the best to the worst by their bm25 rank, and
+        the tables' matches are interleaved, in the order the tables are given."""
+        expression = to_match_expression(text, prefix)
+        if not expression:
+            return []
+
+        existing = schema_names(self._connection, 'table', 'trigger')
+        matches_by_table = []
+
+        for table in tables or TEXT_SEARCH_TABLES:
+            key_column, columns = TEXT_SEARCH_TABLES[table]
+            fts = _fts_table(table)
+            if fts not in existing:
+                continue
+
+            cursor = self._connection.execute(f"""
+                SELECT {table}.{key_column}, {table}.name, {fts}.rank
+                FROM {fts}
+                JOIN {table} ON {table}.{key_column} = {fts}.rowid
+                WHERE {fts} MATCH ?
+                ORDER BY {fts}.rank
+                LIMIT ? ;
+                """, (expression, limit))
+            matches_by_table.append([TextSearchMatch(table, *row) for row in cursor.fetchall()])
+            cursor.close()
+
+        matches = [
+            match
+            for matches_at_position in itertools.zip_longest(*matches_by_table)
+            for match in matches_at_position
+            if match is not None
+        ]
+        return matches[:limit]
@@ -4,12 +4,19 @@
 # Project 2: Learning to Fly
 #
 # Initialization module for the p2app.events package.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from .event_bus import EventBus
+from .event import Event
+from .airports import *
 from .app import *
 from .continents import *
+from .counts import *
 from .countries import *
 from .database import *
+from .frequencies import *
+from .navigation_aids import *
+from .paging import *
 from .regions import *
+from .runways import *
+from .text_search import *
+from .transactions import *
@@ -0,0 +1,142 @@
+# p2app/events/airports.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are either related to searching for, creating, or editing airports
+# in the database, or to finding airports by any of their codes.
+#
+# An airport can be known by several codes: its identifier in the database, its
+# GPS code (usually its ICAO code), its IATA code and its local code.  Resolving
+# a code finds every airport that's known by it.
+#
+# Airports can also be searched for by location: within a box of latitudes and
+# longitudes, within some distance of a point, or the nearest ones to a point.
+
+from collections import namedtuple
+from .paging import SearchPageToken
+from .event import Event
+
+
+
+Airport = namedtuple(
+    'Airport',
+    ['airport_id', 'airport_ident', 'type', 'name', 'latitude_deg', 'longitude_deg',
+     'elevation_ft', 'continent_id', 'country_id', 'region_id', 'municipality',
+     'scheduled_service', 'gps_code', 'iata_code', 'local_code', 'home_link',
+     'wikipedia_link', 'keywords'])
+
+Airport.__annotations__ = {
+    'airport_id': int | None,
+    'airport_ident': str | None,
+    'type': str | None,
+    'name': str | None,
+    'latitude_deg': float | None,
+    'longitude_deg': float | None,
+    'elevation_ft': int | None,
+    'continent_id': str | None,
+    'country_id': int | None,
+    'region_id': int | None,
+    'municipality': str | None,
+    'scheduled_service': int | None,
+    'gps_code': str | None,
+    'iata_code': str | None,
+    'local_code': str | None,
+    'home_link': str | None,
+    'wikipedia_link': str | None,
+    'keywords': str | None
+}
+
+
+
+class StartAirportSearchEvent(Event):
+    airport_ident: str
+    name: str
+
+
+
+class AirportSearchResultEvent(Event):
+    airport: Airport
+
+
+
+class LoadAirportEvent(Event):
+    airport_id: int
+
+
+
+class AirportLoadedEvent(Event):
+    airport: Airport
+
+
+
+class SaveNewAirportEvent(Event):
+    airport: Airport
+
+
+
+class SaveAirportEvent(Event):
+    airport: Airport
+
+
+
+class AirportSavedEvent(Event):
+    airport: Airport
+
+
+
+class SaveAirportFailedEvent(Event):
+    reason: str
+
+
+
+class StartPagedAirportSearchEvent(Event):
+    airport_ident: str
+    name: str
+    page_size: int
+
+
+
+class AirportSearchPageEvent(Event):
+    airports: list[Airport]
+    total_count: int
+    next_page: SearchPageToken | None
+
+
+
+class ResolveAirportCodeEvent(Event):
+    code: str
+
+
+
+class AirportCodeResolvedEvent(Event):
+    code: str
+    airports: list[Airport]
+
+
+
+class StartAirportBoxSearchEvent(Event):
+    min_latitude: float
+    max_latitude: float
+    min_longitude: float
+    max_longitude: float
+
+
+
+class StartNearbyAirportSearchEvent(Event):
+    latitude: float
+    longitude: float
+    radius_km: float
+
+
+
+class StartNearestAirportSearchEvent(Event):
+    latitude: float
+    longitude: float
+    count: int
+
+
+
+class NearbyAirportResultEvent(Event):
+    airport: Airport
+    distance_km: float
@@ -7,10 +7,10 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
+from .paging import SearchPageToken
+from .event import Event
 
 
 
@@ -24,117 +24,55 @@ Continent.__annotations__ = {
 
 
 
-class StartContinentSearchEvent:
-    def __init__(self, continent_code: str, name: str):
-        self._continent_code = continent_code
-        self._name = name
-
-
-    def continent_code(self) -> str:
-        return self._continent_code
-
-
-    def name(self) -> str:
-        return self._name
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent_code = {repr(self._continent_code)}, name = {repr(self._name)}'
-
-
-
-class ContinentSearchResultEvent:
-    def __init__(self, continent: Continent):
-        self._continent = continent
-
-
-    def continent(self) -> Continent:
-        return self._continent
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent = {repr(self._continent)}'
-
-
-
-class LoadContinentEvent:
-    def __init__(self, continent_id: int):
-        self._continent_id = continent_id
-
-
-    def continent_id(self) -> int:
-        return self._continent_id
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent_id = {repr(self._continent_id)}'
-
-
-
-class ContinentLoadedEvent:
-    def __init__(self, continent: Continent):
-        self._continent = continent
-
-
-    def continent(self) -> Continent:
-        return self._continent
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent = {repr(self._continent)}'
-
+class StartContinentSearchEvent(Event):
+    continent_code: str
+    name: str
 
 
-class SaveNewContinentEvent:
-    def __init__(self, continent: Continent):
-        self._continent = continent
 
+class ContinentSearchResultEvent(Event):
+    continent: Continent
 
-    def continent(self) -> Continent:
-        return self._continent
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent = {repr(self._continent)}'
+class LoadContinentEvent(Event):
+    continent_id: int
 
 
 
-class SaveContinentEvent:
-    def __init__(self, continent: Continent):
-        self._continent = continent
+class ContinentLoadedEvent(Event):
+    continent: Continent
 
 
-    def continent(self) -> Continent:
-        return self._continent
 
+class SaveNewContinentEvent(Event):
+    continent: Continent
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent = {repr(self._continent)}'
 
 
+class SaveContinentEvent(Event):
+    continent: Continent
 
-class ContinentSavedEvent:
-    def __init__(self, continent: Continent):
-        self._continent = continent
 
 
-    def continent(self) -> Continent:
-        return self._continent
+class ContinentSavedEvent(Event):
+    continent: Continent
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent = {repr(self._continent)}'
 
+class SaveContinentFailedEvent(Event):
+    reason: str
 
 
-class SaveContinentFailedEvent:
-    def __init__(self, reason: str):
-        self._reason = reason
 
+class StartPagedContinentSearchEvent(Event):
+    continent_code: str
+    name: str
+    page_size: int
 
-    def reason(self) -> str:
-        return self._reason
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: reason = {repr(self._reason)}'
+class ContinentSearchPageEvent(Event):
+    continents: list[Continent]
+    total_count: int
+    next_page: SearchPageToken | None
@@ -7,10 +7,10 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
+from .paging import SearchPageToken
+from .event import Event
 
 
 
@@ -29,117 +29,55 @@ Country.__annotations__ = {
 
 
 
-class StartCountrySearchEvent:
-    def __init__(self, country_code: str, name: str):
-        self._country_code = country_code
-        self._name = name
-
-
-    def country_code(self) -> str:
-        return self._country_code
-
-
-    def name(self) -> str:
-        return self._name
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country_code = {repr(self._country_code)}, name = {repr(self._name)}'
-
-
-
-class CountrySearchResultEvent:
-    def __init__(self, country: Country):
-        self._country = country
-
-
-    def country(self) -> Country:
-        return self._country
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country = {repr(self._country)}'
-
-
-
-class LoadCountryEvent:
-    def __init__(self, country_id: int):
-        self._country_id = country_id
-
-
-    def country_id(self) -> int:
-        return self._country_id
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country_id = {repr(self._country_id)}'
-
-
-
-class CountryLoadedEvent:
-    def __init__(self, country: Country):
-        self._country = country
-
-
-    def country(self) -> Country:
-        return self._country
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country = {repr(self._country)}'
-
+class StartCountrySearchEvent(Event):
+    country_code: str
+    name: str
 
 
-class SaveNewCountryEvent:
-    def __init__(self, country: Country):
-        self._country = country
 
+class CountrySearchResultEvent(Event):
+    country: Country
 
-    def country(self) -> Country:
-        return self._country
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country = {repr(self._country)}'
+class LoadCountryEvent(Event):
+    country_id: int
 
 
 
-class SaveCountryEvent:
-    def __init__(self, country: Country):
-        self._country = country
+class CountryLoadedEvent(Event):
+    country: Country
 
 
-    def country(self) -> Country:
-        return self._country
 
+class SaveNewCountryEvent(Event):
+    country: Country
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country = {repr(self._country)}'
 
 
+class SaveCountryEvent(Event):
+    country: Country
 
-class CountrySavedEvent:
-    def __init__(self, country: Country):
-        self._country = country
 
 
-    def country(self) -> Country:
-        return self._country
+class CountrySavedEvent(Event):
+    country: Country
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: country = {repr(self._country)}'
 
+class SaveCountryFailedEvent(Event):
+    reason: str
 
 
-class SaveCountryFailedEvent:
-    def __init__(self, reason: str):
-        self._reason = reason
 
+class StartPagedCountrySearchEvent(Event):
+    country_code: str
+    name: str
+    page_size: int
 
-    def reason(self) -> str:
-        return self._reason
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: reason = {repr(self._reason)}'
+class CountrySearchPageEvent(Event):
+    countries: list[Country]
+    total_count: int
+    next_page: SearchPageToken | None
@@ -0,0 +1,42 @@
+# p2app/events/counts.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are related to loading the number of regions, airports and runways
+# in a country or continent.
+
+from collections import namedtuple
+from .event import Event
+
+
+
+EntityCounts = namedtuple('EntityCounts', ['region_count', 'airport_count', 'runway_count'])
+
+EntityCounts.__annotations__ = {
+    'region_count': int,
+    'airport_count': int,
+    'runway_count': int
+}
+
+
+
+class LoadCountryCountsEvent(Event):
+    country_id: int
+
+
+
+class CountryCountsLoadedEvent(Event):
+    country_id: int
+    counts: EntityCounts
+
+
+
+class LoadContinentCountsEvent(Event):
+    continent_id: int
+
+
+
+class ContinentCountsLoadedEvent(Event):
+    continent_id: int
+    counts: EntityCounts
@@ -6,61 +6,32 @@
 # Events related to the opening and closing of the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from pathlib import Path
+from .event import Event
 
 
 
-class OpenDatabaseEvent:
-    def __init__(self, path: Path):
-        self._path = path
-
-
-    def path(self) -> Path:
-        return self._path
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: path = {repr(self._path)}'
-
-
-
-class CloseDatabaseEvent:
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}'
-
-
-
-class DatabaseOpenedEvent:
-    def __init__(self, path: Path):
-        self._path = path
-
-
-    def path(self) -> Path:
-        return self._path
+class OpenDatabaseEvent(Event):
+    path: Path
+    read_only: bool = False
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: path = {repr(self._path)}'
 
+class CloseDatabaseEvent(Event):
+    pass
 
 
-class DatabaseOpenFailedEvent:
-    def __init__(self, reason: str):
-        self._reason = reason
 
+class DatabaseOpenedEvent(Event):
+    path: Path
 
-    def reason(self) -> str:
-        return self._reason
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: reason = {repr(self._reason)}'
+class DatabaseOpenFailedEvent(Event):
+    reason: str
 
 
 
-class DatabaseClosedEvent:
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}'
+class DatabaseClosedEvent(Event):
+    pass
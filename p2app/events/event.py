@@ -0,0 +1,101 @@
+# p2app/events/event.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# The base class of every event.
+#
+# An event class declares its fields as annotations in its body, with a default
+# value for any that are optional, e.g.,
+#
+#     class StartFrequencyConflictSearchEvent(Event):
+#         max_distance_km: float
+#         frequency_tolerance_khz: int = 0
+#
+# From those, the class gets __slots__ (so its events have no per-instance
+# __dict__), an __init__ that takes the fields in order, and an accessor method
+# for each field (e.g., event.max_distance_km()).  Events can't be changed once
+# they're created, and they share one __repr__, which only formats an event's
+# fields when it's called.
+
+
+
+def _source_parameter(field: str, defaults: dict) -> str:
+    return f'{field} = _defaults[{repr(field)}]' if field in defaults else field
+
+
+
+def _make_initializer(cls, fields: tuple[str, ...], defaults: dict, annotations: dict):
+    """Returns an __init__ for an event class that takes the fields in order, as
+    positional or keyword arguments, and assigns each to its slot. The slots are
+    assigned through their descriptors, which bypasses the class's __setattr__."""
+    parameters = ', '.join(['self'] + [_source_parameter(field, defaults) for field in fields])
+    body = ''.join(f'    _set_{field}(self, {field})\n' for field in fields) or '    pass\n'
+    namespace = {f'_set_{field}': getattr(cls, f'_{field}').__set__ for field in fields}
+    namespace['_defaults'] = defaults
+    exec(f'def __init__({parameters}):\n{body}', namespace)
+    initializer = namespace['__init__']
+    initializer.__annotations__ = {field: annotations[field] for field in fields}
+    initializer.__qualname__ = f'{cls.__name__}.__init__'
+    return initializer
+
+
+
+def _make_accessor(field: str, annotation):
+    """Returns a method that returns the value of a field"""
+    namespace = {}
+    exec(f'def {field}(self):\n    return self._{field}\n', namespace)
+    accessor = namespace[field]
+    accessor.__annotations__ = {'return': annotation}
+    return accessor
+
+
+
+class _EventType(type):
+    """The metaclass of Event, which turns the annotations in an event class's body
+    into its slots, __init__ and accessors"""
+
+    def __new__(metacls, name, bases, namespace, **kwargs):
+        own_annotations = namespace.get('__annotations__', {})
+        own_fields = tuple(own_annotations)
+        inherited_fields = tuple(field for base in bases for field in getattr(base, '_fields', ()))
+        fields = inherited_fields + own_fields
+
+        annotations = {}
+        defaults = {}
+        for base in reversed(bases):
+            annotations.update(getattr(base, '_field_annotations', {}))
+            defaults.update(getattr(base, '_field_defaults', {}))
+        annotations.update(own_annotations)
+        for field in own_fields:
+            if field in namespace:
+                defaults[field] = namespace.pop(field)
+            namespace[field] = _make_accessor(field, own_annotations[field])
+            namespace[field].__qualname__ = f'{name}.{field}'
+
+        namespace['__slots__'] = tuple(f'_{field}' for field in own_fields)
+        namespace['_fields'] = fields
+        namespace['_field_annotations'] = annotations
+        namespace['_field_defaults'] = defaults
+
+        cls = super().__new__(metacls, name, bases, namespace, **kwargs)
+        if '__init__' not in namespace:
+            cls.__init__ = _make_initializer(cls, fields, defaults, annotations)
+        return cls
+
+
+
+class Event(metaclass = _EventType):
+    """The base class of every event"""
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} cannot be changed')
+
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} cannot be changed')
+
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{field} = {repr(getattr(self, "_" + field))}' for field in self._fields)
+        return f'{type(self).__name__}: {fields}' if fields else type(self).__name__
@@ -11,7 +11,118 @@
 # * The user interface's internal events are routed back to the user interface
 #   to be processed, with the engine never seeing them.
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# By default, the engine processes each event on the thread that sent it, which
+# is the user interface's thread.  In asynchronous mode, the engine instead runs
+# on a worker thread that processes events one at a time in the order they were
+# sent, and its results are handed back to the user interface's thread, which
+# polls for them using the view's after() method, so a slow request never stops
+# the user interface from responding.  The internal events are then queued along
+# with the engine's, so they're handled in the order they were sent relative to
+# the engine's results (e.g., a search list is cleared only after the results of
+# the search before it have arrived, never before).
+#
+# A request sent in asynchronous mode can be given a timeout.  If the engine can be
+# interrupted (i.e., it has an interrupt() method), the query it's running when the
+# timeout passes is interrupted, so even a query that hasn't produced its first
+# result yet times out instead of running to the end.
+
+import queue
+import threading
+import time
+from .app import EndApplicationEvent, ErrorEvent
+
+
+
+_POLL_INTERVAL_MS = 20
+
+
+
+class EngineRequest:
+    def __init__(self, event, timeout: float | None = None):
+        self._event = event
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._is_cancelled = threading.Event()
+        self._is_done = threading.Event()
+
+
+    def event(self):
+        return self._event
+
+
+    def cancel(self) -> None:
+        self._is_cancelled.set()
+
+
+    def is_cancelled(self) -> bool:
+        return self._is_cancelled.is_set()
+
+
+    def is_expired(self) -> bool:
+        return self._deadline is not None and time.monotonic() > self._deadline
+
+
+    def is_done(self) -> bool:
+        return self._is_done.is_set()
+
+
+    def remaining_time(self) -> float | None:
+        return None if self._deadline is None else max(0.0, self._deadline - time.monotonic())
+
+
+    def finish(self) -> None:
+        self._is_done.set()
+
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._is_done.wait(timeout)
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: event = {repr(self._event)}'
+
+
+
+class _InternalRequest(EngineRequest):
+    pass
+
+
+
+class _Interrupter:
+    # Interrupts the engine once a request's timeout passes, but only while the
+    # request is still being processed, so that the request after it is never
+    # interrupted in its place.
+
+    def __init__(self, engine, timeout: float | None):
+        self._engine = engine
+        self._lock = threading.Lock()
+        self._is_running = True
+        self._has_interrupted = False
+        self._timer = None
+
+        if timeout is not None and hasattr(engine, 'interrupt'):
+            self._timer = threading.Timer(timeout, self._interrupt)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+    def _interrupt(self) -> None:
+        with self._lock:
+            if self._is_running:
+                self._engine.interrupt()
+                self._has_interrupted = True
+
+
+    def has_interrupted(self) -> bool:
+        with self._lock:
+            return self._has_interrupted
+
+
+    def stop(self) -> None:
+        with self._lock:
+            self._is_running = False
+
+        if self._timer is not None:
+            self._timer.cancel()
 
 
 
@@ -20,6 +131,11 @@ class EventBus:
         self._view = None
         self._engine = None
         self._is_debug_mode = False
+        self._is_async_mode = False
+        self._poll_interval_ms = _POLL_INTERVAL_MS
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = None
 
 
     def register_view(self, view):
@@ -38,12 +154,120 @@ class EventBus:
         self._is_debug_mode = False
 
 
-    def initiate_event(self, event):
+    def enable_async_mode(self, poll_interval_ms: int = _POLL_INTERVAL_MS):
+        if self._is_async_mode:
+            return
+
+        self._is_async_mode = True
+        self._poll_interval_ms = poll_interval_ms
+        self._worker = threading.Thread(target = self._run_worker, name = 'engine', daemon = True)
+        self._worker.start()
+        self._view.after(self._poll_interval_ms, self._poll_results)
+
+
+    def disable_async_mode(self):
+        if not self._is_async_mode:
+            return
+
+        self._is_async_mode = False
+        self._requests.put(None)
+        self._worker.join()
+        self._worker = None
+        self._deliver_results()
+
+
+    def initiate_event(self, event, timeout: float | None = None):
         if self._is_debug_mode:
             print(f'Sent by view  : {event}')
 
+        if self._is_async_mode:
+            request = EngineRequest(event, timeout)
+            self._requests.put(request)
+            return request
+
         for result_event in self._engine.process_event(event):
-            if self._is_debug_mode:
-                print(f'Sent by engine: {result_event}')
+            self._deliver(result_event)
+
+
+    def initiate_internal_event(self, event):
+        if self._is_async_mode:
+            self._requests.put(_InternalRequest(event))
+        else:
+            self._view.handle_event(event)
+
+
+    def _deliver(self, result_event):
+        if self._is_debug_mode:
+            print(f'Sent by engine: {result_event}')
+
+        self._view.handle_event(result_event)
+
+
+    def _run_worker(self):
+        while (request := self._requests.get()) is not None:
+            if not request.is_cancelled():
+                self._process_request(request)
+
+            request.finish()
+
+
+    def _process_request(self, request):
+        if isinstance(request, _InternalRequest):
+            self._results.put((request, request.event()))
+            return
+
+        # A request that expired while it waited is never started.  Once one has been,
+        # whatever its first result reports (e.g., a save) has already happened, so
+        # that result is always delivered; its timeout only cuts off any that follow.
+        # An interrupted query fails instead, and the ErrorEvent the engine reports
+        # for it is replaced by one saying that the request timed out, while a save
+        # that fails because it was interrupted (and so never happened) says so.
+        if request.is_expired():
+            self._results.put((request, ErrorEvent('The request timed out.')))
+            return
+
+        result_events = self._engine.process_event(request.event())
+        interrupter = _Interrupter(self._engine, request.remaining_time())
+        has_delivered = False
+
+        try:
+            for result_event in result_events:
+                if request.is_cancelled():
+                    break
+                elif interrupter.has_interrupted() and isinstance(result_event, ErrorEvent):
+                    self._results.put((request, ErrorEvent('The request timed out.')))
+                    break
+                elif request.is_expired() and has_delivered:
+                    self._results.put((request, ErrorEvent('The request timed out.')))
+                    break
+
+                self._results.put((request, result_event))
+                has_delivered = True
+        except Exception:
+            self._results.put((request, ErrorEvent('An Error Occurred.')))
+        finally:
+            interrupter.stop()
+            result_events.close()
+
+
+    def _deliver_results(self) -> bool:
+        while True:
+            try:
+                request, result_event = self._results.get_nowait()
+            except queue.Empty:
+                return True
+
+            if request.is_cancelled():
+                continue
+            elif isinstance(request, _InternalRequest):
+                self._view.handle_event(result_event)
+            else:
+                self._deliver(result_event)
+
+            if isinstance(result_event, EndApplicationEvent):
+                return False
+
 
-            self._view.handle_event(result_event)
+    def _poll_results(self):
+        if self._deliver_results() and self._is_async_mode:
+            self._view.after(self._poll_interval_ms, self._poll_results)
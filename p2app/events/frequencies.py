@@ -0,0 +1,52 @@
+# p2app/events/frequencies.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are related to looking up the radio frequencies that airports use.
+#
+# A lookup is described by a FrequencyQuery: a band of frequencies (whose ends are
+# the same frequency to find exactly that one), optionally limited to one airport,
+# or to the airports within some distance of it.  Queries are issued in batches,
+# and each gets its own result event, in the order the queries were given.
+
+from collections import namedtuple
+from .event import Event
+
+
+
+AirportFrequency = namedtuple(
+    'AirportFrequency',
+    ['airport_frequency_id', 'airport_id', 'type', 'description', 'frequency_mhz'])
+
+AirportFrequency.__annotations__ = {
+    'airport_frequency_id': int | None,
+    'airport_id': int | None,
+    'type': str | None,
+    'description': str | None,
+    'frequency_mhz': float | None
+}
+
+
+FrequencyQuery = namedtuple(
+    'FrequencyQuery',
+    ['min_mhz', 'max_mhz', 'airport_id', 'radius_km'],
+    defaults = (None, None))
+
+FrequencyQuery.__annotations__ = {
+    'min_mhz': float,
+    'max_mhz': float,
+    'airport_id': int | None,
+    'radius_km': float | None
+}
+
+
+
+class StartFrequencySearchEvent(Event):
+    queries: list[FrequencyQuery]
+
+
+
+class FrequencySearchResultEvent(Event):
+    query: FrequencyQuery
+    frequencies: list[AirportFrequency]
@@ -0,0 +1,82 @@
+# p2app/events/navigation_aids.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are related to navigation aids (navaids): finding the ones near a
+# point, and auditing them for frequency conflicts.
+#
+# Two navaids conflict when their frequencies are the same, or within some
+# tolerance of each other, and they're within some distance of each other, so
+# that a receiver could pick up both of them at once.
+
+from collections import namedtuple
+from .event import Event
+
+
+
+NavigationAid = namedtuple(
+    'NavigationAid',
+    ['navigation_aid_id', 'filename', 'ident', 'name', 'type', 'frequency_khz',
+     'latitude_deg', 'longitude_deg', 'elevation_ft', 'iso_country', 'dme_frequency_khz',
+     'dme_channel', 'dme_latitude_deg', 'dme_longitude_deg', 'dme_elevation_ft',
+     'adjusted_variation_deg', 'magnetic_variation_deg', 'usage_type', 'power', 'airport_id'])
+
+NavigationAid.__annotations__ = {
+    'navigation_aid_id': int | None,
+    'filename': str | None,
+    'ident': str | None,
+    'name': str | None,
+    'type': str | None,
+    'frequency_khz': int | None,
+    'latitude_deg': float | None,
+    'longitude_deg': float | None,
+    'elevation_ft': int | None,
+    'iso_country': str | None,
+    'dme_frequency_khz': int | None,
+    'dme_channel': str | None,
+    'dme_latitude_deg': float | None,
+    'dme_longitude_deg': float | None,
+    'dme_elevation_ft': int | None,
+    'adjusted_variation_deg': float | None,
+    'magnetic_variation_deg': float | None,
+    'usage_type': str | None,
+    'power': str | None,
+    'airport_id': int | None
+}
+
+
+FrequencyConflict = namedtuple(
+    'FrequencyConflict',
+    ['navigation_aid1', 'navigation_aid2', 'distance_km', 'frequency_difference_khz'])
+
+FrequencyConflict.__annotations__ = {
+    'navigation_aid1': NavigationAid,
+    'navigation_aid2': NavigationAid,
+    'distance_km': float,
+    'frequency_difference_khz': int
+}
+
+
+
+class StartNearbyNavigationAidSearchEvent(Event):
+    latitude: float
+    longitude: float
+    radius_km: float
+
+
+
+class NearbyNavigationAidResultEvent(Event):
+    navigation_aid: NavigationAid
+    distance_km: float
+
+
+
+class StartFrequencyConflictSearchEvent(Event):
+    max_distance_km: float
+    frequency_tolerance_khz: int = 0
+
+
+
+class FrequencyConflictEvent(Event):
+    conflict: FrequencyConflict
@@ -0,0 +1,34 @@
+# p2app/events/paging.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are related to retrieving search results one page at a time,
+# rather than all at once.
+#
+# A paged search is started with one of the StartPaged*SearchEvents and answered
+# with a *SearchPageEvent, which carries a SearchPageToken when there are more
+# results.  Sending that token back in a FetchNextPageEvent retrieves the page
+# that follows it.
+
+from collections import namedtuple
+from .event import Event
+
+
+
+SearchPageToken = namedtuple(
+    'SearchPageToken',
+    ['entity', 'criteria', 'page_size', 'after_id', 'total_count'])
+
+SearchPageToken.__annotations__ = {
+    'entity': str,
+    'criteria': tuple[tuple[str, str], ...],
+    'page_size': int,
+    'after_id': int,
+    'total_count': int
+}
+
+
+
+class FetchNextPageEvent(Event):
+    token: SearchPageToken
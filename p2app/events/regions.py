@@ -7,10 +7,10 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
+from .paging import SearchPageToken
+from .event import Event
 
 
 
@@ -32,123 +32,57 @@ Region.__annotations__ = {
 
 
 
-class StartRegionSearchEvent:
-    def __init__(self, region_code: str, local_code: str, name: str):
-        self._region_code = region_code
-        self._local_code = local_code
-        self._name = name
-
-
-    def region_code(self) -> str:
-        return self._region_code
-
-
-    def local_code(self) -> str:
-        return self._local_code
-
-
-    def name(self) -> str:
-        return self._name
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region_code = {repr(self._region_code)}, ' + \
-               f'local_name = {repr(self._local_code)}, name = {repr(self._name)}'
-
-
-
-class RegionSearchResultEvent:
-    def __init__(self, region: Region):
-        self._region = region
-
-
-    def region(self) -> Region:
-        return self._region
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region = {repr(self._region)}'
-
-
-
-class LoadRegionEvent:
-    def __init__(self, region_id: int):
-        self._region_id = region_id
-
-
-    def region_id(self) -> int:
-        return self._region_id
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region_id = {repr(self._region_id)}'
-
-
-
-class RegionLoadedEvent:
-    def __init__(self, region: Region):
-        self._region = region
-
-
-    def region(self) -> Region:
-        return self._region
-
-
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region = {repr(self._region)}'
-
+class StartRegionSearchEvent(Event):
+    region_code: str
+    local_code: str
+    name: str
 
 
-class SaveNewRegionEvent:
-    def __init__(self, region: Region):
-        self._region = region
 
+class RegionSearchResultEvent(Event):
+    region: Region
 
-    def region(self) -> Region:
-        return self._region
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region = {repr(self._region)}'
+class LoadRegionEvent(Event):
+    region_id: int
 
 
 
-class SaveRegionEvent:
-    def __init__(self, region: Region):
-        self._region = region
+class RegionLoadedEvent(Event):
+    region: Region
 
 
-    def region(self) -> Region:
-        return self._region
 
+class SaveNewRegionEvent(Event):
+    region: Region
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region = {repr(self._region)}'
 
 
+class SaveRegionEvent(Event):
+    region: Region
 
-class RegionSavedEvent:
-    def __init__(self, region: Region):
-        self._region = region
 
 
-    def region(self) -> Region:
-        return self._region
+class RegionSavedEvent(Event):
+    region: Region
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: region = {repr(self._region)}'
 
+class SaveRegionFailedEvent(Event):
+    reason: str
 
 
-class SaveRegionFailedEvent:
-    def __init__(self, reason: str):
-        self._reason = reason
 
+class StartPagedRegionSearchEvent(Event):
+    region_code: str
+    local_code: str
+    name: str
+    page_size: int
 
-    def reason(self) -> str:
-        return self._reason
 
 
-    def __repr__(self) -> str:
-        return f'{type(self).__name__}: reason = {repr(self._reason)}'
+class RegionSearchPageEvent(Event):
+    regions: list[Region]
+    total_count: int
+    next_page: SearchPageToken | None
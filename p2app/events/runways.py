@@ -0,0 +1,57 @@
+# p2app/events/runways.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are related to searching for airports by the runways they have.
+#
+# A runway search is described by a RunwayCriteria, any of whose fields may be
+# None to leave it out of the search, e.g., "at least 8000 feet long, lighted and
+# not closed, in a country".  Its results are aggregated per airport: one event for
+# each airport with at least one matching runway, summarizing those runways.
+
+from collections import namedtuple
+from .airports import Airport
+from .event import Event
+
+
+
+RunwayCriteria = namedtuple(
+    'RunwayCriteria',
+    ['min_length_ft', 'max_length_ft', 'min_width_ft', 'max_width_ft', 'surfaces',
+     'lighted', 'closed', 'country_id'],
+    defaults = (None, None, None, None, None, None, None, None))
+
+RunwayCriteria.__annotations__ = {
+    'min_length_ft': int | None,
+    'max_length_ft': int | None,
+    'min_width_ft': int | None,
+    'max_width_ft': int | None,
+    'surfaces': tuple[str, ...] | None,
+    'lighted': bool | None,
+    'closed': bool | None,
+    'country_id': int | None
+}
+
+
+RunwaySummary = namedtuple(
+    'RunwaySummary',
+    ['runway_count', 'longest_length_ft', 'widest_width_ft', 'lighted_count'])
+
+RunwaySummary.__annotations__ = {
+    'runway_count': int,
+    'longest_length_ft': int | None,
+    'widest_width_ft': int | None,
+    'lighted_count': int
+}
+
+
+
+class StartRunwaySearchEvent(Event):
+    criteria: RunwayCriteria
+
+
+
+class RunwaySearchResultEvent(Event):
+    airport: Airport
+    summary: RunwaySummary
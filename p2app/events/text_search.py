@@ -0,0 +1,32 @@
+# p2app/events/text_search.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that are related to searching the names and keywords of every kind of
+# record in the database at once.
+
+from collections import namedtuple
+from .event import Event
+
+
+
+TextSearchMatch = namedtuple('TextSearchMatch', ['entity', 'record_id', 'name', 'rank'])
+
+TextSearchMatch.__annotations__ = {
+    'entity': str,
+    'record_id': int,
+    'name': str,
+    'rank': float
+}
+
+
+
+class StartTextSearchEvent(Event):
+    text: str
+    entities: list[str] | None = None
+
+
+
+class TextSearchResultEvent(Event):
+    match: TextSearchMatch
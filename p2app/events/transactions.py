@@ -0,0 +1,48 @@
+# p2app/events/transactions.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Events that group saves into a single transaction, so that they're committed
+# together (or not at all) instead of one at a time.
+#
+# Between a BeginTransactionEvent and the CommitTransactionEvent or
+# RollbackTransactionEvent that ends it, each save is applied within a savepoint,
+# so a save that fails is undone on its own without affecting the others.
+
+from .event import Event
+
+
+
+class BeginTransactionEvent(Event):
+    pass
+
+
+
+class CommitTransactionEvent(Event):
+    pass
+
+
+
+class RollbackTransactionEvent(Event):
+    pass
+
+
+
+class TransactionBegunEvent(Event):
+    pass
+
+
+
+class TransactionCommittedEvent(Event):
+    pass
+
+
+
+class TransactionRolledBackEvent(Event):
+    pass
+
+
+
+class TransactionFailedEvent(Event):
+    reason: str
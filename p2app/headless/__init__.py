@@ -0,0 +1,10 @@
+# p2app/headless/__init__.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Initialization module for the p2app.headless package, which runs the engine
+# without a user interface, driven by a script of events instead.
+
+from .serialization import decode_event, encode_event
+from .runner import run_events
@@ -0,0 +1,53 @@
+# p2app/headless/__main__.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Runs a script of events through the engine without a user interface, e.g.,
+#
+#     python -m p2app.headless maintenance.jsonl --output results.jsonl
+#     python -m p2app.headless --pipeline < load_test.jsonl
+#
+# Each line of the script is one event, written as described in serialization.py,
+# and each result event is written as one line of JSON to the output file (or the
+# standard output).  The exit status is 1 if any of the script's lines couldn't be
+# read, or 0 otherwise.
+
+import argparse
+import sys
+from .runner import run_events
+
+
+
+def _parse_arguments():
+    parser = argparse.ArgumentParser(
+        prog = 'python -m p2app.headless',
+        description = 'Runs a script of events, one JSON object per line, through the engine.')
+    parser.add_argument(
+        'script', nargs = '?', type = argparse.FileType('r', encoding = 'utf-8'), default = sys.stdin,
+        help = 'the file of events to run (the standard input if omitted or -)')
+    parser.add_argument(
+        '--output', type = argparse.FileType('w', encoding = 'utf-8'), default = sys.stdout,
+        help = 'the file that result events are written to (the standard output if omitted)')
+    parser.add_argument(
+        '--pipeline', action = 'store_true',
+        help = "overlap reading the script with the engine's work, for throughput")
+    parser.add_argument(
+        '--debug', action = 'store_true',
+        help = 'also print each event as it is sent and received (use with --output)')
+    return parser.parse_args()
+
+
+
+def main() -> None:
+    arguments = _parse_arguments()
+
+    with arguments.script, arguments.output:
+        unreadable_count = run_events(
+            arguments.script, arguments.output, pipeline = arguments.pipeline, debug = arguments.debug)
+
+    sys.exit(1 if unreadable_count > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# p2app/headless/runner.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Runs a script of events through the EventBus and the Engine, with no user
+# interface (and no tkinter) involved, writing each result event as a line of JSON.
+#
+# In its place, the EventBus is given a view that writes the events it's sent.
+# Result events are written in the order of the events that caused them, and a
+# line that can't be read is answered in its place with an ErrorEvent naming its
+# line number, so a script's output lines up with its input.
+#
+# By default, each event is processed to completion before the next one is read.
+# In pipeline mode, the EventBus runs the engine on its worker thread instead, so
+# reading and decoding the script, the engine's work, and writing the results all
+# overlap.  At most max_pending events are waiting for the engine at any time, so
+# a long script isn't read into memory all at once.
+
+from collections import deque
+from p2app.engine import Engine
+from p2app.events import ErrorEvent, Event, EventBus, QuitInitiatedEvent
+from .serialization import decode_event, encode_event
+
+
+
+_MAX_PENDING_EVENTS = 256
+
+
+
+class _UnreadableLineEvent(Event):
+    message: str
+
+
+
+def _on_unreadable_line(event):
+    yield ErrorEvent(event.message())
+
+
+
+class _JsonLinesView:
+    """Stands in for the user interface, writing each event it's sent to an output file
+    as a line of JSON"""
+
+    def __init__(self, output):
+        self._output = output
+        self._callbacks = []
+
+
+    def handle_event(self, event) -> None:
+        self._output.write(encode_event(event) + '\n')
+
+
+    def after(self, delay_ms: int, callback) -> None:
+        # Rather than after a delay, the callback is called the next time the runner
+        # polls, which it does between the events it sends.
+        self._callbacks.append(callback)
+
+
+    def poll(self) -> None:
+        """Calls the callbacks that were scheduled with after()"""
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+
+def run_events(lines, output, engine: Engine | None = None, pipeline: bool = False,
+               max_pending: int = _MAX_PENDING_EVENTS, debug: bool = False) -> int:
+    """Sends the event on each line of JSON in lines (skipping blank ones) to an engine
+    (a new one if None), writing the result events to output, and returns the number
+    of lines that couldn't be read. It stops after a QuitInitiatedEvent is sent."""
+    engine = engine if engine is not None else Engine()
+    engine.register_handler(_UnreadableLineEvent, _on_unreadable_line)
+
+    view = _JsonLinesView(output)
+    event_bus = EventBus()
+    event_bus.register_engine(engine)
+    event_bus.register_view(view)
+
+    if debug:
+        event_bus.enable_debug_mode()
+
+    if pipeline:
+        event_bus.enable_async_mode(poll_interval_ms = 0)
+
+    pending = deque()
+    unreadable_count = 0
+
+    try:
+        for line_number, line in enumerate(lines, start = 1):
+            if not line.strip():
+                continue
+
+            try:
+                event = decode_event(line)
+            except ValueError as e:
+                event = _UnreadableLineEvent(f'Line {line_number}: {e}')
+                unreadable_count += 1
+
+            request = event_bus.initiate_event(event)
+
+            if pipeline:
+                pending.append(request)
+                while pending and (len(pending) > max_pending or pending[0].is_done()):
+                    pending.popleft().wait()
+                view.poll()
+
+            if isinstance(event, QuitInitiatedEvent):
+                break
+    finally:
+        event_bus.disable_async_mode()
+
+    return unreadable_count
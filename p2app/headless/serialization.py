@@ -0,0 +1,159 @@
+# p2app/headless/serialization.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Converts events to and from lines of JSON.
+#
+# An event is written as a JSON object whose "event" key is the name of its class
+# and whose other keys are its fields, e.g.,
+#
+#     {"event": "StartAirportSearchEvent", "airport_ident": null, "name": "Heathrow"}
+#
+# Records (Airport, Continent, and the other named tuples in p2app.events) are
+# written as objects keyed by their fields, and paths as strings.  When an event
+# is read, each field is converted back according to the annotation its class
+# declares for it, so a record can be given either as an object or as a list of
+# its fields in order, and any field that has a default can be left out.
+
+import json
+from pathlib import Path, PurePath
+import types
+import typing
+import p2app.events
+from p2app.events import Event
+
+
+
+# Every event class that can be read, by name
+_EVENT_TYPES = {
+    name: value for name, value in vars(p2app.events).items()
+    if isinstance(value, type) and issubclass(value, Event) and value is not Event
+}
+
+
+
+def _is_record_type(annotation) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, tuple) and hasattr(annotation, '_fields')
+
+
+
+def _encode_value(value):
+    """Returns a value as something that the json module can write"""
+    if isinstance(value, Event):
+        return _encode_fields(value)
+    elif isinstance(value, tuple) and hasattr(value, '_fields'):
+        return {field: _encode_value(item) for field, item in zip(value._fields, value)}
+    elif isinstance(value, (list, tuple)):
+        return [_encode_value(item) for item in value]
+    elif isinstance(value, PurePath):
+        return str(value)
+    else:
+        return value
+
+
+
+def _encode_fields(event: Event) -> dict:
+    encoded = {'event': type(event).__name__}
+    for field in event._fields:
+        encoded[field] = _encode_value(getattr(event, field)())
+    return encoded
+
+
+
+def encode_event(event: Event) -> str:
+    """Returns an event as one line of JSON"""
+    return json.dumps(_encode_fields(event), separators = (',', ':'))
+
+
+
+def _check_for_missing_fields(name: str, fields_type, fields: dict) -> None:
+    """Raises a ValueError if fields lacks any field of an event or record type that
+    has no default"""
+    missing_fields = [
+        field for field in fields_type._fields
+        if field not in fields and field not in fields_type._field_defaults
+    ]
+    if missing_fields:
+        raise ValueError(f'{name} is missing fields named {", ".join(missing_fields)}')
+
+
+
+def _decode_record(value, record_type):
+    """Returns a record of a named tuple type from an object keyed by its fields or
+    a list of its fields in order"""
+    annotations = record_type.__annotations__
+    if isinstance(value, dict):
+        unknown_fields = set(value) - set(record_type._fields)
+        if unknown_fields:
+            raise ValueError(f'{record_type.__name__} has no fields named {", ".join(sorted(unknown_fields))}')
+        fields = {field: _decode_value(item, annotations.get(field)) for field, item in value.items()}
+    elif isinstance(value, list):
+        if len(value) > len(record_type._fields):
+            raise ValueError(f'{record_type.__name__} has only {len(record_type._fields)} fields')
+        fields = {
+            field: _decode_value(item, annotations.get(field))
+            for field, item in zip(record_type._fields, value)
+        }
+    else:
+        raise ValueError(f'{record_type.__name__} must be an object or a list')
+
+    _check_for_missing_fields(record_type.__name__, record_type, fields)
+    return record_type(**fields)
+
+
+
+def _decode_value(value, annotation):
+    """Returns a value read from JSON as the type that an annotation describes"""
+    if value is None or annotation is None:
+        return value
+
+    origin = typing.get_origin(annotation)
+    arguments = typing.get_args(annotation)
+
+    if origin is typing.Union or origin is types.UnionType:
+        candidates = [argument for argument in arguments if argument is not type(None)]
+        return _decode_value(value, candidates[0]) if len(candidates) == 1 else value
+    elif _is_record_type(annotation):
+        return _decode_record(value, annotation)
+    elif isinstance(annotation, type) and issubclass(annotation, PurePath):
+        if not isinstance(value, str):
+            raise ValueError(f'Expected a path, but found {json.dumps(value)}')
+        return Path(value)
+    elif origin in (list, tuple) and not isinstance(value, list):
+        raise ValueError(f'Expected a list, but found {json.dumps(value)}')
+    elif origin is list:
+        return [_decode_value(item, arguments[0]) for item in value]
+    elif origin is tuple and arguments[-1:] == (Ellipsis,):
+        return tuple(_decode_value(item, arguments[0]) for item in value)
+    elif origin is tuple:
+        return tuple(_decode_value(item, argument) for item, argument in zip(value, arguments))
+    elif annotation is float and type(value) is int:
+        return float(value)
+    else:
+        return value
+
+
+
+def decode_event(line: str) -> Event:
+    """Returns the event written on one line of JSON, raising a ValueError if the line
+    isn't an event that can be read"""
+    decoded = json.loads(line)
+    if not isinstance(decoded, dict) or 'event' not in decoded:
+        raise ValueError('An event must be an object with an "event" key')
+
+    fields = dict(decoded)
+    name = fields.pop('event')
+    if not isinstance(name, str):
+        raise ValueError(f'An event\'s name must be a string, but found {json.dumps(name)}')
+    event_type = _EVENT_TYPES.get(name)
+    if event_type is None:
+        raise ValueError(f'There is no event named {name}')
+
+    unknown_fields = set(fields) - set(event_type._fields)
+    if unknown_fields:
+        raise ValueError(f'{name} has no fields named {", ".join(sorted(unknown_fields))}')
+
+    _check_for_missing_fields(name, event_type, fields)
+    annotations = event_type._field_annotations
+    return event_type(**{field: _decode_value(value, annotations[field]) for field, value in fields.items()})
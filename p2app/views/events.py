@@ -7,8 +7,8 @@
 # When the user interface sends these events, they are propagated to other
 # components within the user interface, but aren't sent to the engine to
 # be processed by it.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+
+from p2app.events.event import Event
 
 
 
@@ -17,108 +17,90 @@ def is_internal_event(event):
 
 
 
-class _InternalEvent:
-    def __init__(self):
-        self._INTERNAL = True
+class _InternalEvent(Event):
+    _INTERNAL = True
 
 
 
 class ShowEditContinentsViewEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class ClearContinentsSearchListEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class NewContinentEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class StartEditingContinentEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class DiscardContinentEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class ShowEditCountriesViewEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class ClearCountriesSearchListEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class NewCountryEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class StartEditingCountryEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class DiscardCountryEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class ShowEditRegionsViewEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class ClearRegionsSearchListEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class NewRegionEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class StartEditingRegionEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class DiscardRegionEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class EnableDebugModeEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
 
 
 
 class DisableDebugModeEvent(_InternalEvent):
-    def __init__(self):
-        super().__init__()
+    pass
@@ -4,8 +4,6 @@
 # Project 2: Learning to Fly
 #
 # The outermost shell of the user interface.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 import tkinter
 import tkinter.messagebox
@@ -40,7 +38,7 @@ class MainView(tkinter.Tk, EventHandler):
 
     def initiate_event(self, event):
         if is_internal_event(event):
-            self.handle_event(event)
+            self._event_bus.initiate_internal_event(event)
         else:
             self._event_bus.initiate_event(event)
 
@@ -5,8 +5,12 @@
 #
 # This is the main module that runs the entire program.
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# The engine runs on the user interface's thread unless the program is run with
+# the --async option, which runs it on a worker thread instead, so that a slow
+# search never stops the user interface from responding, at the cost of every
+# event waiting for the user interface to poll for it.
 
+import sys
 from p2app import EventBus
 from p2app import Engine
 from p2app import MainView
@@ -20,6 +24,9 @@ def main():
     event_bus.register_engine(engine)
     event_bus.register_view(main_view)
 
+    if '--async' in sys.argv[1:]:
+        event_bus.enable_async_mode()
+
     main_view.run()
 
 
@@ -0,0 +1,7 @@
+# tests/__init__.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the engine and the event bus, runnable with either unittest or pytest
+# from the project directory.
@@ -0,0 +1,115 @@
+# tests/databases.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Small databases for the tests to work on, created from the project's schema in a
+# temporary directory.  The airports, runways, frequencies and navaids that can be
+# added to them are generated from a seeded random number generator, so they're the
+# same every time, but irregular enough that searches over them can be checked
+# against the answer found by brute force.
+
+from pathlib import Path
+import random
+import sqlite3
+import tempfile
+
+
+
+_SCHEMA_PATH = Path(__file__).parent.parent / 'schema.sql'
+
+
+
+def make_database(directory) -> Path:
+    """Creates a database in directory with two continents and a country in each,
+    and returns its path"""
+    path = Path(directory) / 'airport.db'
+    connection = sqlite3.connect(path)
+    connection.executescript(_SCHEMA_PATH.read_text())
+    connection.executescript("""
+        INSERT INTO continent VALUES (1, 'EU', 'Europe'), (2, 'AS', 'Asia');
+        INSERT INTO country VALUES
+            (1, 'FR', 'France', 1, 'https://en.wikipedia.org/wiki/France', NULL),
+            (2, 'JP', 'Japan', 2, 'https://en.wikipedia.org/wiki/Japan', NULL);
+        """)
+    connection.commit()
+    connection.close()
+    return path
+
+
+
+# The regions that airports are generated in: their ID, country and continent, and
+# the latitudes and longitudes that their airports are scattered over
+_AIRPORT_REGIONS = {
+    1: (1, 1, (42.5, 46.5), (-1.5, 7.5)),
+    2: (1, 1, (46.5, 51.0), (-4.5, 3.0)),
+    3: (2, 2, (41.5, 45.5), (139.5, 145.5))
+}
+
+_SURFACES = ('ASP', 'CON', 'GRS', 'TURF')
+
+_FREQUENCY_TYPES = ('TWR', 'GND', 'ATIS', 'CTAF')
+
+
+
+def add_airports(path, airport_count: int = 60, navaid_count: int = 40, seed: int = 0) -> None:
+    """Adds three regions to the database at path (made by make_database), along with
+    airport_count airports scattered over them, a few runways and frequencies for each,
+    and navaid_count navaids scattered over France"""
+    rng = random.Random(seed)
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        INSERT INTO region VALUES
+            (1, 'FR-ARA', 'ARA', 'Auvergne-Rhone-Alpes', 1, 1, NULL, NULL),
+            (2, 'FR-BRE', 'BRE', 'Bretagne', 1, 1, NULL, 'brittany'),
+            (3, 'JP-01', '01', 'Hokkaido', 2, 2, NULL, NULL);
+        """)
+
+    for airport_id in range(1, airport_count + 1):
+        region_id = rng.choice(tuple(_AIRPORT_REGIONS))
+        continent_id, country_id, latitudes, longitudes = _AIRPORT_REGIONS[region_id]
+        airport_type = rng.choice(('small_airport', 'medium_airport', 'large_airport', 'heliport'))
+        connection.execute(
+            'INSERT INTO airport VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ;',
+            (airport_id, f'ZZ{airport_id:02d}', airport_type, f'Airport {airport_id}',
+             round(rng.uniform(*latitudes), 4), round(rng.uniform(*longitudes), 4),
+             rng.randrange(0, 3000), continent_id, country_id, region_id, None,
+             rng.randrange(2), None, None, None, None, None, None))
+
+        for runway in range(rng.randrange(4)):
+            connection.execute("""
+                INSERT INTO runway (airport_id, length_ft, width_ft, surface, lighted, closed)
+                VALUES (?, ?, ?, ?, ?, ?) ;
+                """, (airport_id, rng.randrange(1000, 13000, 100), rng.randrange(50, 200, 5),
+                      rng.choice(_SURFACES), rng.randrange(2), int(rng.random() < 0.1)))
+
+        for frequency in range(rng.randrange(1, 4)):
+            connection.execute("""
+                INSERT INTO airport_frequency (airport_id, type, description, frequency_mhz)
+                VALUES (?, ?, NULL, ?) ;
+                """, (airport_id, rng.choice(_FREQUENCY_TYPES), rng.randrange(118000, 119000, 25) / 1000))
+
+    for navaid in range(navaid_count):
+        # The IDs are deliberately far from the rowids, so nothing can confuse them
+        connection.execute(
+            'INSERT INTO navigation_aid VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, '
+            'NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL) ;',
+            (1000 + 7 * navaid, f'nav{navaid}.html', f'N{navaid:02d}', f'Beacon {navaid}',
+             rng.choice(('VOR', 'NDB')), rng.randrange(112000, 112400, 50),
+             round(rng.uniform(42.5, 51.0), 4), round(rng.uniform(-4.5, 7.5), 4), 'FR'))
+
+    connection.commit()
+    connection.close()
+
+
+
+class TemporaryDatabase:
+    """Mixes into a TestCase a database, created anew for each test, whose path is
+    self.database_path, in a temporary directory whose path is self.directory"""
+
+    def setUp(self):
+        super().setUp()
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+        self.database_path = make_database(self.directory)
@@ -0,0 +1,132 @@
+# tests/test_airport_codes.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of resolving an airport code to the airports known by it, through the
+# in-memory index of every airport's codes, checked against the columns they're in.
+
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.airport_codes import CODE_COLUMNS, AirportCodeIndex
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+class TestAirportCodeIndex(unittest.TestCase):
+    def test_codes_are_resolved_without_regard_to_case_most_specific_first(self):
+        index = AirportCodeIndex()
+        index.put(Airport(1, 'LFPG', *[None] * 10, 'LFPG', 'CDG', None, None, None, None))
+        index.put(Airport(2, 'XCDG', *[None] * 10, None, None, 'CDG', None, None, None))
+        index.put(Airport(3, 'CDG', *[None] * 10, None, None, None, None, None, None))
+
+        self.assertEqual(index.resolve(' cdg '), [3, 1, 2])
+        self.assertEqual(index.resolve('lfpg'), [1])
+        self.assertEqual(index.resolve('ORY'), [])
+
+
+    def test_replacing_or_removing_an_airport_forgets_its_old_codes(self):
+        index = AirportCodeIndex()
+        index.put(Airport(1, 'LFPG', *[None] * 10, None, 'CDG', None, None, None, None))
+        index.put(Airport(1, 'LFPG', *[None] * 10, None, 'XYZ', None, None, None, None))
+        self.assertEqual(index.resolve('CDG'), [])
+        self.assertEqual(index.resolve('XYZ'), [1])
+
+        index.remove(1)
+        self.assertEqual(index.resolve('LFPG'), [])
+        self.assertEqual(len(index), 0)
+
+
+
+class TestResolvingAirportCodes(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+
+        # Give the airports overlapping codes, so that some codes belong to several
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("""
+            UPDATE airport
+            SET gps_code = 'G' || (airport_id % 7),
+                iata_code = CASE WHEN airport_id % 3 = 0 THEN 'i' || (airport_id % 5) END,
+                local_code = CASE WHEN airport_id % 4 = 0 THEN 'ZZ' || printf('%02d', airport_id / 4) END ;
+            """)
+        connection.commit()
+        connection.close()
+
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def resolve(self, code: str) -> list[int]:
+        resolved_event, = self.process(ResolveAirportCodeEvent(code))
+        self.assertEqual(resolved_event.code(), code)
+        return [airport.airport_id for airport in resolved_event.airports()]
+
+
+    def brute_force_resolve(self, code: str) -> list[int]:
+        connection = sqlite3.connect(self.database_path)
+        matches = {}
+        for priority, column in enumerate(CODE_COLUMNS):
+            cursor = connection.execute(f'SELECT airport_id FROM airport WHERE UPPER({column}) = UPPER(?) ;', (code,))
+            for airport_id, in cursor.fetchall():
+                matches.setdefault(airport_id, priority)
+        connection.close()
+        return sorted(matches, key = lambda airport_id: (matches[airport_id], airport_id))
+
+
+    def every_code(self) -> set[str]:
+        connection = sqlite3.connect(self.database_path)
+        codes = set()
+        for column in CODE_COLUMNS:
+            codes.update(code for code, in connection.execute(f'SELECT {column} FROM airport ;') if code)
+        connection.close()
+        return codes
+
+
+    def test_every_code_resolves_as_a_search_of_every_column_would(self):
+        codes = self.every_code()
+        self.assertIn('ZZ03', codes)
+        for code in sorted(codes) + ['zz03', 'g1', 'NOPE']:
+            with self.subTest(code = code):
+                self.assertEqual(self.resolve(code), self.brute_force_resolve(code))
+
+        # ZZ03 is airport 3's identifier and airport 12's local code
+        self.assertEqual(self.resolve('ZZ03'), [3, 12])
+
+
+    def test_saved_airports_are_resolved_by_their_new_codes(self):
+        airport, = self.process(LoadAirportEvent(5))
+        airport = airport.airport()._replace(iata_code = 'NEW', gps_code = None)
+        self.assertIsInstance(self.process(SaveAirportEvent(airport))[0], AirportSavedEvent)
+
+        new_airport = airport._replace(airport_id = None, airport_ident = 'ZZ99', iata_code = 'NEW')
+        self.assertIsInstance(self.process(SaveNewAirportEvent(new_airport))[0], AirportSavedEvent)
+
+        for code in ('NEW', 'G5', 'ZZ99', 'ZZ05'):
+            with self.subTest(code = code):
+                self.assertEqual(self.resolve(code), self.brute_force_resolve(code))
+        self.assertEqual(self.resolve('NEW')[0], 5)
+
+
+    def test_codes_saved_in_a_rolled_back_transaction_are_forgotten(self):
+        airport, = self.process(LoadAirportEvent(5))
+        self.process(BeginTransactionEvent())
+        self.process(SaveAirportEvent(airport.airport()._replace(iata_code = 'NEW')))
+        self.assertEqual(self.resolve('NEW'), [5])
+        self.process(RollbackTransactionEvent())
+
+        self.assertEqual(self.resolve('NEW'), [])
+        self.assertEqual(self.resolve('G5'), self.brute_force_resolve('G5'))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# tests/test_async_engine.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the asyncio interface to the engine: that it gives the same results as
+# the engine itself, without ever blocking the event loop while they're found.
+
+import asyncio
+from contextlib import aclosing
+import threading
+import time
+import unittest
+from p2app.engine import AsyncEngine, Engine
+from p2app.events import *
+from .databases import TemporaryDatabase
+
+
+
+class _CountEvent(Event):
+    """An event whose handler counts up to a number, one result at a time"""
+    count: int
+
+
+
+class TestAsyncEngine(TemporaryDatabase, unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = Engine()
+        self.engine.register_handler(_CountEvent, self.count)
+        self.handler_threads = set()
+        self.closed_counts = []
+        self.async_engine = AsyncEngine(self.engine, result_batch_size = 3)
+        await self.async_engine.process_events([OpenDatabaseEvent(self.database_path)])
+
+
+    async def asyncTearDown(self):
+        await self.async_engine.process_events([CloseDatabaseEvent()])
+        await self.async_engine.__aexit__(None, None, None)
+
+
+    def count(self, event):
+        self.handler_threads.add(threading.current_thread())
+        try:
+            for number in range(event.count()):
+                time.sleep(0.01)
+                yield ErrorEvent(str(number))
+        finally:
+            self.closed_counts.append(event.count())
+
+
+    async def test_results_match_the_engine_and_arrive_in_batches(self):
+        events = [
+            StartContinentSearchEvent('EU', None),
+            LoadCountryEvent(2),
+            _CountEvent(7),
+            SaveNewContinentEvent(Continent(None, 'NA', 'North America'))
+        ]
+        results = await self.async_engine.process_events(events)
+
+        self.assertEqual(
+            [type(result) for result in results],
+            [ContinentSearchResultEvent, CountryLoadedEvent] + [ErrorEvent] * 7 + [ContinentSavedEvent])
+        self.assertEqual(results[0].continent(), Continent(1, 'EU', 'Europe'))
+        self.assertEqual(results[1].country().name, 'Japan')
+        self.assertEqual([result.message() for result in results[2:9]], [str(number) for number in range(7)])
+        self.assertNotIn(threading.current_thread(), self.handler_threads)
+
+
+    async def test_event_loop_keeps_running_while_the_engine_works(self):
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        results = await self.async_engine.process_events([_CountEvent(20)])
+        ticker.cancel()
+
+        self.assertEqual(len(results), 20)
+        self.assertGreater(ticks, 10)
+
+
+    async def test_concurrent_sessions_each_get_their_own_results(self):
+        sessions = await asyncio.gather(*(
+            self.async_engine.process_events([_CountEvent(count)]) for count in (5, 1, 4)))
+        self.assertEqual(
+            [[result.message() for result in results] for results in sessions],
+            [['0', '1', '2', '3', '4'], ['0'], ['0', '1', '2', '3']])
+
+
+    async def test_abandoned_results_close_the_engine_generator(self):
+        async with aclosing(self.async_engine.process_event(_CountEvent(100))) as results:
+            async for result in results:
+                break
+        self.assertEqual(self.closed_counts, [100])
+
+
+    async def test_transactions_are_refused(self):
+        for event in (BeginTransactionEvent(), CommitTransactionEvent(), RollbackTransactionEvent()):
+            with self.subTest(event = type(event).__name__):
+                failed_event, = await self.async_engine.process_events([event])
+                self.assertIsInstance(failed_event, TransactionFailedEvent)
+                self.assertEqual(
+                    failed_event.reason(), 'Transactions are not available to sessions that share an engine.')
+
+
+    async def test_closing_waits_for_work_already_given(self):
+        async with AsyncEngine(self.engine) as async_engine:
+            results = await async_engine.process_events([_CountEvent(3)])
+        self.assertEqual(len(results), 3)
+        with self.assertRaises(RuntimeError):
+            await async_engine.process_events([_CountEvent(1)])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# tests/test_bulk_import.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of bulk imports, which relax the database's settings and drop its derived
+# structures while they run, and have to put both back however they end.
+
+import unittest
+from p2app.engine.database import Database
+from p2app.engine.schema import schema_names
+from p2app.events import Continent
+from .databases import TemporaryDatabase
+
+
+
+class TestBulkImport(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = Database(self.database_path)
+        self.database.open()
+        self.addCleanup(self.database.close)
+        self.continents_path = self.directory / 'continents.csv'
+        self.continents_path.write_text('id,code,name\n3,NA,North America\n4,SA,South America\n')
+
+
+    def setting(self, name: str):
+        cursor = self.database._connection.execute(f'PRAGMA {name} ;')
+        value, = cursor.fetchone()
+        cursor.close()
+        return value
+
+
+    def settings(self) -> dict:
+        return {name: self.setting(name) for name in ('synchronous', 'journal_mode', 'foreign_keys')}
+
+
+    def test_import_succeeds_while_readers_are_connected(self):
+        # A search borrows one of the pooled readers, which stays connected to the
+        # file afterward, so its journal mode can't be changed during the import
+        self.assertEqual(len(list(self.database.search_continent('EU', None))), 1)
+        settings = self.settings()
+        self.assertEqual(settings['journal_mode'], 'wal')
+
+        report = self.database.bulk_import({'continent': self.continents_path})
+
+        self.assertEqual(report.loaded, {'continent': 2})
+        self.assertEqual(report.rejected, {'continent': 0})
+        self.assertEqual(self.settings(), settings)
+        self.assertEqual(len(list(self.database.search_continent('SA', None))), 1)
+
+
+    def test_failed_import_restores_settings_and_structures(self):
+        settings = self.settings()
+        names = schema_names(self.database._connection, 'table', 'index', 'trigger')
+
+        with self.assertRaises(FileNotFoundError):
+            self.database.bulk_import({'continent': self.directory / 'missing.csv'})
+
+        self.assertEqual(self.settings(), settings)
+        self.assertFalse(self.database._connection.in_transaction)
+        self.assertEqual(
+            schema_names(self.database._connection, 'table', 'index', 'trigger') - {'sqlite_stat1'},
+            names)
+
+
+    def test_import_is_refused_during_a_transaction(self):
+        self.database.begin_transaction()
+        self.database.update_continent(Continent(1, 'EU', 'Renamed'))
+
+        with self.assertRaises(ValueError):
+            self.database.bulk_import({'continent': self.continents_path})
+
+        self.assertIsNone(self.database.rollback_transaction())
+        self.assertEqual(self.database.search_continent_by_id(1), Continent(1, 'EU', 'Europe'))
+        self.assertEqual(list(self.database.search_continent('SA', None)), [])
+
+
+    def test_import_of_unknown_table_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.database.bulk_import({'planet': self.continents_path})
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# tests/test_connections.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the writer connection and the pool of reader connections that share a
+# database file in WAL mode, and of retrying an operation while the file is locked.
+
+import sqlite3
+import threading
+import unittest
+from p2app.engine.connections import ConnectionManager, is_busy_error, retry_when_busy
+from .databases import TemporaryDatabase
+
+
+
+class TestConnectionManager(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.connections = ConnectionManager(self.database_path, read_pool_size = 2)
+        self.writer = self.connections.open()
+        self.addCleanup(self.connections.close)
+
+
+    def continent_names(self, connection) -> set[str]:
+        cursor = connection.execute('SELECT name FROM continent ;')
+        names = {name for name, in cursor.fetchall()}
+        cursor.close()
+        return names
+
+
+    def test_file_is_switched_to_wal(self):
+        self.assertTrue(self.connections.is_wal())
+        connection = sqlite3.connect(self.database_path)
+        self.assertEqual(connection.execute('PRAGMA journal_mode ;').fetchone(), ('wal',))
+        connection.close()
+
+
+    def test_readers_are_read_only_and_separate_from_the_writer(self):
+        with self.connections.reader() as reader:
+            self.assertIsNot(reader, self.writer)
+            with self.assertRaises(sqlite3.OperationalError):
+                reader.execute("INSERT INTO continent VALUES (3, 'NA', 'North America') ;")
+
+
+    def test_reader_sees_only_committed_writes_and_never_blocks_the_writer(self):
+        with self.connections.reader() as reader:
+            reader.execute('BEGIN ;')
+            self.assertEqual(self.continent_names(reader), {'Europe', 'Asia'})
+
+            self.writer.execute("INSERT INTO continent VALUES (3, 'NA', 'North America') ;").close()
+            self.writer.commit()
+
+            # The reader's transaction still sees the snapshot it began with
+            self.assertEqual(self.continent_names(reader), {'Europe', 'Asia'})
+
+        with self.connections.reader() as reader:
+            self.assertEqual(self.continent_names(reader), {'Europe', 'Asia', 'North America'})
+
+
+    def test_readers_are_reused_and_the_pool_never_grows_beyond_its_size(self):
+        with self.connections.reader() as first:
+            pass
+        with self.connections.reader() as second:
+            self.assertIs(second, first)
+
+        with self.connections.reader() as first:
+            with self.connections.reader() as second:
+                with self.connections.reader() as third:
+                    self.assertEqual(len({id(first), id(second), id(third)}), 3)
+                    self.assertEqual(self.continent_names(third), {'Europe', 'Asia'})
+
+        self.assertEqual(len(self.connections._all_readers), 2)
+        self.assertEqual(self.connections._idle_readers.qsize(), 2)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            third.execute('SELECT 1 ;')
+
+
+    def test_reader_left_in_a_transaction_is_rolled_back_when_returned(self):
+        with self.connections.reader() as reader:
+            reader.execute('BEGIN ;')
+            reader.execute('SELECT * FROM continent ;').close()
+        self.assertFalse(reader.in_transaction)
+
+
+    def test_write_locked_by_another_connection_is_retried_until_its_released(self):
+        connections = ConnectionManager(self.database_path, busy_timeout_ms = 0)
+        writer = connections.open()
+        self.addCleanup(connections.close)
+
+        other = sqlite3.connect(self.database_path, check_same_thread = False)
+        self.addCleanup(other.close)
+        other.execute('BEGIN IMMEDIATE ;')
+        releaser = threading.Timer(0.1, other.rollback)
+        releaser.start()
+        self.addCleanup(releaser.join)
+
+        def insert():
+            writer.execute("INSERT INTO continent VALUES (3, 'NA', 'North America') ;").close()
+
+        retry_when_busy(insert, attempts = 6, delay = 0.05)
+        writer.commit()
+        self.assertEqual(self.continent_names(writer), {'Europe', 'Asia', 'North America'})
+
+
+    def test_writer_is_shared_without_a_pool(self):
+        connections = ConnectionManager(self.database_path, read_pool_size = 0)
+        writer = connections.open()
+        self.addCleanup(connections.close)
+        with connections.reader() as reader:
+            self.assertIs(reader, writer)
+
+
+
+class TestRetryWhenBusy(unittest.TestCase):
+    def failing_operation(self, errors: list):
+        calls = []
+        def operation():
+            calls.append(len(calls))
+            if errors:
+                raise errors.pop(0)
+            return 'done'
+        return operation, calls
+
+
+    def test_busy_operation_is_retried_until_it_succeeds(self):
+        operation, calls = self.failing_operation([
+            sqlite3.OperationalError('database is locked'),
+            sqlite3.OperationalError('database is busy')])
+        self.assertEqual(retry_when_busy(operation, attempts = 3, delay = 0), 'done')
+        self.assertEqual(len(calls), 3)
+
+
+    def test_last_busy_error_is_raised_once_attempts_run_out(self):
+        operation, calls = self.failing_operation(
+            [sqlite3.OperationalError('database is locked') for attempt in range(3)])
+        with self.assertRaises(sqlite3.OperationalError):
+            retry_when_busy(operation, attempts = 3, delay = 0)
+        self.assertEqual(len(calls), 3)
+
+
+    def test_other_errors_are_never_retried(self):
+        operation, calls = self.failing_operation([sqlite3.OperationalError('no such table: airport')])
+        with self.assertRaises(sqlite3.OperationalError):
+            retry_when_busy(operation, attempts = 3, delay = 0)
+        self.assertEqual(len(calls), 1)
+
+        self.assertFalse(is_busy_error(ValueError('database is locked')))
+        self.assertTrue(is_busy_error(sqlite3.OperationalError('database table is locked')))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# tests/test_counts.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the materialized counts of regions, airports and runways, which are
+# checked against counting the rows themselves after every kind of change that the
+# triggers maintain them through.
+
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.database import Database
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+class TestMaterializedCounts(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        self.database = Database(self.database_path)
+        self.database.open()
+        self.addCleanup(self.database.close)
+
+
+    def counted(self, level: str, key: int) -> EntityCounts:
+        connection = sqlite3.connect(self.database_path)
+        region_count, = connection.execute(
+            f'SELECT COUNT(*) FROM region WHERE {level}_id = ? ;', (key,)).fetchone()
+        airport_count, = connection.execute(
+            f'SELECT COUNT(*) FROM airport WHERE CAST({level}_id AS INTEGER) = ? ;', (key,)).fetchone()
+        runway_count, = connection.execute(f"""
+            SELECT COUNT(*)
+            FROM runway JOIN airport ON runway.airport_id = airport.airport_id
+            WHERE CAST(airport.{level}_id AS INTEGER) = ? ;
+            """, (key,)).fetchone()
+        connection.close()
+        return EntityCounts(region_count, airport_count, runway_count)
+
+
+    def assertCountsAreCorrect(self):
+        for key in (1, 2, 3):
+            with self.subTest(key = key):
+                self.assertEqual(self.database.country_counts(key), self.counted('country', key))
+                self.assertEqual(self.database.continent_counts(key), self.counted('continent', key))
+
+
+    def execute(self, statement: str, parameters = ()) -> None:
+        self.database._connection.execute(statement, parameters).close()
+        self.database._connection.commit()
+
+
+    def test_counts_match_the_rows_when_provisioned(self):
+        self.assertCountsAreCorrect()
+        self.assertEqual(self.database.country_counts(3), EntityCounts(0, 0, 0))
+
+
+    def test_counts_follow_inserts_deletes_and_moves(self):
+        self.assertIsNone(self.database.save_new_continent(Continent(None, 'NA', 'North America')))
+        self.assertIsNone(self.database.save_new_country(Country(None, 'CA', 'Canada', 3, '', None)))
+        self.assertIsNone(self.database.save_new_region(Region(None, 'CA-ON', 'ON', 'Ontario', 3, 3, None, None)))
+        self.assertCountsAreCorrect()
+
+        airport = self.database.search_airport_by_id(1)
+        self.assertIsNone(self.database.update_airport(
+            airport._replace(continent_id = 3, country_id = 3, region_id = 4)))
+        self.assertCountsAreCorrect()
+
+        self.execute('INSERT INTO runway (airport_id, lighted, closed) VALUES (1, 1, 0) ;')
+        self.execute('DELETE FROM runway WHERE airport_id = 2 ;')
+        self.execute('UPDATE runway SET airport_id = 1 WHERE airport_id = 3 ;')
+        self.assertCountsAreCorrect()
+
+        self.execute('DELETE FROM airport_frequency WHERE airport_id = 4 ;')
+        self.execute('DELETE FROM runway WHERE airport_id = 4 ;')
+        self.execute('UPDATE navigation_aid SET airport_id = NULL WHERE airport_id = 4 ;')
+        self.execute('DELETE FROM airport WHERE airport_id = 4 ;')
+        self.execute('UPDATE region SET country_id = 2, continent_id = 2 WHERE region_id = 2 ;')
+        self.assertCountsAreCorrect()
+
+
+    def test_counts_survive_being_dropped_and_provisioned(self):
+        continents_path = self.directory / 'continents.csv'
+        continents_path.write_text('id,code,name\n3,NA,North America\n')
+        self.database.bulk_import({'continent': continents_path})
+        self.assertCountsAreCorrect()
+
+
+
+class TestCountsOfIncompleteDatabases(TemporaryDatabase, unittest.TestCase):
+    def load_counts(self, *missing_tables) -> list:
+        connection = sqlite3.connect(self.database_path)
+        connection.execute(
+            "INSERT INTO region VALUES (1, 'FR-ARA', 'ARA', 'Auvergne-Rhone-Alpes', 1, 1, NULL, NULL) ;")
+        for table in missing_tables:
+            connection.execute(f'DROP TABLE {table} ;')
+        connection.commit()
+        connection.close()
+
+        engine = Engine()
+        list(engine.process_event(OpenDatabaseEvent(self.database_path)))
+        events = list(engine.process_event(LoadContinentCountsEvent(1)))
+        events += engine.process_event(SaveNewRegionEvent(Region(None, 'FR-BRE', 'BRE', 'Bretagne', 1, 1, None, None)))
+        events += engine.process_event(LoadCountryCountsEvent(1))
+        list(engine.process_event(CloseDatabaseEvent()))
+        return events
+
+
+    def assertCountedAsEmpty(self, *missing_tables):
+        continent_counts, saved, country_counts = self.load_counts(*missing_tables)
+
+        self.assertIsInstance(continent_counts, ContinentCountsLoadedEvent)
+        self.assertEqual(continent_counts.counts(), EntityCounts(1, 0, 0))
+        self.assertIsInstance(saved, RegionSavedEvent)
+        self.assertEqual(country_counts.counts(), EntityCounts(2, 0, 0))
+
+
+    def test_missing_runway_table_is_counted_as_empty(self):
+        self.assertCountedAsEmpty('runway')
+
+
+    def test_missing_airport_tables_are_counted_as_empty(self):
+        self.assertCountedAsEmpty('airport_frequency', 'navigation_aid', 'runway', 'airport')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+# tests/test_event_bus.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the event bus in asynchronous mode: what a request's timeout cuts off,
+# and the order in which the view receives results and internal events.
+
+import time
+import unittest
+from p2app.engine import Engine
+from p2app.events import *
+from .databases import TemporaryDatabase
+
+
+
+class _ClearSearchEvent(Event):
+    """An internal event of the view's, which the engine never sees"""
+    pass
+
+
+
+class _SlowEngine:
+    """An engine that takes a while to save a continent, then reports it saved"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.saved = []
+
+
+    def process_event(self, event):
+        time.sleep(self.delay)
+        self.saved.append(event.continent())
+        yield ContinentSavedEvent(event.continent())
+
+
+
+class _RecordingView:
+    """A view that records every event it's sent"""
+
+    def __init__(self):
+        self.events = []
+
+
+    def handle_event(self, event):
+        self.events.append(event)
+
+
+    def after(self, ms, callback):
+        pass
+
+
+
+class TestAsyncEventBus(unittest.TestCase):
+    def setUp(self):
+        self.engine = _SlowEngine(delay = 0.3)
+        self.view = _RecordingView()
+        self.event_bus = EventBus()
+        self.event_bus.register_engine(self.engine)
+        self.event_bus.register_view(self.view)
+        self.event_bus.enable_async_mode()
+        self.addCleanup(self.event_bus.disable_async_mode)
+
+
+    def test_save_that_outlasts_its_timeout_is_still_reported(self):
+        continent = Continent(None, 'NA', 'North America')
+        request = self.event_bus.initiate_event(SaveNewContinentEvent(continent), timeout = 0.1)
+        self.assertTrue(request.wait(timeout = 5))
+        self.event_bus.disable_async_mode()
+
+        self.assertEqual(self.engine.saved, [continent])
+        self.assertEqual(len(self.view.events), 1)
+        self.assertIsInstance(self.view.events[0], ContinentSavedEvent)
+
+
+    def test_request_that_expires_while_waiting_is_never_started(self):
+        first = Continent(None, 'NA', 'North America')
+        second = Continent(None, 'SA', 'South America')
+        self.event_bus.initiate_event(SaveNewContinentEvent(first), timeout = 0.1)
+        request = self.event_bus.initiate_event(SaveNewContinentEvent(second), timeout = 0.1)
+        self.assertTrue(request.wait(timeout = 5))
+        self.event_bus.disable_async_mode()
+
+        self.assertEqual(self.engine.saved, [first])
+        self.assertEqual([type(event) for event in self.view.events], [ContinentSavedEvent, ErrorEvent])
+        self.assertEqual(self.view.events[1].message(), 'The request timed out.')
+
+
+    def test_internal_events_are_delivered_in_order_with_results(self):
+        continent = Continent(None, 'NA', 'North America')
+        self.event_bus.initiate_internal_event(_ClearSearchEvent())
+        self.event_bus.initiate_event(SaveNewContinentEvent(continent))
+        self.event_bus.initiate_internal_event(_ClearSearchEvent())
+        self.event_bus.disable_async_mode()
+
+        self.assertEqual(
+            [type(event) for event in self.view.events],
+            [_ClearSearchEvent, ContinentSavedEvent, _ClearSearchEvent])
+
+
+
+class _SlowQueryEvent(Event):
+    """An event whose handler runs a query that takes minutes to produce its result,
+    on the writer connection or on a reader connection"""
+    on_writer: bool
+
+
+
+class TestAsyncEventBusInterruptingQueries(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.engine = Engine()
+        self.engine.register_handler(_SlowQueryEvent, self.run_slow_query)
+        self.view = _RecordingView()
+        self.event_bus = EventBus()
+        self.event_bus.register_engine(self.engine)
+        self.event_bus.register_view(self.view)
+        self.event_bus.initiate_event(OpenDatabaseEvent(self.database_path))
+        self.event_bus.enable_async_mode()
+        self.addCleanup(self.event_bus.initiate_event, CloseDatabaseEvent())
+        self.addCleanup(self.event_bus.disable_async_mode)
+
+
+    def run_slow_query(self, event):
+        with self.engine._database._reading() as connection:
+            if event.on_writer():
+                connection = self.engine._database._connection
+            cursor = connection.execute("""
+                WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter)
+                SELECT COUNT(*) FROM (SELECT n FROM counter LIMIT 1000000000) ;
+                """)
+            count, = cursor.fetchone()
+            cursor.close()
+        yield ErrorEvent(f'Counted to {count}')
+
+
+    def test_query_is_interrupted_before_its_first_result(self):
+        for on_writer in (True, False):
+            request = self.event_bus.initiate_event(_SlowQueryEvent(on_writer), timeout = 0.2)
+            self.assertTrue(request.wait(timeout = 5))
+            self.assertTrue(request.is_done())
+
+        continent = Continent(None, 'NA', 'North America')
+        self.event_bus.initiate_event(SaveNewContinentEvent(continent), timeout = 5)
+        self.event_bus.disable_async_mode()
+
+        self.assertEqual(
+            [type(event) for event in self.view.events],
+            [DatabaseOpenedEvent, ErrorEvent, ErrorEvent, ContinentSavedEvent])
+        self.assertEqual(
+            [event.message() for event in self.view.events[1:3]], ['The request timed out.'] * 2)
+        self.assertEqual(self.view.events[3].continent().name, 'North America')
+
+
+    def test_request_that_finishes_in_time_is_never_interrupted(self):
+        request = self.event_bus.initiate_event(LoadContinentEvent(1), timeout = 0.2)
+        self.assertTrue(request.wait(timeout = 5))
+        time.sleep(0.3)
+        self.event_bus.initiate_event(LoadContinentEvent(2))
+        self.event_bus.disable_async_mode()
+
+        self.assertEqual(
+            [event.continent().name for event in self.view.events[1:]], ['Europe', 'Asia'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+# tests/test_frequencies.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of looking up airport frequencies by band, checked against the answers
+# found by filtering every frequency in Python.
+
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.frequencies import FrequencyIndex
+from p2app.engine.spatial import great_circle_km
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+class TestFrequencyIndex(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.addCleanup(self.connection.close)
+        self.connection.executescript("""
+            CREATE TABLE airport_frequency (
+                airport_frequency_id INTEGER PRIMARY KEY, airport_id INTEGER, type TEXT,
+                description TEXT, frequency_mhz REAL);
+            INSERT INTO airport_frequency VALUES
+                (1, 1, 'TWR', NULL, 122.8), (2, 2, 'GND', NULL, 121.9),
+                (3, 1, 'ATIS', NULL, 0.1 + 0.2 + 122.5), (4, 3, 'TWR', NULL, 118.1);
+            """)
+        self.index = FrequencyIndex()
+        self.index.load(self.connection)
+
+
+    def ids(self, frequencies) -> list[int]:
+        return [frequency.airport_frequency_id for frequency in frequencies]
+
+
+    def test_band_whose_ends_are_the_same_finds_an_inexact_frequency(self):
+        self.assertEqual(self.ids(self.index.in_band(122.8, 122.8)), [1, 3])
+        self.assertEqual(self.ids(self.index.in_band(122.801, 122.9)), [])
+
+
+    def test_bands_are_limited_to_airports(self):
+        self.assertEqual(self.ids(self.index.in_band(118.0, 123.0)), [4, 2, 1, 3])
+        self.assertEqual(self.ids(self.index.in_band(118.0, 123.0, [1, 3])), [4, 1, 3])
+        self.assertEqual(self.ids(self.index.in_band(118.0, 123.0, [99])), [])
+        self.assertEqual(len(self.index), 4)
+
+
+
+class TestFrequencySearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+        connection = sqlite3.connect(self.database_path)
+        self.frequencies = [AirportFrequency(*row) for row in connection.execute('SELECT * FROM airport_frequency ;')]
+        self.locations = {
+            airport_id: (latitude, longitude)
+            for airport_id, latitude, longitude in connection.execute(
+                'SELECT airport_id, latitude_deg, longitude_deg FROM airport ;')
+        }
+        connection.close()
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def brute_force_search(self, query: FrequencyQuery) -> list[AirportFrequency]:
+        if query.airport_id is None:
+            airport_ids = set(self.locations)
+        elif query.radius_km is None:
+            airport_ids = {query.airport_id}
+        elif query.airport_id not in self.locations:
+            airport_ids = set()
+        else:
+            origin = self.locations[query.airport_id]
+            airport_ids = {
+                airport_id for airport_id, location in self.locations.items()
+                if great_circle_km(*origin, *location) <= query.radius_km
+            }
+
+        matches = [
+            frequency for frequency in self.frequencies
+            if frequency.airport_id in airport_ids
+                and round(query.min_mhz, 3) <= round(frequency.frequency_mhz, 3) <= round(query.max_mhz, 3)
+        ]
+        return sorted(matches, key = lambda frequency: (frequency.frequency_mhz, frequency.airport_frequency_id))
+
+
+    def test_batch_of_queries_matches_brute_force_in_order(self):
+        queries = [
+            FrequencyQuery(118.0, 119.0),
+            FrequencyQuery(118.3, 118.5),
+            FrequencyQuery(118.5, 118.5),
+            FrequencyQuery(118.525, 118.5),
+            FrequencyQuery(118.0, 119.0, 7),
+            FrequencyQuery(118.2, 118.8, 7, 100.0),
+            FrequencyQuery(118.0, 119.0, 7, 400.0),
+            FrequencyQuery(118.0, 119.0, 30, 5000.0),
+            FrequencyQuery(118.0, 119.0, 999, 100.0),
+            FrequencyQuery(130.0, 131.0)
+        ]
+        results = self.process(StartFrequencySearchEvent(queries))
+
+        self.assertEqual([result.query() for result in results], queries)
+        for result in results:
+            with self.subTest(query = result.query()):
+                self.assertIsInstance(result, FrequencySearchResultEvent)
+                self.assertEqual(result.frequencies(), self.brute_force_search(result.query()))
+
+        self.assertEqual(len(results[0].frequencies()), len(self.frequencies))
+        self.assertTrue(results[6].frequencies())
+
+
+    def test_every_exact_frequency_is_found(self):
+        queries = sorted({FrequencyQuery(frequency.frequency_mhz, frequency.frequency_mhz) for frequency in self.frequencies})
+        for result in self.process(StartFrequencySearchEvent(queries)):
+            with self.subTest(query = result.query()):
+                self.assertEqual(result.frequencies(), self.brute_force_search(result.query()))
+                self.assertTrue(result.frequencies())
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# tests/test_headless.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the headless runner: events written as JSON and read back, and scripts
+# of events (including lines that can't be read) run through the engine.
+
+import io
+import json
+from pathlib import Path
+import unittest
+from p2app.engine import Engine
+from p2app.events import *
+from p2app.headless import decode_event, encode_event, run_events
+from .databases import TemporaryDatabase
+
+
+
+def _field_values(event) -> tuple:
+    return tuple(getattr(event, field)() for field in event._fields)
+
+
+
+class TestSerialization(unittest.TestCase):
+    def assertRoundTrips(self, event):
+        decoded = decode_event(encode_event(event))
+        self.assertIs(type(decoded), type(event))
+        self.assertEqual(_field_values(decoded), _field_values(event))
+
+
+    def test_events_round_trip(self):
+        airport = Airport(
+            1, 'LFPG', 'large_airport', 'Charles de Gaulle', 49.0097, 2.5479, 392, 1, 1, 1,
+            'Paris', 1, 'LFPG', 'CDG', 'CDG', None, None, None)
+
+        self.assertRoundTrips(QuitInitiatedEvent())
+        self.assertRoundTrips(OpenDatabaseEvent(Path('airport.db'), True))
+        self.assertRoundTrips(SaveNewAirportEvent(airport))
+        self.assertRoundTrips(AirportSearchPageEvent(
+            [airport], 3, SearchPageToken('airport', (('name', 'Charles de Gaulle'),), 1, 1, 3)))
+        self.assertRoundTrips(AirportSearchPageEvent([], 0, None))
+        self.assertRoundTrips(StartFrequencySearchEvent([FrequencyQuery(118.0, 119.0, 1, 50.0)]))
+        self.assertRoundTrips(StartRunwaySearchEvent(RunwayCriteria(min_length_ft = 8000, surfaces = ('ASP',))))
+
+
+    def test_fields_are_converted_to_their_declared_types(self):
+        event = decode_event(
+            '{"event": "StartNearbyAirportSearchEvent", "latitude": 49, "longitude": 2, "radius_km": 10}')
+        self.assertEqual(event.latitude(), 49.0)
+        self.assertIs(type(event.latitude()), float)
+
+        event = decode_event('{"event": "SaveNewContinentEvent", "continent": [null, "NA", "North America"]}')
+        self.assertEqual(event.continent(), Continent(None, 'NA', 'North America'))
+
+        event = decode_event('{"event": "OpenDatabaseEvent", "path": "airport.db"}')
+        self.assertEqual(event.path(), Path('airport.db'))
+        self.assertFalse(event.read_only())
+
+
+    def test_unreadable_lines_raise_value_error(self):
+        messages = {
+            '[]': 'An event must be an object with an "event" key',
+            '{"event": []}': 'An event\'s name must be a string, but found []',
+            '{"event": "NoSuchEvent"}': 'There is no event named NoSuchEvent',
+            '{"event": "QuitInitiatedEvent", "now": true}': 'QuitInitiatedEvent has no fields named now',
+            '{"event": "OpenDatabaseEvent"}': 'OpenDatabaseEvent is missing fields named path',
+            '{"event": "OpenDatabaseEvent", "path": 5}': 'Expected a path, but found 5',
+            '{"event": "SaveNewContinentEvent", "continent": {"name": "Asia"}}':
+                'Continent is missing fields named continent_id, continent_code',
+            '{"event": "StartFrequencySearchEvent", "queries": 1}': 'Expected a list, but found 1'
+        }
+
+        for line, message in messages.items():
+            with self.subTest(line = line):
+                with self.assertRaises(ValueError) as context:
+                    decode_event(line)
+                self.assertEqual(str(context.exception), message)
+
+
+
+class TestRunner(TemporaryDatabase, unittest.TestCase):
+    def run_script(self, *events, pipeline = False) -> tuple[int, list[dict]]:
+        lines = [event if isinstance(event, str) else encode_event(event) for event in events]
+        output = io.StringIO()
+        unreadable_count = run_events(lines, output, Engine(), pipeline = pipeline)
+        return unreadable_count, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+    def test_script_is_answered_in_order(self):
+        for pipeline in (False, True):
+            with self.subTest(pipeline = pipeline):
+                unreadable_count, results = self.run_script(
+                    OpenDatabaseEvent(self.database_path),
+                    '{"event": []}',
+                    '',
+                    StartContinentSearchEvent('AS', None),
+                    QuitInitiatedEvent(),
+                    StartContinentSearchEvent('EU', None),
+                    pipeline = pipeline)
+
+                self.assertEqual(unreadable_count, 1)
+                self.assertEqual(
+                    [result['event'] for result in results],
+                    ['DatabaseOpenedEvent', 'ErrorEvent', 'ContinentSearchResultEvent', 'EndApplicationEvent'])
+                self.assertEqual(results[1]['message'], 'Line 2: An event\'s name must be a string, but found []')
+                self.assertEqual(results[2]['continent'], {'continent_id': 2, 'continent_code': 'AS', 'name': 'Asia'})
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# tests/test_navigation_aids.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of finding the navaids near a point and the navaids whose frequencies
+# conflict, checked against the answers found by comparing every pair of navaids.
+
+import itertools
+import random
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.navigation_aids import find_frequency_conflicts
+from p2app.engine.spatial import great_circle_km
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+def _navigation_aid(navigation_aid_id: int, frequency_khz: int, latitude: float, longitude: float) -> NavigationAid:
+    return NavigationAid(*[None] * len(NavigationAid._fields))._replace(
+        navigation_aid_id = navigation_aid_id, frequency_khz = frequency_khz,
+        latitude_deg = latitude, longitude_deg = longitude)
+
+
+
+def _brute_force_conflicts(navigation_aids, max_distance_km, frequency_tolerance_khz) -> list[tuple]:
+    """Returns each conflicting pair as (distance, first ID, second ID, frequency difference),
+    nearest pair first"""
+    conflicts = []
+    for first, second in itertools.combinations(navigation_aids, 2):
+        difference = abs(first.frequency_khz - second.frequency_khz)
+        distance = great_circle_km(first.latitude_deg, first.longitude_deg, second.latitude_deg, second.longitude_deg)
+        if difference <= frequency_tolerance_khz and distance <= max_distance_km:
+            first_id, second_id = sorted((first.navigation_aid_id, second.navigation_aid_id))
+            conflicts.append((distance, first_id, second_id, difference))
+    return sorted(conflicts)
+
+
+
+def _as_tuples(conflicts) -> list[tuple]:
+    return [
+        (conflict.distance_km,
+         *sorted((conflict.navigation_aid1.navigation_aid_id, conflict.navigation_aid2.navigation_aid_id)),
+         conflict.frequency_difference_khz)
+        for conflict in conflicts
+    ]
+
+
+
+class TestFrequencyConflicts(unittest.TestCase):
+    def assertConflictsMatch(self, conflicts, expected):
+        conflicts = _as_tuples(conflicts)
+        self.assertEqual([conflict[1:] for conflict in conflicts], [conflict[1:] for conflict in expected])
+        for conflict, expected_conflict in zip(conflicts, expected):
+            self.assertAlmostEqual(conflict[0], expected_conflict[0], places = 9)
+
+
+    def test_random_navaids_match_brute_force(self):
+        rng = random.Random(1)
+        navigation_aids = [
+            _navigation_aid(number, rng.randrange(108000, 108500, 25), rng.uniform(-89, 89), rng.uniform(-180, 180))
+            for number in range(400)
+        ]
+        for max_distance_km, frequency_tolerance_khz in ((500, 0), (1500, 25), (3000, 100), (0, 0)):
+            with self.subTest(max_distance_km = max_distance_km, frequency_tolerance_khz = frequency_tolerance_khz):
+                self.assertConflictsMatch(
+                    find_frequency_conflicts(navigation_aids, max_distance_km, frequency_tolerance_khz),
+                    _brute_force_conflicts(navigation_aids, max_distance_km, frequency_tolerance_khz))
+
+
+    def test_conflicts_across_the_antimeridian_and_a_pole(self):
+        navigation_aids = [
+            _navigation_aid(1, 110000, 10.0, 179.9),
+            _navigation_aid(2, 110000, 10.0, -179.9),
+            _navigation_aid(3, 110000, 89.9, 0.0),
+            _navigation_aid(4, 110000, 89.9, 180.0),
+            _navigation_aid(5, 110050, 10.0, 179.95)
+        ]
+        for frequency_tolerance_khz in (0, 50):
+            with self.subTest(frequency_tolerance_khz = frequency_tolerance_khz):
+                conflicts = find_frequency_conflicts(navigation_aids, 50.0, frequency_tolerance_khz)
+                self.assertConflictsMatch(
+                    conflicts, _brute_force_conflicts(navigation_aids, 50.0, frequency_tolerance_khz))
+                self.assertIn((1, 2), [(conflict[1], conflict[2]) for conflict in _as_tuples(conflicts)])
+                self.assertIn((3, 4), [(conflict[1], conflict[2]) for conflict in _as_tuples(conflicts)])
+
+
+    def test_negative_limits_are_rejected(self):
+        with self.assertRaises(ValueError):
+            find_frequency_conflicts([], -1.0)
+        with self.assertRaises(ValueError):
+            find_frequency_conflicts([], 1.0, -25)
+
+
+
+class TestNavigationAidSearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def navigation_aids(self) -> list[NavigationAid]:
+        connection = sqlite3.connect(self.database_path)
+        navigation_aids = [NavigationAid(*row) for row in connection.execute('SELECT * FROM navigation_aid ;')]
+        connection.close()
+        return navigation_aids
+
+
+    def test_conflict_search_matches_brute_force(self):
+        for max_distance_km, frequency_tolerance_khz in ((100.0, 0), (250.0, 50), (2000.0, 0)):
+            with self.subTest(max_distance_km = max_distance_km, frequency_tolerance_khz = frequency_tolerance_khz):
+                results = self.process(StartFrequencyConflictSearchEvent(max_distance_km, frequency_tolerance_khz))
+                self.assertTrue(all(isinstance(result, FrequencyConflictEvent) for result in results))
+                conflicts = _as_tuples(result.conflict() for result in results)
+                expected = _brute_force_conflicts(self.navigation_aids(), max_distance_km, frequency_tolerance_khz)
+                self.assertTrue(expected)
+                self.assertEqual([conflict[1:] for conflict in conflicts], [conflict[1:] for conflict in expected])
+
+
+    def test_nearby_search_matches_brute_force_as_navaids_move(self):
+        for moved in (False, True):
+            if moved:
+                connection = sqlite3.connect(self.database_path)
+                connection.execute('UPDATE navigation_aid SET latitude_deg = 47.0, longitude_deg = 2.0 WHERE navigation_aid_id % 3 = 0 ;')
+                connection.execute('DELETE FROM navigation_aid WHERE navigation_aid_id % 5 = 0 ;')
+                connection.commit()
+                connection.close()
+
+            for radius_km in (30.0, 150.0, 1000.0):
+                with self.subTest(moved = moved, radius_km = radius_km):
+                    results = self.process(StartNearbyNavigationAidSearchEvent(47.0, 2.0, radius_km))
+                    expected = sorted(
+                        (great_circle_km(47.0, 2.0, navigation_aid.latitude_deg, navigation_aid.longitude_deg),
+                         navigation_aid.navigation_aid_id)
+                        for navigation_aid in self.navigation_aids())
+                    expected = [(distance, navigation_aid_id) for distance, navigation_aid_id in expected if distance <= radius_km]
+                    self.assertEqual(
+                        [(result.distance_km(), result.navigation_aid().navigation_aid_id) for result in results],
+                        expected)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# tests/test_paging.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of paged searches: the pages they're split into, the tokens that continue
+# them, and the total count of their matches.
+
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+class TestPagedSearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        connection = sqlite3.connect(self.database_path)
+        connection.executemany(
+            "INSERT INTO country (country_code, name, continent_id, wikipedia_link) VALUES (?, 'Testland', ?, '') ;",
+            [(f'T{number}', number % 2 + 1) for number in range(7)])
+        connection.commit()
+        connection.close()
+
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def fetch_every_page(self, event) -> list:
+        page, = self.process(event)
+        pages = [page]
+        while page.next_page() is not None:
+            page, = self.process(FetchNextPageEvent(page.next_page()))
+            pages.append(page)
+        return pages
+
+
+    def test_pages_cover_every_match_in_order_of_their_keys(self):
+        pages = self.fetch_every_page(StartPagedCountrySearchEvent(None, 'Testland', 3))
+
+        self.assertTrue(all(isinstance(page, CountrySearchPageEvent) for page in pages))
+        self.assertEqual([len(page.countries()) for page in pages], [3, 3, 1])
+        self.assertEqual(
+            [country.country_code for page in pages for country in page.countries()],
+            [f'T{number}' for number in range(7)])
+        self.assertEqual({page.total_count() for page in pages}, {7})
+
+
+    def test_page_that_ends_exactly_at_the_last_match_has_no_next_page(self):
+        pages = self.fetch_every_page(StartPagedCountrySearchEvent(None, 'Testland', 7))
+        self.assertEqual(len(pages), 1)
+        self.assertIsNone(pages[0].next_page())
+
+        page, = self.process(StartPagedContinentSearchEvent('EU', None, 10))
+        self.assertEqual(page.continents(), [Continent(1, 'EU', 'Europe')])
+        self.assertEqual(page.total_count(), 1)
+        self.assertIsNone(page.next_page())
+
+
+    def test_token_continues_after_its_last_key(self):
+        first_page, = self.process(StartPagedCountrySearchEvent(None, 'Testland', 3))
+        token = first_page.next_page()
+        self.assertEqual(token, SearchPageToken('country', (('name', 'Testland'),), 3, 5, 7))
+
+        # Deleting rows from the page that's been seen doesn't shift the next one
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("DELETE FROM country WHERE country_code IN ('T0', 'T1') ;")
+        connection.commit()
+        connection.close()
+
+        second_page, = self.process(FetchNextPageEvent(token))
+        self.assertEqual([country.country_code for country in second_page.countries()], ['T3', 'T4', 'T5'])
+        self.assertEqual(second_page.total_count(), 7)
+
+
+    def test_airports_and_regions_are_paged_by_each_criterion(self):
+        pages = self.fetch_every_page(StartPagedAirportSearchEvent('ZZ07', None, 2))
+        self.assertEqual([airport.airport_id for page in pages for airport in page.airports()], [7])
+
+        page, = self.process(StartPagedRegionSearchEvent(None, 'BRE', None, 2))
+        self.assertIsInstance(page, RegionSearchPageEvent)
+        self.assertEqual([region.region_code for region in page.regions()], ['FR-BRE'])
+
+        pages = self.fetch_every_page(StartPagedRegionSearchEvent(None, None, None, 2))
+        self.assertEqual(
+            [region.region_id for page in pages for region in page.regions()], [1, 2, 3])
+        self.assertEqual(pages[0].total_count(), 3)
+
+
+    def test_page_size_must_be_at_least_one(self):
+        for page_size in (0, -1, 2.5):
+            with self.subTest(page_size = page_size):
+                error, = self.process(StartPagedCountrySearchEvent(None, 'Testland', page_size))
+                self.assertIsInstance(error, ErrorEvent)
+                self.assertEqual(
+                    error.message(), 'Search Failed.\nPage size must be a whole number of at least 1.')
+
+
+
+if __name__ == '__main__':
+    unittest.main()
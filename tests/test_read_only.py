@@ -0,0 +1,121 @@
+# tests/test_read_only.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of opening a database read-only: it can be searched like any other, but
+# nothing can be saved to it, and the file is never changed.
+
+import hashlib
+import unittest
+from p2app.engine import Engine
+from p2app.engine.database import Database
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+class TestReadOnlyDatabase(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+
+        # A writable open creates the indexes and tables that searches rely on
+        database = Database(self.database_path)
+        database.open()
+        database.close()
+        self.file_hash = self.hash_file()
+
+        self.engine = Engine()
+        opened_event, = self.process(OpenDatabaseEvent(self.database_path, read_only = True))
+        self.assertIsInstance(opened_event, DatabaseOpenedEvent)
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def hash_file(self) -> str:
+        return hashlib.sha256(self.database_path.read_bytes()).hexdigest()
+
+
+    def test_searches_work_as_they_do_when_writable(self):
+        continent, = self.process(StartContinentSearchEvent('EU', None))
+        self.assertEqual(continent.continent(), Continent(1, 'EU', 'Europe'))
+
+        loaded, = self.process(LoadAirportEvent(3))
+        self.assertEqual(loaded.airport().airport_ident, 'ZZ03')
+
+        match, = self.process(StartTextSearchEvent('bretagne', None))
+        self.assertEqual((match.match().entity, match.match().record_id), ('region', 2))
+
+        nearest, = self.process(StartNearestAirportSearchEvent(45.0, 3.0, 1))
+        self.assertIsInstance(nearest, NearbyAirportResultEvent)
+
+        resolved, = self.process(ResolveAirportCodeEvent('zz07'))
+        self.assertEqual([airport.airport_id for airport in resolved.airports()], [7])
+
+        self.assertEqual(self.hash_file(), self.file_hash)
+
+
+    def test_saves_and_transactions_are_refused_without_changing_the_file(self):
+        failed_event, = self.process(SaveNewContinentEvent(Continent(None, 'NA', 'North America')))
+        self.assertIsInstance(failed_event, SaveContinentFailedEvent)
+        self.assertEqual(failed_event.reason(), 'Save New Continent Failed.\nThe database was opened read-only.')
+
+        failed_event, = self.process(SaveContinentEvent(Continent(1, 'EU', 'Renamed')))
+        self.assertEqual(failed_event.reason(), 'Save Continent Failed.\nThe database was opened read-only.')
+
+        loaded, = self.process(LoadAirportEvent(3))
+        failed_event, = self.process(SaveAirportEvent(loaded.airport()._replace(name = 'Renamed')))
+        self.assertIsInstance(failed_event, SaveAirportFailedEvent)
+        self.assertIn('The database was opened read-only.', failed_event.reason())
+
+        failed_event, = self.process(BeginTransactionEvent())
+        self.assertIsInstance(failed_event, TransactionFailedEvent)
+        self.assertIn('The database was opened read-only.', failed_event.reason())
+
+        continent, = self.process(LoadContinentEvent(1))
+        self.assertEqual(continent.continent().name, 'Europe')
+        self.assertEqual(self.hash_file(), self.file_hash)
+
+
+    def test_bulk_import_is_refused(self):
+        database = Database(self.database_path, read_only = True)
+        database.open()
+        self.addCleanup(database.close)
+
+        self.assertTrue(database.is_read_only())
+        with self.assertRaises(ValueError) as context:
+            database.bulk_import([])
+        self.assertEqual(str(context.exception), 'The database was opened read-only.')
+
+
+
+class TestReadOnlyOpenFailures(TemporaryDatabase, unittest.TestCase):
+    def test_missing_file_fails_to_open_without_being_created(self):
+        path = self.directory / 'missing.db'
+        failed_event, = Engine().process_event(OpenDatabaseEvent(path, read_only = True))
+
+        self.assertIsInstance(failed_event, DatabaseOpenFailedEvent)
+        self.assertTrue(failed_event.reason().startswith('The database could not be opened.\n'))
+        self.assertFalse(path.exists())
+
+
+    def test_nothing_is_created_in_a_database_opened_read_only_first(self):
+        file_hash = hashlib.sha256(self.database_path.read_bytes()).hexdigest()
+        database = Database(self.database_path, read_only = True)
+        database.open()
+        self.addCleanup(database.close)
+
+        report = database.index_report()
+        self.assertEqual(report.created, [])
+        self.assertTrue(report.skipped)
+        self.assertEqual(list(database.search_continent('AS', None)), [Continent(2, 'AS', 'Asia')])
+        self.assertEqual(hashlib.sha256(self.database_path.read_bytes()).hexdigest(), file_hash)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
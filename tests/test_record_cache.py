@@ -0,0 +1,92 @@
+# tests/test_record_cache.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the size-bounded caches of loaded records, and of the engine keeping
+# them in step with what's saved and rolled back.
+
+import unittest
+from p2app.engine import Engine
+from p2app.engine.record_cache import LRUCache, RecordCache
+from p2app.events import *
+from .databases import TemporaryDatabase
+
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_least_recently_used_value_is_evicted(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats(), (3, 1, 1, 2, 2))
+
+
+    def test_capacity_must_be_at_least_one(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+
+
+class TestRecordCache(unittest.TestCase):
+    def test_record_is_loaded_once_until_invalidated(self):
+        loads = []
+        def loader(record_id):
+            loads.append(record_id)
+            return f'record {record_id}'
+
+        cache = RecordCache({'region': 4})
+        self.assertEqual(cache.load('region', 7, loader), 'record 7')
+        self.assertEqual(cache.load('region', 7, loader), 'record 7')
+        cache.invalidate('region', 7)
+        cache.load('region', 7, loader)
+
+        self.assertEqual(loads, [7, 7])
+        self.assertEqual(cache.stats()['region'].capacity, 4)
+
+
+
+class TestEngineRecordCache(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def load_continent(self, continent_id: int) -> Continent:
+        loaded_event, = self.process(LoadContinentEvent(continent_id))
+        self.assertIsInstance(loaded_event, ContinentLoadedEvent)
+        return loaded_event.continent()
+
+
+    def test_save_replaces_the_cached_record(self):
+        self.assertEqual(self.load_continent(1), Continent(1, 'EU', 'Europe'))
+        self.process(SaveContinentEvent(Continent(1, 'EU', 'Renamed')))
+
+        self.assertEqual(self.load_continent(1), Continent(1, 'EU', 'Renamed'))
+
+
+    def test_rollback_clears_the_cache(self):
+        self.process(BeginTransactionEvent())
+        self.process(SaveContinentEvent(Continent(1, 'EU', 'Renamed')))
+        self.assertEqual(self.load_continent(1), Continent(1, 'EU', 'Renamed'))
+
+        rolled_back_event, = self.process(RollbackTransactionEvent())
+        self.assertIsInstance(rolled_back_event, TransactionRolledBackEvent)
+        self.assertEqual(self.load_continent(1), Continent(1, 'EU', 'Europe'))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
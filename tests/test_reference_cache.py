@@ -0,0 +1,90 @@
+# tests/test_reference_cache.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the in-memory copy of the continent and country tables: that lookups
+# are served from it, that saves are written through to it, and that it forgets
+# what a rollback undoes.
+
+import sqlite3
+import unittest
+from p2app.engine.database import Database
+from p2app.events import *
+from .databases import TemporaryDatabase
+
+
+
+class TestReferenceCache(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = Database(self.database_path)
+        self.database.open()
+        self.addCleanup(self.database.close)
+
+
+    def test_lookups_are_served_from_memory(self):
+        before = self.database.reference_cache_stats()
+        self.assertEqual(self.database.search_continent_by_id(2), Continent(2, 'AS', 'Asia'))
+        self.assertEqual(self.database.search_country_by_id(1).country_code, 'FR')
+        after = self.database.reference_cache_stats()
+
+        self.assertEqual(after.hits - before.hits, 2)
+        self.assertEqual(after.misses, before.misses)
+
+
+    def test_saves_are_written_through(self):
+        self.assertIsNone(self.database.save_new_continent(Continent(None, 'NA', 'North America')))
+        self.assertIsNone(self.database.update_continent(Continent(1, 'EU', 'Renamed')))
+        before = self.database.reference_cache_stats()
+
+        self.assertEqual(self.database.search_continent_by_id(3), Continent(3, 'NA', 'North America'))
+        self.assertEqual(self.database.search_continent_by_id(1), Continent(1, 'EU', 'Renamed'))
+        self.assertEqual(self.database.reference_cache_stats().hits - before.hits, 2)
+
+
+    def test_rollback_reloads_the_cache(self):
+        self.database.begin_transaction()
+        self.database.update_continent(Continent(1, 'EU', 'Renamed'))
+        self.assertEqual(self.database.search_continent_by_id(1), Continent(1, 'EU', 'Renamed'))
+        self.database.rollback_transaction()
+
+        self.assertEqual(self.database.search_continent_by_id(1), Continent(1, 'EU', 'Europe'))
+
+    def test_saves_can_refer_to_records_added_by_other_connections(self):
+        other_connection = sqlite3.connect(self.database_path)
+        other_connection.execute("INSERT INTO continent VALUES (3, 'NA', 'North America') ;")
+        other_connection.execute("""
+            INSERT INTO country VALUES (3, 'CA', 'Canada', 3, 'https://en.wikipedia.org/wiki/Canada', NULL) ;
+            """)
+        other_connection.commit()
+        other_connection.close()
+
+        self.assertIsNone(self.database.save_new_country(Country(None, 'MX', 'Mexico', 3, '', None)))
+        self.assertIsNone(self.database.save_new_region(Region(None, 'CA-ON', 'ON', 'Ontario', 3, 3, None, None)))
+        self.assertEqual(self.database.search_continent_by_id(3), Continent(3, 'NA', 'North America'))
+
+
+    def test_saves_that_refer_to_missing_records_are_rejected(self):
+        self.assertEqual(
+            self.database.save_new_country(Country(None, 'XX', 'Nowhere', 99, '', None)),
+            'Continent ID does not exist.')
+        self.assertEqual(
+            self.database.save_new_region(Region(None, 'FR-X', 'X', 'Nowhere', 1, 99, None, None)),
+            'Continent ID or Country ID does not exist.')
+        self.assertEqual(
+            self.database.save_new_airport(Airport(
+                None, 'XXXX', 'small_airport', 'Nowhere', 0.0, 0.0, None, 1, 99, 1,
+                None, 0, None, None, None, None, None, None)),
+            'Country ID does not exist.')
+
+
+    def test_missing_id_is_left_to_the_database(self):
+        self.assertEqual(
+            self.database.save_new_country(Country(None, 'XX', 'Nowhere', None, '', None)),
+            'NOT NULL constraint failed: country.continent_id')
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# tests/test_runways.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of searching airports by their runways, checked against the answers found
+# by filtering every runway in Python, and of those searches using indexes.
+
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.database import Database
+from p2app.engine.runways import RunwaySearch
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+# Criteria that exercise each filter alone and in combination
+_CRITERIA = [
+    RunwayCriteria(),
+    RunwayCriteria(min_length_ft = 8000),
+    RunwayCriteria(max_length_ft = 3000),
+    RunwayCriteria(min_length_ft = 4000, max_length_ft = 9000, min_width_ft = 100),
+    RunwayCriteria(max_width_ft = 80, surfaces = ('GRS', 'TURF')),
+    RunwayCriteria(surfaces = ('CON',), lighted = True),
+    RunwayCriteria(lighted = False, closed = False),
+    RunwayCriteria(closed = True),
+    RunwayCriteria(min_length_ft = 6000, lighted = True, closed = False, country_id = 1),
+    RunwayCriteria(country_id = 2, surfaces = ('ASP', 'CON')),
+    RunwayCriteria(surfaces = ()),
+    RunwayCriteria(min_length_ft = 20000)
+]
+
+
+
+def _matches(runway: tuple, country_id: int, criteria: RunwayCriteria) -> bool:
+    length_ft, width_ft, surface, lighted, closed = runway
+    return (criteria.min_length_ft is None or length_ft >= criteria.min_length_ft) \
+        and (criteria.max_length_ft is None or length_ft <= criteria.max_length_ft) \
+        and (criteria.min_width_ft is None or width_ft >= criteria.min_width_ft) \
+        and (criteria.max_width_ft is None or width_ft <= criteria.max_width_ft) \
+        and (criteria.surfaces is None or surface in criteria.surfaces) \
+        and (criteria.lighted is None or bool(lighted) == criteria.lighted) \
+        and (criteria.closed is None or bool(closed) == criteria.closed) \
+        and (criteria.country_id is None or country_id == criteria.country_id)
+
+
+
+class TestRunwaySearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def brute_force_search(self, criteria: RunwayCriteria) -> list[tuple]:
+        connection = sqlite3.connect(self.database_path)
+        rows = connection.execute("""
+            SELECT runway.airport_id, airport.country_id, length_ft, width_ft, surface, lighted, closed
+            FROM runway
+            JOIN airport ON airport.airport_id = runway.airport_id ;
+            """).fetchall()
+        connection.close()
+
+        runways_by_airport = {}
+        for airport_id, country_id, *runway in rows:
+            if _matches(runway, country_id, criteria):
+                runways_by_airport.setdefault(airport_id, []).append(runway)
+
+        return [
+            (airport_id, RunwaySummary(
+                len(runways), max(runway[0] for runway in runways),
+                max(runway[1] for runway in runways), sum(runway[3] for runway in runways)))
+            for airport_id, runways in sorted(runways_by_airport.items())
+        ]
+
+
+    def test_searches_match_brute_force(self):
+        for criteria in _CRITERIA:
+            with self.subTest(criteria = criteria):
+                results = self.process(StartRunwaySearchEvent(criteria))
+                self.assertTrue(all(isinstance(result, RunwaySearchResultEvent) for result in results))
+                self.assertEqual(
+                    [(result.airport().airport_id, result.summary()) for result in results],
+                    self.brute_force_search(criteria))
+
+
+    def test_results_are_whole_airports(self):
+        result, *_ = self.process(StartRunwaySearchEvent(RunwayCriteria()))
+        loaded, = self.process(LoadAirportEvent(result.airport().airport_id))
+        self.assertEqual(result.airport(), loaded.airport())
+
+
+    def test_searches_follow_changes_to_runways(self):
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("UPDATE runway SET length_ft = 15000, lighted = 1, closed = 0 WHERE runway_id % 3 = 0 ;")
+        connection.execute('DELETE FROM runway WHERE runway_id % 5 = 0 ;')
+        connection.commit()
+        connection.close()
+
+        for criteria in (RunwayCriteria(min_length_ft = 14000), RunwayCriteria(lighted = True)):
+            with self.subTest(criteria = criteria):
+                results = self.process(StartRunwaySearchEvent(criteria))
+                self.assertEqual(
+                    [(result.airport().airport_id, result.summary()) for result in results],
+                    self.brute_force_search(criteria))
+
+
+
+class TestRunwaySearchPlans(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        database = Database(self.database_path)
+        database.open()
+        database.close()
+        self.connection = sqlite3.connect(self.database_path)
+        self.addCleanup(self.connection.close)
+
+
+    def test_searches_never_scan_the_runway_table(self):
+        # An empty list of surfaces makes the WHERE clause false, which SQLite checks
+        # once before its loop over the runways ever starts, so its plan doesn't matter
+        for criteria in [criteria for criteria in _CRITERIA if criteria.surfaces != ()]:
+            with self.subTest(criteria = criteria):
+                plan = RunwaySearch(self.connection).query_plan(criteria)
+                self.assertFalse([step for step in plan if step.startswith('SCAN runway')], plan)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# tests/test_spatial.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of the proximity searches of airports, backed by an R*Tree, checked against
+# the answers found by computing the distance to every airport.
+
+import math
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.spatial import EARTH_RADIUS_KM, bounding_boxes, great_circle_km
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+def _distance_km(latitude1, longitude1, latitude2, longitude2) -> float:
+    """The great-circle distance between two points, by the spherical law of cosines"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    dlambda = math.radians(longitude2 - longitude1)
+    cosine = math.sin(phi1) * math.sin(phi2) + math.cos(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return EARTH_RADIUS_KM * math.acos(max(-1.0, min(1.0, cosine)))
+
+
+
+class TestDistances(unittest.TestCase):
+    def test_great_circle_distances(self):
+        # Paris to London, and a quarter of the way around the equator
+        self.assertAlmostEqual(great_circle_km(48.8566, 2.3522, 51.5072, -0.1276), 343.5, delta = 0.5)
+        self.assertAlmostEqual(great_circle_km(0, 0, 0, 90), math.pi / 2 * EARTH_RADIUS_KM, places = 6)
+        self.assertEqual(great_circle_km(10, 20, 10, 20), 0.0)
+
+
+    def test_boxes_are_split_at_the_antimeridian(self):
+        boxes = bounding_boxes(0.0, 179.9, 50.0)
+        self.assertEqual(len(boxes), 2)
+        self.assertEqual(boxes[0][3], 180.0)
+        self.assertEqual(boxes[1][2], -180.0)
+        self.assertLess(boxes[1][3], -179.0)
+
+
+    def test_boxes_reaching_a_pole_span_every_longitude(self):
+        box, = bounding_boxes(89.9, 10.0, 50.0)
+        self.assertEqual(box[1:], (90.0, -180.0, 180.0))
+
+
+
+class TestProximitySearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def airport_locations(self) -> list[tuple]:
+        connection = sqlite3.connect(self.database_path)
+        locations = connection.execute('SELECT airport_id, latitude_deg, longitude_deg FROM airport ;').fetchall()
+        connection.close()
+        return locations
+
+
+    def brute_force_near(self, latitude, longitude) -> list[tuple]:
+        distances = [
+            (_distance_km(latitude, longitude, airport_latitude, airport_longitude), airport_id)
+            for airport_id, airport_latitude, airport_longitude in self.airport_locations()
+        ]
+        return sorted(distances)
+
+
+    def assertResultsMatch(self, results, expected):
+        self.assertEqual([result.airport().airport_id for result in results], [airport_id for distance, airport_id in expected])
+        for result, (distance, airport_id) in zip(results, expected):
+            self.assertAlmostEqual(result.distance_km(), distance, places = 6)
+
+
+    def test_box_search_finds_exactly_the_airports_in_the_box(self):
+        for box in ((44.0, 47.0, 0.0, 5.0), (41.0, 52.0, -5.0, 8.0), (0.0, 1.0, 0.0, 1.0)):
+            with self.subTest(box = box):
+                results = self.process(StartAirportBoxSearchEvent(*box))
+                expected = {
+                    airport_id for airport_id, latitude, longitude in self.airport_locations()
+                    if box[0] <= latitude <= box[1] and box[2] <= longitude <= box[3]
+                }
+                self.assertEqual({result.airport().airport_id for result in results}, expected)
+                self.assertTrue(all(isinstance(result, AirportSearchResultEvent) for result in results))
+
+
+    def test_nearby_search_matches_brute_force(self):
+        for latitude, longitude in ((45.0, 3.0), (48.5, -2.0), (43.0, 142.0)):
+            for radius_km in (10.0, 150.0, 600.0, 20000.0):
+                with self.subTest(latitude = latitude, longitude = longitude, radius_km = radius_km):
+                    results = self.process(StartNearbyAirportSearchEvent(latitude, longitude, radius_km))
+                    expected = [
+                        (distance, airport_id) for distance, airport_id in self.brute_force_near(latitude, longitude)
+                        if distance <= radius_km
+                    ]
+                    self.assertResultsMatch(results, expected)
+
+
+    def test_nearest_search_matches_brute_force(self):
+        for latitude, longitude in ((45.0, 3.0), (43.0, 142.0), (-33.9, 151.2)):
+            for count in (1, 5, 60, 100):
+                with self.subTest(latitude = latitude, longitude = longitude, count = count):
+                    results = self.process(StartNearestAirportSearchEvent(latitude, longitude, count))
+                    self.assertResultsMatch(results, self.brute_force_near(latitude, longitude)[:count])
+
+
+    def test_searches_follow_saved_moved_and_deleted_airports(self):
+        loaded, = self.process(LoadAirportEvent(10))
+        moved = loaded.airport()._replace(latitude_deg = 0.05, longitude_deg = 179.95)
+        self.process(SaveAirportEvent(moved))
+        added = moved._replace(airport_id = None, airport_ident = 'ZZ99', latitude_deg = -0.05, longitude_deg = -179.95)
+        self.process(SaveNewAirportEvent(added))
+
+        results = self.process(StartNearbyAirportSearchEvent(0.0, 180.0, 20.0))
+        self.assertEqual(sorted(result.airport().airport_ident for result in results), ['ZZ10', 'ZZ99'])
+
+        connection = sqlite3.connect(self.database_path)
+        connection.execute('DELETE FROM airport WHERE airport_id IN (SELECT airport_id FROM airport LIMIT 5) ;')
+        connection.commit()
+        connection.close()
+
+        for latitude, longitude in ((45.0, 3.0), (0.0, -179.0)):
+            with self.subTest(latitude = latitude, longitude = longitude):
+                results = self.process(StartNearestAirportSearchEvent(latitude, longitude, 8))
+                self.assertResultsMatch(results, self.brute_force_near(latitude, longitude)[:8])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
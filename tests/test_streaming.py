@@ -0,0 +1,95 @@
+# tests/test_streaming.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of searches streaming their results from the cursor in batches, rather
+# than reading every row before the first is returned.
+
+import sqlite3
+import unittest
+from p2app.engine import Engine
+from p2app.engine.database import Database
+from p2app.events import *
+from .databases import TemporaryDatabase
+
+
+
+class TestStreamingSearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        connection = sqlite3.connect(self.database_path)
+        connection.executemany(
+            "INSERT INTO country (country_code, name, continent_id, wikipedia_link) VALUES (?, 'Testland', 1, '') ;",
+            [(f'T{number}',) for number in range(7)])
+        connection.commit()
+        connection.close()
+
+        self.database = Database(self.database_path, fetch_batch_size = 2, read_pool_size = 1)
+        self.database.open()
+        self.addCleanup(self.database.close)
+
+
+    def test_every_row_is_generated_across_batches(self):
+        countries = list(self.database.search_country(None, 'Testland'))
+        self.assertEqual([country.country_code for country in countries], [f'T{number}' for number in range(7)])
+        self.assertTrue(all(isinstance(country, Country) for country in countries))
+
+
+    def test_rows_are_read_one_batch_at_a_time(self):
+        fetched = []
+        original_stream_rows = self.database._stream_rows
+
+        def stream_rows(cursor, record_type):
+            class RecordingCursor:
+                def fetchmany(self, size):
+                    rows = cursor.fetchmany(size)
+                    fetched.append(len(rows))
+                    return rows
+
+                def close(self):
+                    cursor.close()
+
+            return original_stream_rows(RecordingCursor(), record_type)
+
+        self.database._stream_rows = stream_rows
+        countries = self.database.search_country(None, 'Testland')
+        next(countries)
+        self.assertEqual(fetched, [2])
+        countries.close()
+
+        list(self.database.search_country(None, 'Testland'))
+        self.assertEqual(fetched, [2, 2, 2, 2, 1, 0])
+
+
+    def test_closing_a_search_early_returns_its_reader(self):
+        countries = self.database.search_country(None, 'Testland')
+        next(countries)
+        self.assertEqual(self.database._connections._idle_readers.qsize(), 0)
+        countries.close()
+        self.assertEqual(self.database._connections._idle_readers.qsize(), 1)
+
+        self.assertEqual(len(list(self.database.search_country(None, 'Testland'))), 7)
+        self.assertEqual(self.database._connections._idle_readers.qsize(), 1)
+
+
+
+class TestStreamingEngineSearches(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.engine = Engine()
+        list(self.engine.process_event(OpenDatabaseEvent(self.database_path)))
+        self.addCleanup(lambda: list(self.engine.process_event(CloseDatabaseEvent())))
+
+
+    def test_search_results_are_generated_as_rows_arrive(self):
+        results = self.engine.process_event(StartCountrySearchEvent(None, 'France'))
+        first = next(results)
+        self.assertIsInstance(first, CountrySearchResultEvent)
+        self.assertEqual(first.country().country_code, 'FR')
+        self.assertEqual(list(results), [])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# tests/test_text_search.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of full-text search: what it matches, how it orders matches from several
+# tables, and the FTS5 indexes staying in step with their tables, even when VACUUM
+# renumbers the rowids of a table that has no INTEGER PRIMARY KEY.
+
+import sqlite3
+import unittest
+from p2app.engine.database import Database
+from p2app.engine.text_search import to_match_expression
+from p2app.events import *
+from .databases import TemporaryDatabase, add_airports
+
+
+
+class TestMatchExpression(unittest.TestCase):
+    def test_words_are_quoted_and_prefixed(self):
+        self.assertEqual(to_match_expression('new "york'), '"new"* """york"*')
+        self.assertEqual(to_match_expression('new york', prefix = False), '"new" "york"')
+        self.assertEqual(to_match_expression('   '), '')
+
+
+
+class TestTextSearch(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        add_airports(self.database_path)
+        self.database = Database(self.database_path)
+        self.database.open()
+        self.addCleanup(self.database.close)
+
+
+    def navaid_names(self) -> dict[int, str]:
+        connection = sqlite3.connect(self.database_path)
+        names = dict(connection.execute('SELECT navigation_aid_id, name FROM navigation_aid ;'))
+        connection.close()
+        return names
+
+
+    def test_matches_are_found_by_prefix_in_names_and_keywords(self):
+        matches = self.database.search_text('bret')
+        self.assertEqual([(match.entity, match.record_id) for match in matches], [('region', 2)])
+
+        matches = self.database.search_text('brittany', ['region'])
+        self.assertEqual([(match.entity, match.record_id) for match in matches], [('region', 2)])
+
+        self.assertEqual(self.database.search_text('bret', ['airport']), [])
+
+
+    def test_navaids_are_identified_by_their_ids(self):
+        names = self.navaid_names()
+        matches = self.database.search_text('beacon', ['navigation_aid'], limit = 100)
+
+        self.assertEqual(len(matches), len(names))
+        for match in matches:
+            self.assertEqual(match.name, names[match.record_id])
+
+
+    def test_index_survives_vacuum_renumbering_rowids(self):
+        connection = self.database._connection
+        connection.execute('DELETE FROM navigation_aid WHERE navigation_aid_id IN (1000, 1007, 1014) ;').close()
+        # VACUUM keeps the rowids of a table with an index, so drop it to be sure
+        # that they're renumbered
+        connection.execute('DROP INDEX navigation_aid_id_index ;').close()
+        connection.commit()
+        connection.execute('VACUUM ;').close()
+        cursor = connection.execute('SELECT MIN(rowid) FROM navigation_aid ;')
+        self.assertEqual(cursor.fetchone(), (1,))
+        cursor.close()
+        connection.execute("UPDATE navigation_aid SET name = 'Lighthouse' WHERE navigation_aid_id = 1070 ;").close()
+        connection.commit()
+
+        connection = sqlite3.connect(self.database_path)
+        idents = connection.execute('SELECT navigation_aid_id, ident FROM navigation_aid ;').fetchall()
+        connection.close()
+        self.assertEqual(len(idents), 37)
+        for navigation_aid_id, ident in idents:
+            with self.subTest(ident = ident):
+                matches = self.database.search_text(ident, ['navigation_aid'])
+                self.assertEqual([match.record_id for match in matches], [navigation_aid_id])
+
+        match, = self.database.search_text('lighthouse', ['navigation_aid'])
+        self.assertEqual(match.record_id, 1070)
+
+
+    def test_index_keyed_by_rowid_is_recreated(self):
+        self.database.close()
+        connection = sqlite3.connect(self.database_path)
+        connection.executescript("""
+            DROP TABLE navigation_aid_text;
+            CREATE VIRTUAL TABLE navigation_aid_text
+            USING fts5(ident, name, content = 'navigation_aid', content_rowid = 'rowid');
+            """)
+        connection.close()
+
+        self.database.open()
+        names = self.navaid_names()
+        matches = self.database.search_text('beacon', ['navigation_aid'], limit = 100)
+        self.assertEqual(len(matches), len(names))
+        self.assertTrue(all(match.name == names[match.record_id] for match in matches))
+
+
+    def test_tables_matches_are_ranked_separately_and_interleaved(self):
+        tables = ['airport', 'navigation_aid']
+        matches = self.database.search_text('2', tables, limit = 100)
+        self.assertTrue(matches)
+
+        by_table = {table: [match for match in matches if match.entity == table] for table in tables}
+        for table, table_matches in by_table.items():
+            ranks = [match.rank for match in table_matches]
+            self.assertEqual(ranks, sorted(ranks))
+
+        interleaved_length = 2 * min(len(table_matches) for table_matches in by_table.values())
+        self.assertEqual(
+            [match.entity for match in matches[:interleaved_length]],
+            tables * (interleaved_length // 2))
+
+        self.assertEqual(self.database.search_text('2', tables, limit = 3), matches[:3])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# tests/test_transactions.py
+#
+# ICS 33 Fall 2023
+# Project 2: Learning to Fly
+#
+# Tests of transactions: the savepoint that each save within one is applied in,
+# and what a rollback or a failed commit leaves behind.
+
+import unittest
+from p2app.engine import Engine
+from p2app.engine.database import Database
+from p2app.events import *
+from .databases import TemporaryDatabase
+
+
+
+class TestDatabaseTransactions(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.database = Database(self.database_path)
+        self.database.open()
+        self.addCleanup(self.database.close)
+
+
+    def continent_codes(self) -> set[str]:
+        return {continent.continent_code
+                for code in ('EU', 'AS', 'NA', 'SA')
+                for continent in self.database.search_continent(code, None)}
+
+
+    def test_failed_save_is_undone_without_the_rest_of_the_transaction(self):
+        self.assertIsNone(self.database.begin_transaction())
+        self.assertIsNone(self.database.save_new_continent(Continent(None, 'NA', 'North America')))
+        self.assertEqual(
+            self.database.save_new_continent(Continent(None, 'EU', 'Europe Again')),
+            'Continent Code already exists.')
+        self.assertIsNone(self.database.save_new_continent(Continent(None, 'SA', 'South America')))
+        self.assertIsNone(self.database.commit_transaction())
+
+        self.assertEqual(self.continent_codes(), {'EU', 'AS', 'NA', 'SA'})
+        self.assertEqual(self.database.search_continent_by_id(1), Continent(1, 'EU', 'Europe'))
+
+
+    def test_rollback_undoes_every_save(self):
+        self.database.begin_transaction()
+        self.database.save_new_continent(Continent(None, 'NA', 'North America'))
+        self.database.update_continent(Continent(2, 'AS', 'Renamed'))
+        self.assertIsNone(self.database.rollback_transaction())
+
+        self.assertFalse(self.database.in_transaction())
+        self.assertEqual(self.continent_codes(), {'EU', 'AS'})
+
+
+    def test_failed_commit_rolls_back_and_ends_the_transaction(self):
+        self.database.begin_transaction()
+        self.database.update_continent(Continent(1, 'EU', 'Renamed'))
+        # A deferred foreign key violation isn't noticed until the commit
+        connection = self.database._connection
+        connection.execute('PRAGMA defer_foreign_keys = ON ;').close()
+        connection.execute("""
+            INSERT INTO country (country_code, name, continent_id, wikipedia_link)
+            VALUES ('XX', 'Nowhere', 99, '') ;
+            """).close()
+
+        self.assertIn('FOREIGN KEY constraint failed', self.database.commit_transaction())
+        self.assertFalse(self.database.in_transaction())
+        self.assertEqual(self.database.search_continent_by_id(1), Continent(1, 'EU', 'Europe'))
+        self.assertEqual(list(self.database.search_country('XX', None)), [])
+
+        self.assertIsNone(self.database.save_new_continent(Continent(None, 'NA', 'North America')))
+        self.assertEqual(self.continent_codes(), {'EU', 'AS', 'NA'})
+
+
+    def test_transactions_cannot_be_nested_or_ended_twice(self):
+        self.database.begin_transaction()
+        self.assertEqual(self.database.begin_transaction(), 'A transaction is already in progress.')
+        self.database.commit_transaction()
+        self.assertEqual(self.database.commit_transaction(), 'No transaction is in progress.')
+        self.assertEqual(self.database.rollback_transaction(), 'No transaction is in progress.')
+
+
+
+class TestEngineTransactions(TemporaryDatabase, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.engine = Engine()
+        self.process(OpenDatabaseEvent(self.database_path))
+        self.addCleanup(self.process, CloseDatabaseEvent())
+
+
+    def process(self, event) -> list:
+        return list(self.engine.process_event(event))
+
+
+    def test_saves_between_begin_and_commit_are_committed_together(self):
+        events = self.process(BeginTransactionEvent())
+        events += self.process(SaveNewContinentEvent(Continent(None, 'NA', 'North America')))
+        events += self.process(SaveNewContinentEvent(Continent(None, 'SA', 'South America')))
+        events += self.process(CommitTransactionEvent())
+
+        self.assertEqual(
+            [type(event) for event in events],
+            [TransactionBegunEvent, ContinentSavedEvent, ContinentSavedEvent, TransactionCommittedEvent])
+
+
+    def test_commit_without_a_transaction_fails(self):
+        failed_event, = self.process(CommitTransactionEvent())
+        self.assertIsInstance(failed_event, TransactionFailedEvent)
+        self.assertEqual(
+            failed_event.reason(), 'Commit Transaction Failed.\nNo transaction is in progress.')
+
+
+
+if __name__ == '__main__':
+    unittest.main()